@@ -1,13 +1,30 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 import os
+import time
 from langchain_openai import ChatOpenAI
 import json
 from datetime import datetime
+from .concurrency import LLMOverloadedError, create_agent_limiter, get_global_limiter
+from .llm_registry import get_llm_registry
+from .llm_cache import get_llm_cache, make_llm_cache_key
+from .single_flight import get_single_flight
+from .tokens import estimate_tokens
+from .usage import PromptTooLargeError, count_message_tokens, fit_prompt, get_prompt_budget, get_usage_tracker
 
 class BaseAgent(ABC):
     """Base class for all research assistant agents using Alchemyst proxy"""
     
+    # Default number of concurrent LLM calls for this agent (LLM_AGENT_CONCURRENCY when None)
+    llm_concurrency: Optional[int] = None
+    # Response cache policy: disable for conversational agents, TTL in seconds (LLM_CACHE_TTL when None)
+    llm_cache_enabled: bool = True
+    llm_cache_ttl: Optional[float] = None
+    # Prompt size limit in tokens and what to do with larger prompts, "truncate" or "reject"
+    # (LLM_PROMPT_BUDGET and LLM_PROMPT_POLICY when None)
+    llm_prompt_budget: Optional[int] = None
+    llm_prompt_policy: Optional[str] = None
+    
     def __init__(self):
         self.alchemyst_api_key = os.getenv("ALCHEMYST_API_KEY")
         self.agent_name = self.__class__.__name__
@@ -17,16 +34,25 @@ class BaseAgent(ABC):
         
         # Initialize LLM with correct Alchemyst proxy configuration
         self.llm = self._initialize_llm()
+        self.llm_limiter = create_agent_limiter(self.agent_name, self.llm_concurrency)
+        self.llm_cache = get_llm_cache() if self.llm_cache_enabled else None
+        self.llm_cache_hits = 0
+        self.llm_cache_misses = 0
+        self.llm_prompt_budget, self.llm_prompt_policy = get_prompt_budget(
+            self.agent_name, self.llm_prompt_budget, self.llm_prompt_policy
+        )
+        self.usage_tracker = get_usage_tracker()
     
     def _initialize_llm(self) -> ChatOpenAI:
         """Initialize the LLM with correct Alchemyst proxy configuration"""
         # For Alchemyst AI proxy - no OpenAI API key needed
         BASE_URL_WITH_PROXY = "https://platform-backend.getalchemystai.com/api/v1/proxy/default"
         
-        return ChatOpenAI(
-            api_key=self.alchemyst_api_key,
+        # Agents share one pooled client per model/base URL instead of one each
+        return get_llm_registry().get_llm(
             model="alchemyst-ai/alchemyst-c1",
             base_url=BASE_URL_WITH_PROXY,
+            api_key=self.alchemyst_api_key
         )
     
     @abstractmethod
@@ -34,25 +60,143 @@ class BaseAgent(ABC):
         """Process the main request for this agent"""
         pass
     
-    async def _call_llm(self, messages: List[Dict], temperature: float = 0.7) -> str:
+    async def _call_llm(self, messages: List[Dict], temperature: float = 0.7, use_cache: bool = True) -> str:
         """Make a call to the LLM with the given messages"""
         try:
-            # Convert messages to the format expected by LangChain
-            formatted_messages = []
-            for msg in messages:
-                if isinstance(msg, dict):
-                    formatted_messages.append(msg)
-                else:
-                    # Handle LangChain message objects if needed
-                    formatted_messages.append({"role": "user", "content": str(msg)})
+            formatted_messages, prompt_tokens, truncated = self._fit_prompt(self._format_messages(messages))
+            
+            if not use_cache:
+                started = time.perf_counter()
+                response = await self._invoke_llm(formatted_messages, temperature)
+                self._record_usage(prompt_tokens, response, False, time.perf_counter() - started, truncated)
+                return response
             
-            # Use the LLM to generate response
-            result = self.llm.invoke(formatted_messages)
-            return result.content
+            cache_key = make_llm_cache_key(self.llm.model_name, temperature, formatted_messages)
+            if self.llm_cache is not None:
+                cached = await self.llm_cache.aget(cache_key)
+                if cached is not None:
+                    self.llm_cache_hits += 1
+                    self._record_usage(prompt_tokens, cached, True, 0.0, truncated)
+                    return cached
+                self.llm_cache_misses += 1
             
+            # Identical concurrent calls share a single upstream request, which only its leader pays for
+            started = time.perf_counter()
+            response, led = await get_single_flight("llm").do_leading(
+                cache_key, lambda: self._invoke_llm(formatted_messages, temperature, cache_key)
+            )
+            self._record_usage(prompt_tokens, response, False, time.perf_counter() - started, truncated, coalesced=not led)
+            return response
+            
+        except PromptTooLargeError:
+            # Already logged and counted by _fit_prompt
+            raise
+        except LLMOverloadedError as e:
+            self.log_activity("llm_overloaded", {"error": str(e)})
+            raise
+        except Exception as e:
+            self.log_activity("llm_exception", {"error": str(e)})
+            raise Exception(f"LLM call failed: {str(e)}")
+    
+    async def _invoke_llm(self, formatted_messages: List[Dict], temperature: float,
+                          cache_key: Optional[str] = None) -> str:
+        """Send one request to the LLM and cache the response"""
+        # Wait for an agent slot first so one busy agent cannot hog the global pool
+        async with self.llm_limiter.slot(), get_global_limiter().slot():
+            result = await self.llm.ainvoke(formatted_messages, temperature=temperature)
+        
+        if cache_key is not None and self.llm_cache is not None and result.content:
+            await self.llm_cache.aset(cache_key, result.content, self.llm_cache_ttl)
+        return result.content
+    
+    async def _stream_llm(self, messages: List[Dict], temperature: float = 0.7,
+                          use_cache: bool = True) -> AsyncIterator[str]:
+        """Stream the LLM response as text chunks while the model produces them"""
+        formatted_messages, prompt_tokens, truncated = self._fit_prompt(self._format_messages(messages))
+        
+        cache_key = None
+        if use_cache and self.llm_cache is not None:
+            cache_key = make_llm_cache_key(self.llm.model_name, temperature, formatted_messages)
+            cached = await self.llm_cache.aget(cache_key)
+            if cached is not None:
+                self.llm_cache_hits += 1
+                self._record_usage(prompt_tokens, cached, True, 0.0, truncated)
+                yield cached
+                return
+            self.llm_cache_misses += 1
+        
+        chunks = []
+        started = time.perf_counter()
+        try:
+            async with self.llm_limiter.slot(), get_global_limiter().slot():
+                stream = self.llm.astream(formatted_messages, temperature=temperature)
+                try:
+                    async for chunk in stream:
+                        if chunk.content:
+                            chunks.append(chunk.content)
+                            yield chunk.content
+                finally:
+                    # Closes the upstream HTTP stream when the consumer stops early
+                    await stream.aclose()
+                    self._record_usage(prompt_tokens, "".join(chunks), False, time.perf_counter() - started, truncated)
+        except LLMOverloadedError as e:
+            self.log_activity("llm_overloaded", {"error": str(e)})
+            raise
         except Exception as e:
             self.log_activity("llm_exception", {"error": str(e)})
             raise Exception(f"LLM call failed: {str(e)}")
+        
+        # Only complete responses are cached
+        if cache_key is not None and chunks:
+            await self.llm_cache.aset(cache_key, "".join(chunks), self.llm_cache_ttl)
+    
+    def _format_messages(self, messages: List[Any]) -> List[Dict]:
+        """Convert messages to the format expected by LangChain"""
+        formatted_messages = []
+        for msg in messages:
+            if isinstance(msg, dict):
+                formatted_messages.append(msg)
+            else:
+                # Handle LangChain message objects if needed
+                formatted_messages.append({"role": "user", "content": str(msg)})
+        return formatted_messages
+    
+    def _fit_prompt(self, formatted_messages: List[Dict]) -> Tuple[List[Dict], int, bool]:
+        """Count prompt tokens and apply this agent's prompt budget"""
+        try:
+            fitted, prompt_tokens, truncated = fit_prompt(formatted_messages, self.llm_prompt_budget, self.llm_prompt_policy)
+        except PromptTooLargeError:
+            prompt_tokens = sum(count_message_tokens(formatted_messages))
+            self.usage_tracker.record_rejection(self.agent_name, prompt_tokens)
+            self.log_activity("llm_prompt_rejected", {"prompt_tokens": prompt_tokens, "budget": self.llm_prompt_budget})
+            raise
+        if truncated:
+            self.log_activity("llm_prompt_truncated", {"prompt_tokens": prompt_tokens, "budget": self.llm_prompt_budget})
+        return fitted, prompt_tokens, truncated
+    
+    def _record_usage(self, prompt_tokens: int, response: str, cached: bool, seconds: float, truncated: bool,
+                      coalesced: bool = False):
+        """Attribute one call's tokens to this agent and the current request"""
+        self.usage_tracker.record_call(
+            self.agent_name, prompt_tokens, estimate_tokens(response), cached=cached, seconds=seconds,
+            truncated=truncated, coalesced=coalesced
+        )
+    
+    def get_llm_stats(self) -> Dict[str, Any]:
+        """Get LLM concurrency statistics for this agent"""
+        return {
+            "limiter": self.llm_limiter.get_stats(),
+            "cache": {
+                "enabled": self.llm_cache is not None,
+                "ttl": self.llm_cache_ttl,
+                "hits": self.llm_cache_hits,
+                "misses": self.llm_cache_misses
+            },
+            "prompt_budget": {
+                "budget": self.llm_prompt_budget,
+                "policy": self.llm_prompt_policy
+            }
+        }
     
     def _create_system_message(self, system_prompt: str) -> Dict[str, str]:
         """Create a system message for the agent"""
@@ -0,0 +1,221 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+_MISSING = object()
+
+def get_cache_dir() -> str:
+    """Get (and create) the directory used for persistent caches"""
+    cache_dir = os.getenv("CACHE_DIR", ".cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+class MemoryCache:
+    """Bounded in-memory LRU cache with per-entry TTL"""
+    
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a value, or default if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entries when full"""
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SQLiteCache:
+    """Persistent key/value cache stored in SQLite, with per-entry TTL"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode this syncs at checkpoints rather than on every commit; a crash can only lose recent entries
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "expires_at REAL, PRIMARY KEY (namespace, key))"
+        )
+        self._conn.commit()
+    
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        """Get a JSON-decoded value, or default if missing or expired"""
+        entry = self.get_entry(namespace, key)
+        return default if entry is None else entry[0]
+    
+    def get_entry(self, namespace: str, key: str) -> Optional[Tuple[Any, Optional[float]]]:
+        """Get (value, expires_at) for a live entry, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(namespace, key)
+            return None
+        return json.loads(value), expires_at
+    
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a JSON-serializable value"""
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), expires_at)
+            )
+            self._conn.commit()
+    
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+            self._conn.commit()
+    
+    def purge_expired(self) -> int:
+        """Remove expired entries and return how many were deleted"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+    
+    def count(self, namespace: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache WHERE namespace = ?", (namespace,)).fetchone()[0]
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class TieredCache:
+    """Memory LRU tier in front of an optional persistent SQLite tier, with hit/miss metrics
+    
+    Async code uses aget/aset, which run the SQLite tier in a worker thread so disk reads and
+    commits never block the event loop.
+    """
+    
+    def __init__(self, namespace: str, max_entries: int = 1024, disk: Optional[SQLiteCache] = None,
+                 default_ttl: Optional[float] = None):
+        self.namespace = namespace
+        self.memory = MemoryCache(max_entries)
+        self.disk = disk
+        self.default_ttl = default_ttl
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a value from the first tier that has it"""
+        value = self._get_memory(key)
+        if value is not _MISSING:
+            return value
+        entry = self.disk.get_entry(self.namespace, key) if self.disk is not None else None
+        return self._from_disk(key, entry, default)
+    
+    async def aget(self, key: str, default: Any = None) -> Any:
+        """Get a value from the first tier that has it, reading the disk tier off the event loop"""
+        value = self._get_memory(key)
+        if value is not _MISSING:
+            return value
+        entry = await asyncio.to_thread(self.disk.get_entry, self.namespace, key) if self.disk is not None else None
+        return self._from_disk(key, entry, default)
+    
+    def _get_memory(self, key: str) -> Any:
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            self.memory_hits += 1
+        return value
+    
+    def _from_disk(self, key: str, entry: Optional[Tuple[Any, Optional[float]]], default: Any) -> Any:
+        if entry is None:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        self.disk_hits += 1
+        # Promote to memory for the remainder of the disk entry's lifetime
+        self.memory.set(key, value, expires_at - time.time() if expires_at else None)
+        return value
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value in every tier"""
+        ttl = self._set_memory(key, value, ttl)
+        if self.disk is not None:
+            self.disk.set(self.namespace, key, value, ttl)
+    
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value in every tier, writing the disk tier off the event loop"""
+        ttl = self._set_memory(key, value, ttl)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, self.namespace, key, value, ttl)
+    
+    def _set_memory(self, key: str, value: Any, ttl: Optional[float]) -> Optional[float]:
+        ttl = ttl if ttl is not None else self.default_ttl
+        self.memory.set(key, value, ttl)
+        self.writes += 1
+        return ttl
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss statistics for this cache"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "memory_entries": len(self.memory),
+            "memory_capacity": self.memory.max_entries,
+            "disk_entries": self.disk.count(self.namespace) if self.disk is not None else None,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else None
+        }
+
+_disk_caches: Dict[str, SQLiteCache] = {}
+_disk_lock = threading.Lock()
+
+def get_disk_cache(filename: str) -> SQLiteCache:
+    """Get the shared SQLite cache stored under the cache directory"""
+    path = os.path.join(get_cache_dir(), filename)
+    with _disk_lock:
+        if path not in _disk_caches:
+            _disk_caches[path] = SQLiteCache(path)
+            _disk_caches[path].purge_expired()
+        return _disk_caches[path]
\ No newline at end of file
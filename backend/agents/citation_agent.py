@@ -1,15 +1,41 @@
+import json
 import re
+import asyncio
 import requests
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from .base_agent import BaseAgent
-import crossref_commons
+from .settings import env_int
+from .csl import crossref_to_csl, render_citation
+from .crossref_client import get_crossref_client
+from .doi import extract_doi
 from datetime import datetime
 
+_CODE_FENCE = re.compile(r"^\s*```[\w-]*\s*\n?|\n?\s*```\s*$")
+
+def parse_citation_list(response: str) -> List[Any]:
+    """The JSON array in an LLM response, tolerating code fences and text around it"""
+    text = _CODE_FENCE.sub("", response.strip())
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find("["), text.rfind("]")
+        if start < 0 or end <= start:
+            raise
+        return json.loads(text[start:end + 1])
+
 class CitationAgent(BaseAgent):
     """Research Paper Citation Assistant - Generates citations in various formats"""
     
+    # Citation formatting calls are short, so allow more of them in flight
+    llm_concurrency = 8
+    # Formatted citations for the same metadata do not change
+    llm_cache_ttl = 30 * 86400
+    
     def __init__(self):
         super().__init__()
+        self.crossref = get_crossref_client()
+        # Entries formatted per LLM call in batch citation
+        self.batch_size = env_int("CITATION_BATCH_SIZE", 20)
         self.citation_styles = {
             "apa": "American Psychological Association",
             "mla": "Modern Language Association", 
@@ -25,6 +51,7 @@ class CitationAgent(BaseAgent):
             "Generate citations from paper URLs",
             "Generate citations from DOIs",
             "Support multiple citation styles",
+            "Generate citations for many papers in one batch",
             "Extract metadata from academic papers"
         ]
     
@@ -40,38 +67,29 @@ class CitationAgent(BaseAgent):
         else:
             return await self._generate_citation_from_url(paper_url, citation_style)
     
-    def _extract_doi_from_url(self, url: str) -> str:
-        """Extract DOI from various URL formats"""
-        doi_patterns = [
-            r'doi\.org/(.+)',
-            r'doi:(.+)',
-            r'10\.\d{4,}/[-._;()/:\w]+'
-        ]
-        
-        for pattern in doi_patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        return None
+    def _extract_doi_from_url(self, url: str) -> Optional[str]:
+        """Extract a normalized DOI from various URL formats"""
+        return extract_doi(url)
     
     async def _generate_citation_from_doi(self, doi: str, style: str) -> str:
         """Generate citation using CrossRef API"""
         try:
-            # Get metadata from CrossRef
-            metadata = crossref_commons.retrieval.get_publication_as_json(doi)
+            metadata = await self._fetch_metadata(doi)
             
             if not metadata:
                 raise Exception("Could not retrieve metadata for DOI")
             
+            # Render locally from the structured metadata when the style allows it
+            try:
+                return render_citation(crossref_to_csl(metadata, doi), style)
+            except Exception as e:
+                self.log_activity("local_citation_fallback", {"doi": doi, "style": style, "error": str(e)})
+            
             # Format citation using LLM
             citation_prompt = f"""
             Generate a {self.citation_styles.get(style, style)} citation for the following paper metadata:
             
-            Title: {metadata.get('title', [''])[0] if metadata.get('title') else 'Unknown'}
-            Authors: {', '.join([author.get('given', '') + ' ' + author.get('family', '') for author in metadata.get('author', [])])}
-            Journal: {metadata.get('container-title', [''])[0] if metadata.get('container-title') else 'Unknown'}
-            Year: {metadata.get('published-print', {}).get('date-parts', [[]])[0][0] if metadata.get('published-print') else 'Unknown'}
-            DOI: {doi}
+            {self._describe_metadata(metadata, doi)}
             
             Please format this as a proper {style.upper()} citation.
             """
@@ -87,6 +105,144 @@ class CitationAgent(BaseAgent):
         except Exception as e:
             raise Exception(f"Failed to generate citation from DOI: {str(e)}")
     
+    async def _fetch_metadata(self, doi: str) -> Optional[Dict[str, Any]]:
+        """Get metadata from CrossRef (cached, and shared with concurrent requests for the same DOI)"""
+        return await self.crossref.get_work(doi)
+    
+    def _describe_metadata(self, metadata: Dict[str, Any], doi: str) -> str:
+        """Render CrossRef metadata as prompt lines"""
+        title = metadata.get('title', [''])[0] if metadata.get('title') else 'Unknown'
+        authors = ', '.join([author.get('given', '') + ' ' + author.get('family', '') for author in metadata.get('author', [])])
+        journal = metadata.get('container-title', [''])[0] if metadata.get('container-title') else 'Unknown'
+        year = metadata.get('published-print', {}).get('date-parts', [[]])[0][0] if metadata.get('published-print') else 'Unknown'
+        return f"Title: {title}\nAuthors: {authors}\nJournal: {journal}\nYear: {year}\nDOI: {doi}"
+    
+    async def generate_citations_batch(self, items: List[str], citation_style: str = "apa") -> List[Dict[str, Any]]:
+        """Generate citations for many URLs/DOIs, returned in input order with per-item errors"""
+        self.log_activity("generate_citations_batch", {"item_count": len(items), "style": citation_style})
+        
+        dois = [self._extract_doi_from_url(item) for item in items]
+        unique_dois = list(dict.fromkeys(doi.lower() for doi in dois if doi))
+        
+        # Fetch metadata for each distinct DOI once, in bulk where possible
+        metadata_by_doi = await self.crossref.get_works(unique_dois)
+        
+        # Render locally where possible; the rest are formatted many entries per LLM call
+        doi_citations = {}
+        doi_entries = {}
+        for doi, metadata in metadata_by_doi.items():
+            if not metadata or isinstance(metadata, Exception):
+                continue
+            try:
+                doi_citations[doi] = (render_citation(crossref_to_csl(metadata, doi), citation_style), None)
+            except Exception:
+                doi_entries[doi] = self._describe_metadata(metadata, doi)
+        url_entries = {item: f"URL: {item}" for item, doi in zip(items, dois) if not doi}
+        llm_doi_citations, url_citations = await asyncio.gather(
+            self._format_citations_batch(doi_entries, citation_style, from_url=False),
+            self._format_citations_batch(url_entries, citation_style, from_url=True)
+        )
+        doi_citations.update(llm_doi_citations)
+        
+        results = []
+        for item, doi in zip(items, dois):
+            result = {"input": item, "doi": doi, "citation": None, "error": None}
+            if doi:
+                metadata = metadata_by_doi[doi.lower()]
+                if isinstance(metadata, Exception):
+                    result["error"] = f"Failed to retrieve metadata for DOI: {str(metadata)}"
+                elif not metadata:
+                    result["error"] = "Could not retrieve metadata for DOI"
+                else:
+                    result["citation"], result["error"] = doi_citations[doi.lower()]
+            else:
+                result["citation"], result["error"] = url_citations[item]
+            results.append(result)
+        
+        return results
+    
+    async def _format_citations_batch(self, entries: Dict[str, str], style: str,
+                                      from_url: bool) -> Dict[str, tuple]:
+        """Format entries in chunks of batch_size per LLM call, returning key -> (citation, error)"""
+        keys = list(entries.keys())
+        chunks = [keys[i:i + self.batch_size] for i in range(0, len(keys), self.batch_size)]
+        formatted = await asyncio.gather(*[
+            self._format_citation_chunk([(key, entries[key]) for key in chunk], style, from_url)
+            for chunk in chunks
+        ])
+        
+        results = {}
+        for chunk_results in formatted:
+            results.update(chunk_results)
+        return results
+    
+    async def _format_citation_chunk(self, chunk: List[tuple], style: str, from_url: bool) -> Dict[str, tuple]:
+        """Format one chunk of entries with a single LLM call"""
+        entries_text = "\n\n".join(f"[{i}]\n{description}" for i, (_, description) in enumerate(chunk))
+        source = "paper URLs" if from_url else "paper metadata entries"
+        citation_prompt = f"""
+        Generate a {self.citation_styles.get(style, style)} citation for each of the following {len(chunk)} {source}:
+        
+        {entries_text}
+        
+        Please format each as a proper {style.upper()} citation.
+        Return only a JSON array of {len(chunk)} strings, one citation per entry, in the same order as the entries.
+        """
+        
+        system_prompt = "You are a citation expert. Generate accurate citations in the requested format."
+        if from_url:
+            system_prompt = "You are a citation expert. Generate citations based on available information and note when manual verification is needed."
+        
+        messages = [
+            self._create_system_message(system_prompt),
+            self._create_user_message(citation_prompt)
+        ]
+        
+        try:
+            response = await self._call_llm(messages, temperature=0.3)
+        except Exception as e:
+            error = f"Failed to format citation: {str(e)}"
+            return {key: (None, error) for key, _ in chunk}
+        
+        try:
+            citations = parse_citation_list(response)
+            if not isinstance(citations, list) or len(citations) != len(chunk):
+                raise ValueError(f"expected {len(chunk)} citations, got a different shape")
+            return {key: (str(citation).strip(), None) for (key, _), citation in zip(chunk, citations)}
+        except ValueError as e:
+            # One unusable batch answer should not cost every entry its citation; ask for each on its own
+            self.log_activity("citation_chunk_fallback", {"entries": len(chunk), "error": str(e)})
+            formatted = await asyncio.gather(*[
+                self._format_citation_entry(description, style, from_url) for _, description in chunk
+            ])
+            return {key: result for (key, _), result in zip(chunk, formatted)}
+    
+    async def _format_citation_entry(self, description: str, style: str, from_url: bool) -> tuple:
+        """Format a single entry as plain text, returning (citation, error)"""
+        source = "paper URL" if from_url else "paper metadata"
+        citation_prompt = f"""
+        Generate a {self.citation_styles.get(style, style)} citation for the following {source}:
+        
+        {description}
+        
+        Please format this as a proper {style.upper()} citation. Return only the citation.
+        """
+        
+        system_prompt = "You are a citation expert. Generate accurate citations in the requested format."
+        if from_url:
+            system_prompt = "You are a citation expert. Generate citations based on available information and note when manual verification is needed."
+        
+        messages = [
+            self._create_system_message(system_prompt),
+            self._create_user_message(citation_prompt)
+        ]
+        
+        try:
+            citation = await self._call_llm(messages, temperature=0.3)
+            return citation.strip(), None
+        except Exception as e:
+            return None, f"Failed to format citation: {str(e)}"
+    
     async def _generate_citation_from_url(self, url: str, style: str) -> str:
         """Generate citation from URL when DOI is not available"""
         try:
@@ -8,6 +8,9 @@ import asyncio
 class CollaborationAgent(BaseAgent):
     """Research Paper Collaboration Assistant - Enables real-time collaboration on papers"""
     
+    # Replies to comments are conversational and should not be replayed from cache
+    llm_cache_enabled = False
+    
     def __init__(self):
         super().__init__()
         # In-memory storage (in production, use Redis or database)
@@ -0,0 +1,92 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+from .settings import env_int, env_float
+
+class LLMOverloadedError(Exception):
+    """Raised when an LLM call cannot get a concurrency slot (queue full or wait timed out)"""
+
+class ConcurrencyLimiter:
+    """Async concurrency limiter with a bounded wait queue for backpressure"""
+    
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: Optional[float] = None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._active = 0
+        self._waiting = 0
+        self._completed = 0
+        self._rejected = 0
+    
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one concurrency slot for the duration of the block"""
+        # Reject immediately instead of queueing without bound
+        if self._active >= self.max_concurrency and self._waiting >= self.max_queue:
+            self._rejected += 1
+            raise LLMOverloadedError(f"{self.name} queue is full ({self._waiting} waiting)")
+        
+        self._waiting += 1
+        try:
+            if self.queue_timeout:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            else:
+                await self._semaphore.acquire()
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise LLMOverloadedError(f"{self.name} did not get a slot within {self.queue_timeout}s")
+        finally:
+            self._waiting -= 1
+        
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._completed += 1
+            self._semaphore.release()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get current limiter statistics"""
+        return {
+            "name": self.name,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "active": self._active,
+            "waiting": self._waiting,
+            "completed": self._completed,
+            "rejected": self._rejected
+        }
+
+_global_limiter: Optional[ConcurrencyLimiter] = None
+
+def create_agent_limiter(agent_name: str, default_concurrency: Optional[int] = None) -> ConcurrencyLimiter:
+    """Create the per-agent limiter, honouring LLM_CONCURRENCY_<AGENT> overrides"""
+    concurrency = env_int(
+        f"LLM_CONCURRENCY_{agent_name.upper()}",
+        default_concurrency or env_int("LLM_AGENT_CONCURRENCY", 4)
+    )
+    return ConcurrencyLimiter(
+        agent_name,
+        max_concurrency=concurrency,
+        max_queue=env_int("LLM_MAX_QUEUE", 64),
+        queue_timeout=env_float("LLM_QUEUE_TIMEOUT", 30.0)
+    )
+
+def get_global_limiter() -> ConcurrencyLimiter:
+    """Get the process-wide limiter shared by all agents"""
+    global _global_limiter
+    if _global_limiter is None:
+        _global_limiter = ConcurrencyLimiter(
+            "global",
+            max_concurrency=env_int("LLM_GLOBAL_CONCURRENCY", 16),
+            max_queue=env_int("LLM_MAX_QUEUE", 64),
+            queue_timeout=env_float("LLM_QUEUE_TIMEOUT", 30.0)
+        )
+    return _global_limiter
\ No newline at end of file
@@ -0,0 +1,157 @@
+import asyncio
+import os
+from typing import Dict, Any, List, Optional, Union
+from urllib.parse import quote
+import httpx
+from .cache import TieredCache, get_disk_cache
+from .single_flight import SingleFlight
+from .doi import normalize_doi
+from .settings import env_int, env_float
+
+class CrossRefClient:
+    """Async CrossRef metadata client with pooled connections and a persistent DOI cache"""
+    
+    def __init__(self, base_url: Optional[str] = None, mailto: Optional[str] = None,
+                 cache: Optional[TieredCache] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = (base_url or os.getenv("CROSSREF_API_URL", "https://api.crossref.org")).rstrip("/")
+        self.mailto = mailto or os.getenv("CROSSREF_MAILTO")
+        self.cache = cache
+        self.ttl = env_float("CROSSREF_CACHE_TTL", 30 * 86400.0)
+        self.negative_ttl = env_float("CROSSREF_NEGATIVE_TTL", 86400.0)
+        self.bulk_size = env_int("CROSSREF_BULK_SIZE", 20)
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(env_int("CROSSREF_CONCURRENCY", 8))
+        self._flight = SingleFlight("crossref")
+        self.requests_sent = 0
+        self.not_found = 0
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            user_agent = "AgenticResearchAssistant/1.0"
+            if self.mailto:
+                # Identifies us for CrossRef's "polite" pool
+                user_agent += f" (mailto:{self.mailto})"
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"User-Agent": user_agent},
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                timeout=httpx.Timeout(15.0, connect=5.0),
+                transport=self._transport
+            )
+        return self._client
+    
+    @staticmethod
+    def normalize_doi(doi: str) -> str:
+        return normalize_doi(doi) or doi.strip().lower()
+    
+    async def get_work(self, doi: str) -> Optional[Dict[str, Any]]:
+        """Get CrossRef metadata for a DOI, or None if CrossRef does not know it"""
+        key = self.normalize_doi(doi)
+        cached = await self._get_cached(key)
+        if cached is not None:
+            return cached.get("work")
+        return await self._flight.do(key, lambda: self._fetch_work(key))
+    
+    async def get_works(self, dois: List[str]) -> Dict[str, Union[Dict[str, Any], None, Exception]]:
+        """Look up many DOIs at once
+        
+        Returns normalized DOI -> metadata, None when not found, or the exception for that DOI.
+        """
+        keys = list(dict.fromkeys(self.normalize_doi(doi) for doi in dois))
+        results: Dict[str, Union[Dict[str, Any], None, Exception]] = {}
+        missing = []
+        for key in keys:
+            cached = await self._get_cached(key)
+            if cached is not None:
+                results[key] = cached.get("work")
+            else:
+                missing.append(key)
+        
+        # Commas separate filter values, so those DOIs are only fetched individually
+        bulk = [key for key in missing if "," not in key]
+        chunks = [bulk[i:i + self.bulk_size] for i in range(0, len(bulk), self.bulk_size)]
+        for found in await asyncio.gather(*[self._fetch_bulk(chunk) for chunk in chunks], return_exceptions=True):
+            if isinstance(found, dict):
+                results.update(found)
+        
+        # Anything the bulk query did not return is confirmed with a direct lookup
+        remaining = [key for key in missing if key not in results]
+        fetched = await asyncio.gather(*[self.get_work(key) for key in remaining], return_exceptions=True)
+        results.update(zip(remaining, fetched))
+        return results
+    
+    async def _get_cached(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.cache is None:
+            return None
+        return await self.cache.aget(key)
+    
+    async def _store(self, key: str, work: Optional[Dict[str, Any]]):
+        if self.cache is None:
+            return
+        if work is None:
+            await self.cache.aset(key, {"found": False}, self.negative_ttl)
+        else:
+            await self.cache.aset(key, {"found": True, "work": work}, self.ttl)
+    
+    async def _fetch_work(self, key: str) -> Optional[Dict[str, Any]]:
+        async with self._semaphore:
+            self.requests_sent += 1
+            response = await self.client.get(f"/works/{quote(key, safe='/')}")
+        
+        if response.status_code == 404:
+            self.not_found += 1
+            await self._store(key, None)
+            return None
+        response.raise_for_status()
+        
+        work = response.json().get("message")
+        await self._store(key, work)
+        return work
+    
+    async def _fetch_bulk(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        async with self._semaphore:
+            self.requests_sent += 1
+            response = await self.client.get(
+                "/works",
+                params={"filter": ",".join(f"doi:{key}" for key in keys), "rows": len(keys)}
+            )
+        response.raise_for_status()
+        
+        found = {}
+        for work in response.json().get("message", {}).get("items", []):
+            key = self.normalize_doi(work.get("DOI", ""))
+            if key in keys:
+                found[key] = work
+                await self._store(key, work)
+        return found
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request and cache statistics"""
+        return {
+            "base_url": self.base_url,
+            "requests_sent": self.requests_sent,
+            "not_found": self.not_found,
+            "coalescing": self._flight.get_stats(),
+            "cache": self.cache.get_stats() if self.cache is not None else None
+        }
+    
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+_crossref_client: Optional[CrossRefClient] = None
+
+def get_crossref_client() -> CrossRefClient:
+    """Get the process-wide CrossRef client backed by the persistent metadata cache"""
+    global _crossref_client
+    if _crossref_client is None:
+        cache = TieredCache(
+            "crossref",
+            max_entries=env_int("CROSSREF_CACHE_MAX_ENTRIES", 4096),
+            disk=get_disk_cache("crossref_cache.sqlite3")
+        )
+        _crossref_client = CrossRefClient(cache=cache)
+    return _crossref_client
\ No newline at end of file
@@ -0,0 +1,327 @@
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Callable
+
+# CrossRef work types mapped to CSL item types
+CROSSREF_TYPE_MAP = {
+    "journal-article": "article-journal",
+    "proceedings-article": "paper-conference",
+    "book-chapter": "chapter",
+    "book": "book",
+    "monograph": "book",
+    "edited-book": "book",
+    "reference-book": "book",
+    "posted-content": "article",
+    "report": "report",
+    "dissertation": "thesis",
+    "dataset": "dataset",
+    "peer-review": "review"
+}
+
+# CSL style files used for each supported style when available
+CSL_STYLE_FILES = {
+    "apa": "apa.csl",
+    "mla": "modern-language-association.csl",
+    "chicago": "chicago-author-date.csl",
+    "harvard": "harvard-cite-them-right.csl",
+    "ieee": "ieee.csl",
+    "vancouver": "vancouver.csl",
+    "ama": "american-medical-association.csl"
+}
+
+def _first(value: Any) -> Optional[str]:
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+def _date_parts(metadata: Dict[str, Any]) -> Optional[List[List[int]]]:
+    for field in ("published-print", "published-online", "issued", "published", "created"):
+        parts = metadata.get(field, {}).get("date-parts")
+        if parts and parts[0] and parts[0][0]:
+            return parts
+    return None
+
+def _names(people: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    names = []
+    for person in people or []:
+        if person.get("family"):
+            name = {"family": person["family"]}
+            if person.get("given"):
+                name["given"] = person["given"]
+            names.append(name)
+        elif person.get("name"):
+            names.append({"literal": person["name"]})
+    return names
+
+def crossref_to_csl(metadata: Dict[str, Any], doi: Optional[str] = None) -> Dict[str, Any]:
+    """Map a CrossRef work record to a CSL-JSON item"""
+    doi = doi or metadata.get("DOI")
+    item = {
+        "id": doi or "item",
+        "type": CROSSREF_TYPE_MAP.get(metadata.get("type"), "article-journal"),
+        "title": _first(metadata.get("title")),
+        "container-title": _first(metadata.get("container-title")),
+        "author": _names(metadata.get("author")),
+        "editor": _names(metadata.get("editor")),
+        "volume": metadata.get("volume"),
+        "issue": metadata.get("issue"),
+        "page": metadata.get("page"),
+        "publisher": metadata.get("publisher"),
+        "publisher-place": metadata.get("publisher-location"),
+        "DOI": doi,
+        "URL": metadata.get("URL")
+    }
+    date_parts = _date_parts(metadata)
+    if date_parts:
+        item["issued"] = {"date-parts": date_parts}
+    # Drop empty fields so renderers can rely on presence checks
+    return {key: value for key, value in item.items() if value}
+
+def _initials(given: str, separator: str = ". ", trailing: str = ".") -> str:
+    # Hyphenated given names keep the hyphen: "Jean-Paul" -> "J.-P."
+    hyphen = trailing + "-"
+    parts = []
+    for word in given.replace(".", " ").split():
+        parts.append(hyphen.join(piece[0].upper() for piece in word.split("-") if piece))
+    return separator.join(parts) + (trailing if parts else "")
+
+def _year(item: Dict[str, Any]) -> str:
+    parts = item.get("issued", {}).get("date-parts")
+    return str(parts[0][0]) if parts else "n.d."
+
+def _pages(item: Dict[str, Any]) -> Optional[str]:
+    page = item.get("page")
+    return page.replace("-", "–") if page else None
+
+def _doi_url(item: Dict[str, Any]) -> Optional[str]:
+    if item.get("DOI"):
+        return f"https://doi.org/{item['DOI']}"
+    return item.get("URL")
+
+def _join_names(names: List[str], conjunction: str, serial_comma: bool = True) -> str:
+    if len(names) <= 1:
+        return "".join(names)
+    if len(names) == 2:
+        return f"{names[0]}{',' if serial_comma and conjunction == '&' else ''} {conjunction} {names[1]}"
+    return ", ".join(names[:-1]) + f"{',' if serial_comma else ''} {conjunction} {names[-1]}"
+
+def _sentence(text: str) -> str:
+    return text if text.endswith((".", "?", "!")) else text + "."
+
+def _render_apa(item: Dict[str, Any]) -> str:
+    names = [
+        name.get("literal") or f"{name['family']}, {_initials(name.get('given', ''))}".rstrip(", ")
+        for name in item.get("author", [])
+    ]
+    if len(names) > 20:
+        authors = ", ".join(names[:19]) + ", . . . " + names[-1]
+    else:
+        authors = _join_names(names, "&")
+    parts = [f"{authors} ({_year(item)})." if authors else f"{_sentence(item['title'])} ({_year(item)})."]
+    if authors:
+        parts.append(_sentence(item["title"]))
+    if item.get("container-title"):
+        source = item["container-title"]
+        if item.get("volume"):
+            source += f", {item['volume']}"
+            if item.get("issue"):
+                source += f"({item['issue']})"
+        if _pages(item):
+            source += f", {_pages(item)}"
+        parts.append(source + ".")
+    elif item.get("publisher"):
+        parts.append(_sentence(item["publisher"]))
+    if _doi_url(item):
+        parts.append(_doi_url(item))
+    return " ".join(parts)
+
+def _full_name(name: Dict[str, str], inverted: bool = False) -> str:
+    if name.get("literal"):
+        return name["literal"]
+    if inverted and name.get("given"):
+        return f"{name['family']}, {name['given']}"
+    return f"{name.get('given', '')} {name['family']}".strip()
+
+def _render_mla(item: Dict[str, Any]) -> str:
+    authors = item.get("author", [])
+    if len(authors) >= 3:
+        author_text = f"{_full_name(authors[0], inverted=True)}, et al"
+    elif len(authors) == 2:
+        author_text = f"{_full_name(authors[0], inverted=True)}, and {_full_name(authors[1])}"
+    elif authors:
+        author_text = _full_name(authors[0], inverted=True)
+    else:
+        author_text = ""
+    parts = [_sentence(author_text)] if author_text else []
+    parts.append(f"“{_sentence(item['title'])}”")
+    details = []
+    if item.get("container-title"):
+        details.append(item["container-title"])
+    if item.get("volume"):
+        details.append(f"vol. {item['volume']}")
+    if item.get("issue"):
+        details.append(f"no. {item['issue']}")
+    if not item.get("container-title") and item.get("publisher"):
+        details.append(item["publisher"])
+    details.append(_year(item))
+    if _pages(item):
+        details.append(f"pp. {_pages(item)}")
+    if item.get("DOI"):
+        details.append(_doi_url(item))
+    parts.append(_sentence(", ".join(details)))
+    return " ".join(parts)
+
+def _render_chicago(item: Dict[str, Any]) -> str:
+    names = [_full_name(name, inverted=(i == 0)) for i, name in enumerate(item.get("author", []))]
+    if len(names) > 10:
+        names = names[:7] + ["et al"]
+        authors = ", ".join(names)
+    else:
+        authors = _join_names(names, "and")
+    parts = [_sentence(authors)] if authors else []
+    parts.append(_sentence(_year(item)))
+    parts.append(f"“{_sentence(item['title'])}”")
+    if item.get("container-title"):
+        source = item["container-title"]
+        if item.get("volume"):
+            source += f" {item['volume']}"
+        if item.get("issue"):
+            source += f" ({item['issue']})"
+        if _pages(item):
+            source += f": {_pages(item)}"
+        parts.append(source + ".")
+    elif item.get("publisher"):
+        parts.append(_sentence(item["publisher"]))
+    if _doi_url(item):
+        parts.append(_doi_url(item) + ".")
+    return " ".join(parts)
+
+def _render_harvard(item: Dict[str, Any]) -> str:
+    names = [
+        name.get("literal") or f"{name['family']}, {_initials(name.get('given', ''), separator='')}".rstrip(", ")
+        for name in item.get("author", [])
+    ]
+    if len(names) > 3:
+        authors = f"{names[0]} et al."
+    else:
+        authors = _join_names(names, "and", serial_comma=False)
+    parts = [f"{authors} ({_year(item)})"]
+    parts.append(f"‘{item['title']}’")
+    if item.get("container-title"):
+        parts.append(item["container-title"])
+        if item.get("volume"):
+            parts.append(item["volume"] + (f"({item['issue']})" if item.get("issue") else ""))
+        if _pages(item):
+            parts.append(f"pp. {_pages(item)}")
+    elif item.get("publisher"):
+        parts.append(item["publisher"])
+    text = ", ".join(parts[1:])
+    text = f"{parts[0]} {text}."
+    if _doi_url(item):
+        text += f" Available at: {_doi_url(item)}."
+    return text
+
+def _render_ieee(item: Dict[str, Any]) -> str:
+    names = [
+        name.get("literal") or f"{_initials(name.get('given', ''))} {name['family']}".strip()
+        for name in item.get("author", [])
+    ]
+    authors = f"{names[0]} et al." if len(names) > 6 else _join_names(names, "and")
+    parts = [f"{authors}, “{item['title']},”" if authors else f"“{item['title']},”"]
+    details = []
+    if item.get("container-title"):
+        details.append(item["container-title"])
+    elif item.get("publisher"):
+        details.append(item["publisher"])
+    if item.get("volume"):
+        details.append(f"vol. {item['volume']}")
+    if item.get("issue"):
+        details.append(f"no. {item['issue']}")
+    if _pages(item):
+        details.append(f"pp. {_pages(item)}")
+    details.append(_year(item))
+    if item.get("DOI"):
+        details.append(f"doi: {item['DOI']}")
+    parts.append(_sentence(", ".join(details)))
+    return " ".join(parts)
+
+def _render_medical(item: Dict[str, Any], max_authors: int, shown_authors: int) -> str:
+    # Vancouver and AMA share the NLM layout and differ in how long author lists are cut
+    names = [
+        name.get("literal") or f"{name['family']} {_initials(name.get('given', ''), separator='', trailing='')}".strip()
+        for name in item.get("author", [])
+    ]
+    if len(names) > max_authors:
+        names = names[:shown_authors] + ["et al"]
+    parts = [_sentence(", ".join(names))] if names else []
+    parts.append(_sentence(item["title"]))
+    if item.get("container-title"):
+        source = f"{item['container-title']}. {_year(item)}"
+        if item.get("volume"):
+            source += f";{item['volume']}"
+        if item.get("issue"):
+            source += f"({item['issue']})"
+        if item.get("page"):
+            source += f":{item['page']}"
+        parts.append(source + ".")
+    else:
+        parts.append(_sentence(f"{item.get('publisher', '')}; {_year(item)}".lstrip("; ")))
+    if item.get("DOI"):
+        parts.append(f"doi:{item['DOI']}")
+    return " ".join(parts)
+
+_BUILTIN_RENDERERS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    "apa": _render_apa,
+    "mla": _render_mla,
+    "chicago": _render_chicago,
+    "harvard": _render_harvard,
+    "ieee": _render_ieee,
+    "vancouver": lambda item: _render_medical(item, max_authors=6, shown_authors=6),
+    "ama": lambda item: _render_medical(item, max_authors=6, shown_authors=3)
+}
+
+def _style_dirs() -> List[str]:
+    dirs = []
+    if os.getenv("CSL_STYLES_DIR"):
+        dirs.append(os.getenv("CSL_STYLES_DIR"))
+    try:
+        import citeproc
+        dirs.append(os.path.join(os.path.dirname(citeproc.__file__), "data", "styles"))
+    except ImportError:
+        pass
+    return dirs
+
+@lru_cache(maxsize=None)
+def _load_csl_style(style: str) -> Any:
+    """Parse a CSL style file once; None when no file is available"""
+    filename = CSL_STYLE_FILES.get(style, f"{style}.csl")
+    for directory in _style_dirs():
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            from citeproc import CitationStylesStyle
+            return CitationStylesStyle(path, validate=False)
+    return None
+
+def _render_with_citeproc(csl_style: Any, item: Dict[str, Any]) -> str:
+    from citeproc import CitationStylesBibliography, Citation, CitationItem, formatter
+    from citeproc.source.json import CiteProcJSON
+    
+    source = CiteProcJSON([dict(item)])
+    bibliography = CitationStylesBibliography(csl_style, source, formatter.plain)
+    bibliography.register(Citation([CitationItem(item["id"])]))
+    return str(bibliography.bibliography()[0])
+
+def render_citation(item: Dict[str, Any], style: str) -> str:
+    """Render a CSL-JSON item in the given style without calling the LLM"""
+    if not item.get("title"):
+        raise ValueError("Cannot render a citation without a title")
+    
+    csl_style = _load_csl_style(style)
+    if csl_style is not None:
+        return re.sub(r"\s+", " ", _render_with_citeproc(csl_style, item)).strip()
+    
+    renderer = _BUILTIN_RENDERERS.get(style)
+    if renderer is None:
+        raise ValueError(f"No local renderer for citation style: {style}")
+    return renderer(item)
\ No newline at end of file
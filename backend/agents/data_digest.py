@@ -0,0 +1,181 @@
+import json
+from typing import Dict, Any, NamedTuple, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .tables import to_numeric_columns
+from .tokens import estimate_tokens, truncate_to_tokens
+
+class DigestOptions(NamedTuple):
+    sample_rows: int
+    max_correlations: int
+    outlier_examples: int
+    max_list_items: int
+    max_string_chars: int
+    max_categories: int
+
+# Each level keeps less detail; the first one whose digest fits the token budget is used
+DIGEST_LEVELS = [
+    DigestOptions(sample_rows=5, max_correlations=10, outlier_examples=3, max_list_items=20, max_string_chars=500, max_categories=5),
+    DigestOptions(sample_rows=3, max_correlations=5, outlier_examples=1, max_list_items=10, max_string_chars=200, max_categories=3),
+    DigestOptions(sample_rows=1, max_correlations=3, outlier_examples=0, max_list_items=5, max_string_chars=80, max_categories=2),
+    DigestOptions(sample_rows=0, max_correlations=0, outlier_examples=0, max_list_items=3, max_string_chars=40, max_categories=0),
+]
+
+def _to_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+def _round(value: Any) -> Any:
+    """Four significant digits are plenty for the LLM to reason about"""
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else float(f"{value:.4g}")
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+def _frame_from(value: Any) -> Optional[pd.DataFrame]:
+    """A frame for tabular values: column-oriented tables, lists of records, dicts of equal-length lists"""
+    try:
+        if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+            return pd.DataFrame(value)
+        if isinstance(value, dict):
+            columns = value.get("columns") or value.get("headers")
+            rows = value.get("rows")
+            if isinstance(columns, list) and isinstance(rows, list) and rows and isinstance(rows[0], list):
+                return pd.DataFrame(rows, columns=[str(column) for column in columns])
+            lists = [item for item in value.values() if isinstance(item, list)]
+            if len(lists) >= 2 and len(lists) == len(value) and len({len(item) for item in lists}) == 1:
+                return pd.DataFrame(value)
+    except (ValueError, TypeError):
+        return None
+    return None
+
+def summarize_numbers(values: np.ndarray) -> Dict[str, Any]:
+    """Count, mean, spread and quartiles of a numeric series"""
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return {"count": 0}
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    return {
+        "count": int(len(values)),
+        "mean": _round(values.mean()),
+        "std": _round(values.std(ddof=1)) if len(values) > 1 else 0.0,
+        "min": _round(values.min()),
+        "q1": _round(q1),
+        "median": _round(median),
+        "q3": _round(q3),
+        "max": _round(values.max())
+    }
+
+def summarize_frame(frame: pd.DataFrame, options: DigestOptions, title: Optional[str] = None) -> Dict[str, Any]:
+    """Describe a table instead of listing it: column stats, strongest correlations, outliers and a few rows"""
+    frame = to_numeric_columns(frame.copy())
+    frame.columns = [str(column) for column in frame.columns]
+    numeric = [column for column in frame.columns if pd.api.types.is_numeric_dtype(frame[column].dtype)]
+    text = [column for column in frame.columns if column not in numeric]
+    values = frame[numeric].to_numpy(dtype=np.float64, na_value=np.nan) if numeric else np.empty((len(frame), 0))
+    
+    summary: Dict[str, Any] = {"summarized_table": title or True, "rows": len(frame), "columns": len(frame.columns)}
+    summary["numeric_columns"] = {column: summarize_numbers(values[:, i]) for i, column in enumerate(numeric)}
+    
+    if options.max_categories and text:
+        summary["text_columns"] = {}
+        for column in text[:20]:
+            counts = frame[column].astype(str).value_counts()
+            summary["text_columns"][column] = {
+                "distinct": int(len(counts)),
+                "top": {str(value)[:options.max_string_chars]: int(count) for value, count in counts.head(options.max_categories).items()}
+            }
+    
+    if options.max_correlations and len(numeric) >= 2 and len(frame) > 2:
+        correlations = frame[numeric].astype("float64").corr().to_numpy()
+        upper = np.triu_indices(len(numeric), k=1)
+        strengths = np.nan_to_num(np.abs(correlations[upper]), nan=-1.0)
+        order = np.argsort(-strengths)[:options.max_correlations]
+        summary["strongest_correlations"] = [
+            {"a": numeric[upper[0][i]], "b": numeric[upper[1][i]], "r": _round(correlations[upper][i])}
+            for i in order if strengths[i] >= 0
+        ]
+    
+    if numeric and len(frame) >= 4:
+        # Tukey fences per column, computed for all columns at once
+        q1, q3 = np.nanpercentile(values, [25, 75], axis=0)
+        spread = 1.5 * (q3 - q1)
+        with np.errstate(invalid="ignore"):
+            outside = (values < q1 - spread) | (values > q3 + spread)
+        counts = outside.sum(axis=0)
+        outliers = {}
+        for i, column in enumerate(numeric):
+            if counts[i]:
+                entry: Dict[str, Any] = {"count": int(counts[i])}
+                if options.outlier_examples:
+                    rows = np.flatnonzero(outside[:, i])
+                    distance = np.abs(values[rows, i] - np.nanmedian(values[:, i]))
+                    rows = rows[np.argsort(-distance)[:options.outlier_examples]]
+                    entry["examples"] = [{"row": int(row), "value": _round(values[row, i])} for row in rows]
+                outliers[column] = entry
+        if outliers:
+            summary["outliers"] = outliers
+    
+    if options.sample_rows:
+        # The first rows plus evenly spaced ones show both the layout and the spread
+        positions = np.unique(np.concatenate([
+            np.arange(min(2, len(frame))),
+            np.linspace(0, len(frame) - 1, options.sample_rows).astype(int)
+        ]))[:options.sample_rows]
+        sample = frame.iloc[positions].astype(object).where(frame.iloc[positions].notna(), None)
+        summary["sample_rows"] = [
+            {column: _compact(value, options) for column, value in zip(frame.columns, row)}
+            for row in sample.itertuples(index=False, name=None)
+        ]
+    return summary
+
+def _compact(value: Any, options: DigestOptions) -> Any:
+    """Replace tables and long numeric lists with summaries; shorten long strings and lists"""
+    if isinstance(value, dict):
+        frame = _frame_from(value)
+        if frame is not None and len(frame) > options.sample_rows:
+            return summarize_frame(frame, options, value.get("title") or value.get("caption"))
+        return {key: _compact(item, options) for key, item in value.items()}
+    if isinstance(value, list):
+        if len(value) > options.max_list_items:
+            if all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in value):
+                return {"summarized_list": summarize_numbers(np.asarray(value, dtype=np.float64))}
+            frame = _frame_from(value)
+            if frame is not None:
+                return summarize_frame(frame, options)
+            kept = [_compact(item, options) for item in value[:options.max_list_items]]
+            return kept + [f"... {len(value) - options.max_list_items} more items"]
+        return [_compact(item, options) for item in value]
+    if isinstance(value, str) and len(value) > options.max_string_chars:
+        return value[:options.max_string_chars] + "..."
+    return _round(value)
+
+def compact_payload(data: Any, budget: int) -> Tuple[str, Dict[str, Any]]:
+    """Serialize data for a prompt within a token budget, summarizing it when the raw JSON is too large
+    
+    Returns the text to embed and a report of the token savings.
+    """
+    original = _to_json(data)
+    original_tokens = estimate_tokens(original)
+    report = {"budget": budget, "original_tokens": original_tokens}
+    if original_tokens <= budget:
+        return original, {**report, "prompt_tokens": original_tokens, "saved_tokens": 0, "saved_ratio": 0.0, "compaction": None}
+    
+    text = original
+    level = None
+    for level, options in enumerate(DIGEST_LEVELS):
+        text = _to_json(_compact(data, options))
+        if estimate_tokens(text) <= budget:
+            break
+    else:
+        # Even the smallest digest is too large (e.g. very many tables); cut it at the budget
+        text = truncate_to_tokens(text, budget)
+        level = "truncated"
+    prompt_tokens = estimate_tokens(text)
+    return text, {
+        **report,
+        "prompt_tokens": prompt_tokens,
+        "saved_tokens": original_tokens - prompt_tokens,
+        "saved_ratio": round(1 - prompt_tokens / original_tokens, 4),
+        "compaction": level
+    }
\ No newline at end of file
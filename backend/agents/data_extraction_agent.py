@@ -1,20 +1,53 @@
 import re
 import json
+import asyncio
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 from .base_agent import BaseAgent
+from .doi import find_dois
+from .workflow import Workflow
+from .document import PreparedDocument, Window, normalize_text, split_windows
+from .pdf_pages import iter_pdf_pages, get_pdf_executor
+from .tables import DetectedTable, detect_tables, read_pdf_tables, table_to_json
+from .stats import StatMatch, scan_statistics, statistics_to_json
+from .keywords import DocumentPhrases, get_keyword_extractor
+from .references import MAX_ENTRY_CHARS, split_entry_spans, parse_entries, dedupe_references, looks_like_reference, apply_metadata
+from .crossref_client import get_crossref_client
+from .visualization import build_figures, get_figure_cache, make_figure_cache_key
+from .data_digest import compact_payload
+from .csl import crossref_to_csl
+from .window_merge import merge_window_results
+from .settings import env_int, env_float, env_bool
 from datetime import datetime
-import plotly.graph_objects as go
-import plotly.express as px
 from io import StringIO
 
 class DataExtractionAgent(BaseAgent):
     """Data Extraction & Analysis Agent - Extracts and analyzes data from research papers"""
     
+    # Window sizes for full-document extraction match how much text each extractor sends,
+    # so every window is seen in full
+    window_sizes = {
+        "tables": 5000,
+        "statistics": 3000,
+        "keywords": 2000,
+        "figures": 2000,
+        "references": 5000
+    }
+    
     def __init__(self):
         super().__init__()
         self.extraction_types = ["tables", "figures", "statistics", "keywords", "references"]
+        self.extraction_timeout = env_float("EXTRACTION_TIMEOUT", 60.0)
+        self.window_overlap = env_int("EXTRACTION_WINDOW_OVERLAP", 500)
+        self.window_concurrency = env_int("EXTRACTION_WINDOW_CONCURRENCY", self.llm_limiter.max_concurrency)
+        self.keyword_extractor = get_keyword_extractor()
+        self.keywords_top_k = env_int("KEYWORDS_TOP_K", 20)
+        self.keywords_llm_refine = env_bool("KEYWORDS_LLM_REFINE", False)
+        self.references_enrich = env_bool("REFERENCES_ENRICH", False)
+        self.references_parallel_min = env_int("REFERENCES_PARALLEL_MIN", 2000)
+        self.visualization_max_points = env_int("VISUALIZATION_MAX_POINTS", 2000)
+        self.analysis_token_budget = env_int("ANALYSIS_TOKEN_BUDGET", 3000)
     
     def get_capabilities(self) -> List[str]:
         return [
@@ -29,21 +62,186 @@ class DataExtractionAgent(BaseAgent):
         """Extract data from research paper content"""
         self.log_activity("extract_data", {"extraction_type": extraction_type, "content_length": len(file_content)})
         
+        # Normalization and section detection happen once, off the event loop
+        doc = await asyncio.to_thread(PreparedDocument, file_content)
+        return await self._extract(doc, extraction_type)
+    
+    async def _extract(self, doc: PreparedDocument, extraction_type: str) -> Dict[str, Any]:
+        """Run one extractor (or all of them) on a prepared document"""
         if extraction_type == "tables":
-            return await self._extract_tables(file_content)
+            return await self._extract_tables(doc)
         elif extraction_type == "statistics":
-            return await self._extract_statistics(file_content)
+            return await self._extract_statistics(doc)
         elif extraction_type == "keywords":
-            return await self._extract_keywords(file_content)
+            return await self._extract_keywords(doc)
         elif extraction_type == "references":
-            return await self._extract_references(file_content)
+            return await self._extract_references(doc)
         elif extraction_type == "figures":
-            return await self._extract_figures(file_content)
+            return await self._extract_figures(doc)
         else:
-            return await self._extract_all(file_content)
+            return await self._extract_all(doc)
+    
+    async def extract_windowed(self, file_content: str, extraction_type: str = "tables") -> Dict[str, Any]:
+        """Extract from the whole document in overlapping windows and merge the results"""
+        results = [result async for result in self.stream_windowed_extraction(file_content, extraction_type)]
+        return self._merged_result(extraction_type, results)
+    
+    async def stream_windowed_extraction(self, file_content: str,
+                                         extraction_type: str = "tables") -> AsyncIterator[Dict[str, Any]]:
+        """Extract from the whole document in overlapping windows, yielding each window's result as it completes"""
+        self.log_activity("stream_windowed_extraction", {"extraction_type": extraction_type, "content_length": len(file_content)})
+        
+        async def text():
+            # Text streams end in a line break so nothing is cut at the final window's edge
+            yield await asyncio.to_thread(normalize_text, file_content) + "\n"
+        
+        async for result in self._stream_windows(text(), extraction_type):
+            yield result
+    
+    async def extract_pdf(self, path: str, extraction_type: str = "tables") -> Dict[str, Any]:
+        """Extract from a PDF on disk; single types are extracted window by window while pages are parsed"""
+        if extraction_type not in self.window_sizes:
+            text = "\n\n".join([page async for _, page in iter_pdf_pages(path)])
+            return await self.extract_data(text, extraction_type)
+        results = [result async for result in self.stream_pdf_extraction(path, extraction_type)]
+        return self._merged_result(extraction_type, results)
+    
+    async def stream_pdf_extraction(self, path: str, extraction_type: str = "tables") -> AsyncIterator[Dict[str, Any]]:
+        """Extract from a PDF window by window, starting on the first pages while later ones are parsed"""
+        self.log_activity("stream_pdf_extraction", {"extraction_type": extraction_type})
+        
+        if extraction_type == "tables":
+            # tabula reads tables from the PDF layout itself; without it (or Java) tables come from page text
+            tables = await asyncio.to_thread(read_pdf_tables, path)
+            if tables:
+                yield {"window": 0, "start": 0, "end": 0, "data": self._native_tables_result(tables, "tabula")["data"]}
+                return
+        
+        async def text():
+            async for _, page in iter_pdf_pages(path):
+                page_text = normalize_text(page)
+                if page_text:
+                    yield page_text + "\n\n"
+        
+        async for result in self._stream_windows(text(), extraction_type):
+            yield result
+    
+    def _merged_result(self, extraction_type: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        data = merge_window_results(results)
+        if extraction_type == "keywords" and isinstance(data.get("keywords"), list):
+            # Each window contributes its own top keywords; keep the document's best
+            data["keywords"] = sorted(data["keywords"], key=lambda item: -item.get("score", 0))[:self.keywords_top_k]
+            data["keyword_count"] = len(data["keywords"])
+        return {
+            "extraction_type": extraction_type,
+            "data": data,
+            "windows": len(results),
+            "failed_windows": [result["window"] for result in results if "error" in result],
+            "timestamp": str(datetime.now())
+        }
+    
+    async def _stream_windows(self, chunks: AsyncIterator[str], extraction_type: str) -> AsyncIterator[Dict[str, Any]]:
+        """Cut windows from incoming text as soon as they are complete and extract them concurrently
+        
+        Only the text not yet covered by a window is buffered, and at most window_concurrency
+        windows are in flight, so memory stays bounded however long the document is.
+        """
+        if extraction_type not in self.window_sizes:
+            raise ValueError(f"Windowed extraction supports: {', '.join(self.window_sizes)}")
+        size = self.window_sizes[extraction_type]
+        # Windows are scored without learning from them; the document is added to the keyword statistics once
+        document = DocumentPhrases() if extraction_type == "keywords" else None
+        
+        buffer = ""
+        base = 0
+        index = 0
+        pending = set()
+        final = False
+        try:
+            while not final:
+                try:
+                    chunk = await chunks.__anext__()
+                    buffer += chunk
+                    if document is not None:
+                        await asyncio.to_thread(document.update, chunk)
+                except StopAsyncIteration:
+                    final = True
+                
+                spans, next_start = split_windows(buffer, size, self.window_overlap, final=final)
+                for start, end in spans:
+                    window = Window(index, base + start, base + end)
+                    index += 1
+                    pending.add(asyncio.create_task(self._extract_window(buffer[start:end], window, extraction_type)))
+                    while len(pending) >= self.window_concurrency:
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            yield task.result()
+                buffer = buffer[next_start:]
+                base += next_start
+            
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+            if document is not None:
+                await asyncio.to_thread(self.keyword_extractor.learn_document, document)
+        finally:
+            for task in pending:
+                task.cancel()
+            await chunks.aclose()
     
-    async def _extract_tables(self, content: str) -> Dict[str, Any]:
+    async def _extract_window(self, text: str, window: Window, extraction_type: str) -> Dict[str, Any]:
+        """Run one extractor over a single window of the document"""
+        result = {"window": window.index, "start": window.start, "end": window.end}
+        # Sections are not detected so extractors see the whole window rather than parts of it
+        window_doc = PreparedDocument(text, detect_sections=False)
+        try:
+            if extraction_type == "keywords":
+                extraction = self._extract_keywords(window_doc, learn=False)
+            else:
+                extraction = self._extract(window_doc, extraction_type)
+            extracted = await asyncio.wait_for(extraction, self.extraction_timeout)
+            result["data"] = extracted["data"]
+            if isinstance(result["data"], dict):
+                self._to_document_offsets(result["data"], window, text)
+            if extraction_type == "references" and isinstance(result["data"], dict):
+                # Offsets are made document-relative; a DOI running into the window edge is left
+                # to the next window, which holds it whole
+                result["data"]["dois"] = [
+                    {"doi": match.doi, "start": window.start + match.start, "end": window.start + match.end}
+                    for match in find_dois(text) if match.end < len(text)
+                ]
+        except asyncio.TimeoutError:
+            result["error"] = f"Window timed out after {self.extraction_timeout}s"
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+    
+    def _to_document_offsets(self, data: Dict[str, Any], window: Window, text: str):
+        """Make item offsets document-relative, so overlapping windows report the same item identically
+        
+        Items ending exactly at the window edge may be cut mid-line and are left to the next window.
+        Items reaching the window's last line are kept: the next window only holds their overlap,
+        so a table continuing past the edge is merged with its continuation by offset.
+        """
+        # Offsets are relative to the prepared window text, which has leading whitespace stripped
+        base = len(text) - len(text.lstrip())
+        for key, items in data.items():
+            if isinstance(items, list) and any(isinstance(item, dict) and "start" in item for item in items):
+                data[key] = [
+                    {**item, "start": window.start + base + item["start"], "end": window.start + base + item["end"]}
+                    for item in items
+                    if not isinstance(item, dict) or "start" not in item or base + item["end"] < len(text)
+                ]
+    
+    async def _extract_tables(self, doc: PreparedDocument) -> Dict[str, Any]:
         """Extract tables from research paper content"""
+        # Pipe- and column-aligned tables are parsed directly into typed frames; the LLM
+        # is only asked when the text has none
+        tables = await asyncio.to_thread(detect_tables, doc.text)
+        if tables:
+            return self._native_tables_result(tables)
+        
         try:
             # Use LLM to identify and extract tables
             table_prompt = f"""
@@ -54,7 +252,7 @@ class DataExtractionAgent(BaseAgent):
             4. Note any footnotes or explanations
             
             Content:
-            {content[:5000]}  # Limit content length for processing
+            {doc.head(5000)}  # Limit content length for processing
             
             Return the result as a JSON object with:
             - tables: array of table objects
@@ -78,45 +276,39 @@ class DataExtractionAgent(BaseAgent):
                 }
             except json.JSONDecodeError:
                 # Fallback extraction
-                return self._fallback_table_extraction(content)
+                return self._fallback_table_extraction(doc.text)
                 
         except Exception as e:
-            return self._fallback_table_extraction(content)
+            return self._fallback_table_extraction(doc.text)
     
     def _fallback_table_extraction(self, content: str) -> Dict[str, Any]:
-        """Simple fallback table extraction using regex"""
-        # Look for table-like patterns
-        table_patterns = [
-            r'Table \d+[\.:]?\s*([^\n]+)',
-            r'(\d+\.\d+\s+\d+\.\d+\s+\d+\.\d+)',  # Number patterns
-        ]
-        
-        tables = []
-        for pattern in table_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-                tables.append({
-                    "title": f"Extracted Table {len(tables) + 1}",
-                    "data": match,
-                    "confidence": "low"
-                })
-        
+        """Fallback table extraction with the native table detector"""
+        return self._native_tables_result(detect_tables(content))
+    
+    def _native_tables_result(self, tables: List[DetectedTable], quality: str = "native") -> Dict[str, Any]:
         return {
             "extraction_type": "tables",
             "data": {
-                "tables": tables,
+                "tables": [table_to_json(table, i) for i, table in enumerate(tables)],
                 "table_count": len(tables),
-                "extraction_quality": "basic"
+                "extraction_quality": quality
             },
             "timestamp": str(datetime.now())
         }
     
-    async def _extract_statistics(self, content: str) -> Dict[str, Any]:
+    async def _extract_statistics(self, doc: PreparedDocument) -> Dict[str, Any]:
         """Extract statistical information from research paper"""
+        # Reported statistics follow a few conventions that the scanner reads across the whole
+        # text with offsets; the LLM is only asked when none are found
+        matches = await asyncio.to_thread(scan_statistics, doc.text)
+        if matches:
+            return self._native_stats_result(matches)
+        
+        # Statistics are reported in the results and methods, not the front matter
         stats_prompt = f"""
         Extract statistical information from the following research paper content:
         
-        {content[:3000]}
+        {doc.select(["results", "methods", "abstract"], 3000)}
         
         Look for:
         - Sample sizes (n=)
@@ -146,31 +338,52 @@ class DataExtractionAgent(BaseAgent):
                 "timestamp": str(datetime.now())
             }
         except json.JSONDecodeError:
-            return self._fallback_stats_extraction(content)
+            return self._fallback_stats_extraction(doc.text)
     
     def _fallback_stats_extraction(self, content: str) -> Dict[str, Any]:
-        """Fallback statistical extraction using regex"""
-        stats = {
-            "sample_sizes": re.findall(r'n\s*=\s*(\d+)', content, re.IGNORECASE),
-            "p_values": re.findall(r'p\s*[<>=]\s*([0-9.]+)', content, re.IGNORECASE),
-            "correlations": re.findall(r'r\s*=\s*([-0-9.]+)', content, re.IGNORECASE),
-            "means": re.findall(r'mean\s*=\s*([0-9.]+)', content, re.IGNORECASE),
-        }
-        
+        """Fallback statistical extraction with the statistics scanner"""
+        return self._native_stats_result(scan_statistics(content))
+    
+    def _native_stats_result(self, matches: List[StatMatch]) -> Dict[str, Any]:
+        data = statistics_to_json(matches)
+        data["extraction_quality"] = "native"
         return {
             "extraction_type": "statistics",
-            "data": stats,
+            "data": data,
             "timestamp": str(datetime.now())
         }
     
-    async def _extract_keywords(self, content: str) -> Dict[str, Any]:
-        """Extract keywords and key terms from research paper"""
+    async def extract_keywords_batch(self, contents: List[str], top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Extract keyphrases from many documents in one vectorized pass, without the LLM"""
+        self.log_activity("extract_keywords_batch", {"documents": len(contents)})
+        texts = await asyncio.to_thread(lambda: [normalize_text(content) for content in contents])
+        keywords = await asyncio.to_thread(self.keyword_extractor.extract, texts, top_k or self.keywords_top_k)
+        return [{"keywords": items, "keyword_count": len(items)} for items in keywords]
+    
+    async def _extract_keywords(self, doc: PreparedDocument, learn: bool = True) -> Dict[str, Any]:
+        """Extract keywords and key terms from research paper
+        
+        learn=False scores a part of a document (a window) without counting it as a corpus document.
+        """
+        # Keyphrases are scored locally against the corpus seen so far; the LLM only refines them
+        [candidates] = await asyncio.to_thread(self.keyword_extractor.extract, [doc.text], self.keywords_top_k, learn)
+        result = {
+            "extraction_type": "keywords",
+            "data": {"keywords": candidates, "keyword_count": len(candidates), "extraction_quality": "native"},
+            "timestamp": str(datetime.now())
+        }
+        if not self.keywords_llm_refine or not candidates:
+            return result
+        
         keywords_prompt = f"""
-        Extract key terms, concepts, and important keywords from this research paper:
+        These candidate keywords were extracted from a research paper, highest scoring first:
+        
+        {", ".join(candidate["keyword"] for candidate in candidates)}
         
-        {content[:2000]}
+        Paper opening:
+        {doc.select(["abstract", "introduction"], 1000)}
         
-        Focus on:
+        Keep the candidates that are real key terms, fix their wording if needed, and group them into:
         - Technical terms
         - Methodology keywords
         - Key concepts
@@ -185,24 +398,105 @@ class DataExtractionAgent(BaseAgent):
             self._create_user_message(keywords_prompt)
         ]
         
-        response = await self._call_llm(messages, temperature=0.5)
-        
         try:
-            keywords_data = json.loads(response)
+            response = await self._call_llm(messages, temperature=0.5)
+            refined = json.loads(response)
+        except Exception:
+            # The local keywords stand on their own if refinement fails
+            return result
+        if isinstance(refined, dict):
+            result["data"] = {**refined, "candidates": candidates, "extraction_quality": "llm_refined"}
+        return result
+    
+    async def parse_references_batch(self, contents: List[str], enrich: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """Parse the reference lists of many documents locally, deduplicated per document"""
+        self.log_activity("parse_references_batch", {"documents": len(contents)})
+        docs = await asyncio.to_thread(lambda: [PreparedDocument(content) for content in contents])
+        entries = await asyncio.to_thread(lambda: [self._reference_entries(doc) for doc in docs])
+        parsed = await self._parse_entries(entries)
+        results = []
+        for doc, references in zip(docs, parsed):
+            if doc.section("references") is None:
+                references = [reference for reference in references if looks_like_reference(reference)]
+            results.append(dedupe_references(references))
+        if self.references_enrich if enrich is None else enrich:
+            await self._enrich_references([reference for references in results for reference in references])
+        return [{"references": references, "reference_count": len(references)} for references in results]
+    
+    def _reference_entries(self, doc: PreparedDocument) -> List[str]:
+        return [entry for entry, _, _ in self._reference_spans(doc)]
+    
+    def _reference_spans(self, doc: PreparedDocument) -> List[Tuple[str, int, int]]:
+        # Without a reference heading every paragraph is a candidate; non-references are filtered after parsing
+        spans = split_entry_spans(doc.section("references") or doc.text)
+        return [(entry, start, end) for entry, start, end in spans if len(entry) <= MAX_ENTRY_CHARS]
+    
+    async def _parse_entries(self, entries: List[List[str]]) -> List[List[Dict[str, Any]]]:
+        """Parse the entries of each document; large batches are spread over worker processes"""
+        total = sum(len(doc_entries) for doc_entries in entries)
+        if total < self.references_parallel_min:
+            return await asyncio.to_thread(lambda: [parse_entries(doc_entries) for doc_entries in entries])
+        
+        loop = asyncio.get_running_loop()
+        executor = get_pdf_executor()
+        chunk_size = max(200, self.references_parallel_min // 4)
+        flat = [(i, entry) for i, doc_entries in enumerate(entries) for entry in doc_entries]
+        chunks = [flat[start:start + chunk_size] for start in range(0, len(flat), chunk_size)]
+        parsed_chunks = await asyncio.gather(*[
+            loop.run_in_executor(executor, parse_entries, [entry for _, entry in chunk]) for chunk in chunks
+        ])
+        results: List[List[Dict[str, Any]]] = [[] for _ in entries]
+        for chunk, parsed in zip(chunks, parsed_chunks):
+            for (i, _), reference in zip(chunk, parsed):
+                results[i].append(reference)
+        return results
+    
+    async def _enrich_references(self, references: List[Dict[str, Any]]):
+        """Fill parsed references that have a DOI from CrossRef metadata, in bulk"""
+        crossref = get_crossref_client()
+        dois = [reference["doi"] for reference in references if reference.get("doi")]
+        if not dois:
+            return
+        metadata = await crossref.get_works(dois)
+        for reference in references:
+            work = metadata.get(crossref.normalize_doi(reference["doi"])) if reference.get("doi") else None
+            if isinstance(work, dict):
+                apply_metadata(reference, crossref_to_csl(work, reference["doi"]))
+    
+    async def _extract_references(self, doc: PreparedDocument) -> Dict[str, Any]:
+        """Extract references and citations from research paper"""
+        # DOIs are found locally over the whole document, whatever the LLM returns
+        dois = [{"doi": match.doi, "start": match.start, "end": match.end} for match in find_dois(doc.text)]
+        
+        # Reference lists are split and parsed locally; the LLM only sees text where no entries parse
+        spans = await asyncio.to_thread(self._reference_spans, doc)
+        [references] = await self._parse_entries([[entry for entry, _, _ in spans]])
+        if doc.section("references") is None:
+            # Entries were split from the whole text, so their offsets let overlapping windows
+            # merge an entry both of them hold
+            for reference, (_, start, end) in zip(references, spans):
+                reference["start"], reference["end"] = start, end
+            references = [reference for reference in references if looks_like_reference(reference)]
+        if references:
+            references = dedupe_references(references)
+            if self.references_enrich:
+                await self._enrich_references(references)
             return {
-                "extraction_type": "keywords",
-                "data": keywords_data,
+                "extraction_type": "references",
+                "data": {
+                    "references": references,
+                    "reference_count": len(references),
+                    "dois": dois,
+                    "extraction_quality": "native"
+                },
                 "timestamp": str(datetime.now())
             }
-        except json.JSONDecodeError:
-            return {"extraction_type": "keywords", "data": {"keywords": []}, "timestamp": str(datetime.now())}
-    
-    async def _extract_references(self, content: str) -> Dict[str, Any]:
-        """Extract references and citations from research paper"""
+        
+        # Only the reference list is sent when the paper has one
         refs_prompt = f"""
         Extract all references and citations from this research paper:
         
-        {content}
+        {doc.section("references") or doc.text}
         
         Look for:
         - Author names and years
@@ -223,20 +517,25 @@ class DataExtractionAgent(BaseAgent):
         
         try:
             refs_data = json.loads(response)
+            if not isinstance(refs_data, dict):
+                refs_data = {"references": refs_data}
+            refs_data["dois"] = dois
             return {
                 "extraction_type": "references",
                 "data": refs_data,
                 "timestamp": str(datetime.now())
             }
         except json.JSONDecodeError:
-            return {"extraction_type": "references", "data": {"references": []}, "timestamp": str(datetime.now())}
+            return {"extraction_type": "references", "data": {"references": [], "dois": dois}, "timestamp": str(datetime.now())}
     
-    async def _extract_figures(self, content: str) -> Dict[str, Any]:
+    async def _extract_figures(self, doc: PreparedDocument) -> Dict[str, Any]:
         """Extract figure information from research paper"""
+        # Captions carry most figure information; fall back to the start of the paper
+        captions = "\n".join(doc.figure_captions())[:2000]
         figures_prompt = f"""
         Extract information about figures, charts, and graphs from this research paper:
         
-        {content[:2000]}
+        {captions or doc.head(2000)}
         
         Look for:
         - Figure captions
@@ -264,31 +563,50 @@ class DataExtractionAgent(BaseAgent):
         except json.JSONDecodeError:
             return {"extraction_type": "figures", "data": {"figures": []}, "timestamp": str(datetime.now())}
     
-    async def _extract_all(self, content: str) -> Dict[str, Any]:
+    async def _extract_all(self, doc: PreparedDocument) -> Dict[str, Any]:
         """Extract all types of data from research paper"""
+        # Extractors share the prepared document and run concurrently; a slow or failing
+        # extractor only loses its own result
+        workflow = Workflow("extract_all")
+        for extraction_type in self.extraction_types:
+            workflow.add_step(
+                extraction_type,
+                lambda extraction_type=extraction_type: self._extract(doc, extraction_type),
+                required=False,
+                timeout=self.extraction_timeout
+            )
+        
+        run = await workflow.run()
         results = {}
-        
         for extraction_type in self.extraction_types:
-            try:
-                result = await self.extract_data(content, extraction_type)
-                results[extraction_type] = result["data"]
-            except Exception as e:
-                results[extraction_type] = {"error": str(e)}
+            if extraction_type in run.errors:
+                results[extraction_type] = {"error": str(run.errors[extraction_type])}
+            else:
+                results[extraction_type] = run.get(extraction_type)["data"]
         
         return {
             "extraction_type": "all",
             "data": results,
+            "document": doc.get_summary(),
+            "timings": run.get_report()["steps"],
             "timestamp": str(datetime.now())
         }
     
     async def analyze_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze extracted data and generate insights"""
-        self.log_activity("analyze_data", {"data_type": type(data).__name__})
+        # Tables and long numeric lists are summarized rather than sent row by row
+        payload, token_usage = await asyncio.to_thread(compact_payload, data, self.analysis_token_budget)
+        self.log_activity("analyze_data", {"data_type": type(data).__name__, **token_usage})
+        summarized = (
+            "Large tables and numeric lists below were summarized (column statistics, strongest correlations, "
+            "outliers and sampled rows) to fit the prompt; row counts refer to the full data.\n        "
+            if token_usage["compaction"] is not None else ""
+        )
         
         analysis_prompt = f"""
         Analyze the following extracted research data and provide insights:
-        
-        {json.dumps(data, indent=2)}
+        {summarized}
+        {payload}
         
         Provide analysis including:
         1. Key patterns and trends
@@ -311,82 +629,82 @@ class DataExtractionAgent(BaseAgent):
             analysis = json.loads(response)
             return {
                 "analysis": analysis,
+                "token_usage": token_usage,
                 "timestamp": str(datetime.now())
             }
         except json.JSONDecodeError:
             return {
                 "analysis": {"insights": "Analysis completed but could not parse structured response"},
+                "token_usage": token_usage,
                 "timestamp": str(datetime.now())
             }
     
-    async def generate_visualization(self, data: Dict[str, Any], chart_type: str = "bar") -> Dict[str, Any]:
-        """Generate data visualizations"""
+    async def generate_visualization(self, data: Dict[str, Any], chart_type: str = "bar",
+                                     max_points: Optional[int] = None) -> Dict[str, Any]:
+        """Generate Plotly figures from extracted tables or statistics"""
         self.log_activity("generate_visualization", {"chart_type": chart_type})
+        max_points = max_points or self.visualization_max_points
+        
+        # Figures are cached by the data they were drawn from, so re-rendering the same extraction is free
+        cache = get_figure_cache()
+        key = await asyncio.to_thread(make_figure_cache_key, data, chart_type, max_points)
+        cached = await cache.aget(key) if cache is not None else None
+        if cached is not None:
+            return {**cached, "cached": True, "timestamp": str(datetime.now())}
         
         try:
-            # Convert data to pandas DataFrame if possible
-            if isinstance(data, dict) and "tables" in data:
-                # Try to create visualization from table data
-                return await self._create_table_visualization(data["tables"], chart_type)
-            elif isinstance(data, dict) and "statistics" in data:
-                # Try to create visualization from statistics
-                return await self._create_stats_visualization(data["statistics"], chart_type)
-            else:
-                # Generic visualization
-                return await self._create_generic_visualization(data, chart_type)
-                
+            source, figures = await asyncio.to_thread(build_figures, data, chart_type, max_points)
+        except ValueError:
+            raise
         except Exception as e:
             return {
                 "error": f"Could not generate visualization: {str(e)}",
                 "chart_type": chart_type,
                 "timestamp": str(datetime.now())
             }
-    
-    async def _create_table_visualization(self, tables: List[Dict], chart_type: str) -> Dict[str, Any]:
-        """Create visualization from table data"""
-        # This would typically involve converting table data to charts
-        # For now, return a simple representation
-        return {
-            "visualization_type": chart_type,
-            "data_source": "tables",
-            "table_count": len(tables),
-            "message": "Table visualization would be generated here",
-            "timestamp": str(datetime.now())
-        }
-    
-    async def _create_stats_visualization(self, stats: Dict, chart_type: str) -> Dict[str, Any]:
-        """Create visualization from statistical data"""
-        return {
-            "visualization_type": chart_type,
-            "data_source": "statistics",
-            "stats_categories": list(stats.keys()),
-            "message": "Statistical visualization would be generated here",
-            "timestamp": str(datetime.now())
-        }
-    
-    async def _create_generic_visualization(self, data: Any, chart_type: str) -> Dict[str, Any]:
-        """Create generic visualization from any data"""
-        return {
+        
+        result = {
             "visualization_type": chart_type,
-            "data_type": type(data).__name__,
-            "message": "Generic visualization would be generated here",
-            "timestamp": str(datetime.now())
+            "data_source": source,
+            "figures": figures,
+            "figure_count": len(figures)
         }
+        if cache is not None:
+            await cache.aset(key, result)
+        return {**result, "cached": False, "timestamp": str(datetime.now())}
     
     async def process_request(self, **kwargs) -> Dict[str, Any]:
         """Process data extraction request"""
         file_content = kwargs.get('file_content')
         extraction_type = kwargs.get('extraction_type', 'tables')
+        chart_type = kwargs.get('chart_type')
         
         if not file_content:
             raise ValueError("file_content is required")
         
-        extracted_data = await self.extract_data(file_content, extraction_type)
-        analysis = await self.analyze_data(extracted_data["data"])
-        
-        return {
-            "extracted_data": extracted_data,
-            "analysis": analysis,
+        # Analysis and the optional visualization both work from the extracted data
+        workflow = Workflow("data_extraction")
+        workflow.add_step("extracted", lambda: self.extract_data(file_content, extraction_type))
+        workflow.add_step("analysis", lambda extracted: self.analyze_data(extracted["data"]), deps=["extracted"], required=False)
+        if chart_type:
+            workflow.add_step(
+                "visualization",
+                lambda extracted: self.generate_visualization(extracted["data"], chart_type),
+                deps=["extracted"],
+                required=False
+            )
+        
+        run = await workflow.run()
+        self.log_activity("process_request", run.get_report())
+        run.raise_for_errors()
+        
+        result = {
+            "extracted_data": run.get("extracted"),
+            "analysis": run.get("analysis"),
             "extraction_type": extraction_type,
+            "workflow": run.get_report(),
             "timestamp": str(datetime.now())
-        } 
\ No newline at end of file
+        }
+        if chart_type:
+            result["visualization"] = run.get("visualization")
+        return result
\ No newline at end of file
@@ -0,0 +1,138 @@
+import re
+import unicodedata
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from .tokens import estimate_tokens
+
+# Headings on a line of their own, optionally numbered ("2.", "2.1", "IV.") and followed by a colon
+SECTION_HEADING = re.compile(
+    r'^[ \t]*(?:(?:\d+(?:\.\d+)*|[IVX]+)\.?[ \t]+)?'
+    r'(abstract|introduction|background|related work|literature review|materials and methods|methods?|'
+    r'methodology|results(?: and discussion)?|findings|discussion|conclusions?|references|bibliography|'
+    r'works cited|acknowledge?ments|appendix)[ \t]*:?[ \t]*$',
+    re.IGNORECASE | re.MULTILINE
+)
+
+CANONICAL_SECTIONS = {
+    "related work": "background",
+    "literature review": "background",
+    "materials and methods": "methods",
+    "method": "methods",
+    "methodology": "methods",
+    "results and discussion": "results",
+    "findings": "results",
+    "conclusion": "conclusions",
+    "bibliography": "references",
+    "works cited": "references",
+    "acknowledgment": "acknowledgements",
+    "acknowledgments": "acknowledgements",
+    "acknowledgement": "acknowledgements"
+}
+
+FIGURE_CAPTION = re.compile(r'^[ \t]*(?:fig(?:ure)?\.?|chart|graph)[ \t]*\d+[^\n]*', re.IGNORECASE | re.MULTILINE)
+
+_CONTROL_CHARACTERS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]')
+_TRAILING_SPACE = re.compile(r'[ \t]+$', re.MULTILINE)
+_BLANK_RUNS = re.compile(r'\n{3,}')
+
+class Section(NamedTuple):
+    name: str
+    start: int
+    end: int
+
+class Window(NamedTuple):
+    index: int
+    start: int
+    end: int
+
+def normalize_text(text: str) -> str:
+    """Normalize unicode, line endings and blank runs; intra-line spacing is kept for tables"""
+    text = unicodedata.normalize("NFKC", text)
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = _CONTROL_CHARACTERS.sub("", text)
+    text = _TRAILING_SPACE.sub("", text)
+    return _BLANK_RUNS.sub("\n\n", text).strip()
+
+def find_sections(text: str) -> List[Section]:
+    """Locate section bodies by their headings; each runs until the next heading"""
+    headings = [
+        (CANONICAL_SECTIONS.get(match.group(1).lower(), match.group(1).lower()), match.start(), match.end())
+        for match in SECTION_HEADING.finditer(text)
+    ]
+    return [
+        Section(name, end, headings[i + 1][1] if i + 1 < len(headings) else len(text))
+        for i, (name, _, end) in enumerate(headings)
+    ]
+
+def split_windows(text: str, size: int, overlap: int, final: bool = True) -> Tuple[List[Tuple[int, int]], int]:
+    """Split text into overlapping (start, end) spans of at most size characters
+    
+    Window edges are moved back to a line break when one is close, so lines (and table rows)
+    are rarely cut in half. With final=False the text is still growing: only full-size windows
+    are returned, along with the offset the next window starts from.
+    """
+    if size <= overlap:
+        raise ValueError("Window size must be larger than the overlap")
+    spans = []
+    start = 0
+    length = len(text)
+    while start < length and (final or start + size < length):
+        end = min(start + size, length)
+        if end < length:
+            newline = text.rfind("\n", start + size // 2, end)
+            if newline != -1:
+                end = newline + 1
+        spans.append((start, end))
+        if end >= length:
+            return spans, length
+        next_start = max(end - overlap, start + 1)
+        newline = text.find("\n", next_start, end)
+        start = newline + 1 if newline != -1 and newline + 1 < end else next_start
+    return spans, start
+
+class PreparedDocument:
+    """A paper normalized once and shared by all extractors: text, sections and token counts"""
+    
+    def __init__(self, content: str, detect_sections: bool = True):
+        self.text = normalize_text(content)
+        self.sections = find_sections(self.text) if detect_sections else []
+        self.token_count = estimate_tokens(self.text)
+        self._section_text: Dict[str, str] = {}
+        for section in self.sections:
+            body = self.text[section.start:section.end].strip()
+            if body:
+                existing = self._section_text.get(section.name)
+                self._section_text[section.name] = f"{existing}\n\n{body}" if existing else body
+    
+    @property
+    def section_names(self) -> List[str]:
+        return list(self._section_text)
+    
+    def section(self, name: str) -> Optional[str]:
+        """Get a section's text by canonical name (e.g. methods, results, references)"""
+        return self._section_text.get(name)
+    
+    def head(self, max_chars: int) -> str:
+        return self.text[:max_chars]
+    
+    def select(self, names: List[str], max_chars: int) -> str:
+        """Text of the preferred sections in order, up to max_chars; the document head if none exist"""
+        parts = [self._section_text[name] for name in names if name in self._section_text]
+        if not parts:
+            return self.head(max_chars)
+        return "\n\n".join(parts)[:max_chars]
+    
+    def windows(self, size: int, overlap: int) -> List[Window]:
+        """Split the text into windows of at most size characters, each overlapping the previous one"""
+        spans, _ = split_windows(self.text, size, overlap)
+        return [Window(index, start, end) for index, (start, end) in enumerate(spans)]
+    
+    def figure_captions(self) -> List[str]:
+        return [match.group(0).strip() for match in FIGURE_CAPTION.finditer(self.text)]
+    
+    def get_summary(self) -> Dict[str, object]:
+        """Describe the prepared document: length, tokens and section sizes"""
+        return {
+            "characters": len(self.text),
+            "tokens": self.token_count,
+            "sections": {name: estimate_tokens(text) for name, text in self._section_text.items()}
+        }
\ No newline at end of file
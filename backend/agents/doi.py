@@ -0,0 +1,78 @@
+import re
+from typing import Iterator, List, NamedTuple, Optional
+from urllib.parse import unquote
+
+# One compiled pattern finds every DOI in a single pass. The slash may be percent-encoded
+# (as in URLs); the suffix runs until whitespace or a character that cannot appear unescaped,
+# except for the <...> segments of SICI DOIs, which start with a digit (unlike markup tags).
+# The pattern deliberately starts with a literal so the regex engine can use its fast prefix
+# scan; the word boundary before "10." is checked per match instead (a leading \b is ~10x slower).
+DOI_PATTERN = re.compile(r'10\.\d{4,9}(?:/|%2[Ff])[^\s"<>{}|\\^`]+(?:<\d[^\s"<>]*>[^\s"<>{}|\\^`]*)*')
+
+_TRAILING_PUNCTUATION = ".,;:!?'’”*"
+_TRIM_CHARACTERS = set(_TRAILING_PUNCTUATION) | {")", "]", "}", "?", "#", "&"}
+_BRACKET_PAIRS = {")": "(", "]": "[", "}": "{"}
+_QUERY_SUFFIX = re.compile(r'[?#&](?:[\w.-]+=|$).*$')
+_URL_SUFFIX = re.compile(r'[?#].*$')
+
+class DOIMatch(NamedTuple):
+    doi: str
+    start: int
+    end: int
+    raw: str
+
+def _trim(raw: str) -> str:
+    """Strip query strings, trailing punctuation and unbalanced closing brackets from a raw match"""
+    if "?" in raw or "#" in raw or "&" in raw:
+        raw = _QUERY_SUFFIX.sub("", raw)
+    while raw:
+        last = raw[-1]
+        if last in _TRAILING_PUNCTUATION:
+            raw = raw[:-1]
+        elif last in _BRACKET_PAIRS and raw.count(last) > raw.count(_BRACKET_PAIRS[last]):
+            raw = raw[:-1]
+        else:
+            break
+    return raw
+
+def iter_dois(text: str) -> Iterator[DOIMatch]:
+    """Yield every DOI in text with its character offsets"""
+    for match in DOI_PATTERN.finditer(text):
+        start = match.start()
+        if start and (text[start - 1].isalnum() or text[start - 1] in "._"):
+            continue
+        raw = match.group(0)
+        if start and text[start - 1] in "/=" and ("?" in raw or "#" in raw):
+            # In a URL (https://doi.org/..., ?doi=...) a query or fragment never belongs to the DOI
+            raw = _URL_SUFFIX.sub("", raw)
+        if raw[-1] in _TRIM_CHARACTERS or "?" in raw or "#" in raw or "&" in raw:
+            raw = _trim(raw)
+        if "%" in raw:
+            doi = _trim(unquote(raw)).lower()
+            if "/" not in doi:
+                continue
+        else:
+            doi = raw.lower()
+        yield DOIMatch(doi, start, start + len(raw), raw)
+
+def find_dois(text: str, unique: bool = True) -> List[DOIMatch]:
+    """Find all DOIs in text; with unique=True only the first occurrence of each is kept"""
+    if not unique:
+        return list(iter_dois(text))
+    seen = set()
+    matches = []
+    for match in iter_dois(text):
+        if match.doi not in seen:
+            seen.add(match.doi)
+            matches.append(match)
+    return matches
+
+def extract_doi(text: str) -> Optional[str]:
+    """Get the first normalized DOI in text (a DOI, doi: string or DOI URL), if any"""
+    for match in iter_dois(text):
+        return match.doi
+    return None
+
+def normalize_doi(raw: str) -> Optional[str]:
+    """Normalize a DOI to its lowercase, percent-decoded, trimmed form"""
+    return extract_doi(raw)
\ No newline at end of file
@@ -0,0 +1,228 @@
+import hashlib
+import os
+import re
+import threading
+from typing import Dict, Any, List, Optional, Set
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer, ENGLISH_STOP_WORDS
+from sklearn.utils import murmurhash3_32
+from .cache import get_cache_dir
+from .settings import env_int
+
+# Candidate phrases are runs of content words between stop words and punctuation (as in RAKE)
+_WORD = re.compile(r"[^\W\d_][\w-]*|[.,;:!?()\[\]{}\"“”]|\n")
+_BREAKS = set(".,;:!?()[]{}\"“”\n")
+STOP_WORDS = ENGLISH_STOP_WORDS | {
+    "et", "al", "fig", "figure", "table", "using", "used", "use", "based", "study", "paper",
+    "results", "result", "show", "shows", "shown", "however", "also", "may", "can", "within"
+}
+MAX_PHRASE_WORDS = 3
+
+def candidate_phrases(text: str) -> List[str]:
+    """Split text into 1-3 word candidate phrases at stop words and punctuation"""
+    phrases = []
+    run: List[str] = []
+    for token in _WORD.findall(text.lower()):
+        if token in _BREAKS or token in STOP_WORDS:
+            run = []
+            continue
+        if token in run:
+            # A repeated word ("model model") does not make a phrase
+            run = run[run.index(token) + 1:]
+        run.append(token)
+        if len(run) > MAX_PHRASE_WORDS:
+            run.pop(0)
+        # Every n-gram ending at this word, so "neural network model" also yields "network model"
+        for size in range(1, len(run) + 1):
+            if size > 1 or len(token) > 2:
+                phrases.append(" ".join(run[-size:]))
+    return phrases
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", "ignore")).hexdigest()
+
+class DocumentPhrases:
+    """Candidate phrases and digest of a document read in parts, so it can be learned as one document
+    
+    Phrases do not cross line breaks, so parts split at line breaks (pages, streamed chunks) yield
+    the same phrases as the whole text.
+    """
+    
+    def __init__(self):
+        self._hash = hashlib.sha1()
+        self.phrases: Set[str] = set()
+    
+    def update(self, text: str):
+        self._hash.update(text.encode("utf-8", "ignore"))
+        self.phrases.update(candidate_phrases(text))
+    
+    @property
+    def digest(self) -> str:
+        return self._hash.hexdigest()
+
+class KeywordExtractor:
+    """TF-IDF keyphrase extractor whose document frequencies grow with every document processed
+    
+    Phrase document frequencies live in a fixed-size hashed array, so the statistics stay small
+    however many distinct phrases the corpus contains and can be updated batch by batch.
+    """
+    
+    def __init__(self, directory: Optional[str] = None, hash_bits: int = 20, save_every: int = 100):
+        self.directory = directory
+        self.save_every = save_every
+        self.n_features = 1 << hash_bits
+        self._lock = threading.Lock()
+        self._df = np.zeros(self.n_features, dtype=np.int32)
+        self.documents = 0
+        self._seen = set()
+        # Documents counted since the last save; they are marked seen on disk only together with their counts
+        self._unsaved_seen: List[str] = []
+        self._unsaved = 0
+        
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._state_path = os.path.join(directory, "state.npz")
+            self._seen_path = os.path.join(directory, "seen.txt")
+            self._load()
+    
+    def _load(self):
+        if os.path.exists(self._state_path):
+            with np.load(self._state_path) as state:
+                df, documents, seen_count = state["df"], int(state["documents"]), int(state["seen"])
+            if df.shape == self._df.shape:
+                self._df = df
+                self.documents = documents
+                seen = []
+                if os.path.exists(self._seen_path):
+                    with open(self._seen_path) as f:
+                        seen = [line.strip() for line in f if line.strip()]
+                # Digests written after the last complete save belong to counts that were lost
+                self._seen = set(seen[:seen_count])
+                if len(seen) != seen_count:
+                    self._write_seen(seen[:seen_count])
+                return
+        # Nothing usable was saved; digests without their counts would keep documents from being counted
+        if os.path.exists(self._seen_path):
+            os.remove(self._seen_path)
+    
+    def _write_seen(self, digests: List[str]):
+        with open(self._seen_path, "w") as f:
+            f.write("".join(digest + "\n" for digest in digests))
+    
+    def extract(self, texts: List[str], top_k: int = 20, learn: bool = True) -> List[List[Dict[str, Any]]]:
+        """Score candidate phrases of a batch of documents; returns the top_k keyphrases of each
+        
+        With learn=True the batch is added to the corpus statistics first (documents already
+        seen are not counted twice), so its phrases are weighed against everything processed so far.
+        """
+        vectorizer = CountVectorizer(analyzer=candidate_phrases)
+        try:
+            counts = vectorizer.fit_transform(texts).tocsr()
+        except ValueError:
+            # No candidate phrases in any document
+            return [[] for _ in texts]
+        vocabulary = vectorizer.get_feature_names_out()
+        columns = self._columns(vocabulary)
+        
+        if learn:
+            self._learn(texts, counts, columns)
+        df = self._df[columns].astype(np.float64)
+        documents = max(self.documents, 1)
+        idf = np.log((1 + documents) / (1 + df)) + 1
+        # Multi-word phrases are more specific than their words; prefer them as RAKE does
+        lengths = np.fromiter((phrase.count(" ") + 1 for phrase in vocabulary), dtype=np.float64, count=len(vocabulary))
+        weights = idf * (1 + 0.25 * (lengths - 1))
+        
+        scores = counts.astype(np.float64)
+        scores.data = (1 + np.log(scores.data)) * weights[scores.indices]
+        results = []
+        for row in range(scores.shape[0]):
+            begin, end = scores.indptr[row], scores.indptr[row + 1]
+            row_scores = scores.data[begin:end]
+            row_terms = scores.indices[begin:end]
+            top = np.argpartition(-row_scores, min(top_k, len(row_scores)) - 1)[:top_k] if len(row_scores) else []
+            top = sorted(top, key=lambda i: -row_scores[i])
+            results.append([
+                {"keyword": str(vocabulary[row_terms[i]]), "score": round(float(row_scores[i]), 4)}
+                for i in top
+            ])
+        return results
+    
+    def _columns(self, phrases) -> np.ndarray:
+        """Hashed feature index of each phrase"""
+        return np.fromiter(
+            (murmurhash3_32(phrase, positive=True) for phrase in phrases), dtype=np.int64, count=len(phrases)
+        ) % self.n_features
+    
+    def _learn(self, texts: List[str], counts, columns: np.ndarray):
+        digests = [_digest(text) for text in texts]
+        with self._lock:
+            new_rows = [i for i, digest in enumerate(digests) if digest not in self._seen]
+            if not new_rows:
+                return
+            # Rows of a CSR matrix list each phrase once, so counting column indices gives document frequency
+            present = counts[new_rows]
+            batch_df = np.bincount(present.indices, minlength=len(columns))
+            np.add.at(self._df, columns, batch_df.astype(np.int32))
+            self._mark_seen([digests[i] for i in new_rows])
+    
+    def learn_document(self, document: DocumentPhrases):
+        """Add a document read in parts (e.g. extracted window by window with learn=False) to the statistics once"""
+        columns = self._columns(list(document.phrases))
+        digest = document.digest
+        with self._lock:
+            if digest in self._seen:
+                return
+            np.add.at(self._df, columns, 1)
+            self._mark_seen([digest])
+    
+    def _mark_seen(self, digests: List[str]):
+        """Record newly counted documents; called with the lock held"""
+        self.documents += len(digests)
+        self._seen.update(digests)
+        self._unsaved_seen.extend(digests)
+        self._unsaved += len(digests)
+        if self.directory and self._unsaved >= self.save_every:
+            self._save()
+    
+    def _save(self):
+        """Persist counts and seen documents together
+        
+        Digests are appended first; the state file, replaced in one step, records how many of them
+        its counts include.
+        """
+        with open(self._seen_path, "a") as f:
+            f.write("".join(digest + "\n" for digest in self._unsaved_seen))
+        with open(self._state_path + ".tmp", "wb") as f:
+            np.savez(f, df=self._df, documents=self.documents, seen=len(self._seen))
+        os.replace(self._state_path + ".tmp", self._state_path)
+        self._unsaved_seen = []
+        self._unsaved = 0
+    
+    def flush(self):
+        """Persist document frequencies not yet saved"""
+        with self._lock:
+            if self.directory and self._unsaved:
+                self._save()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get corpus size and hashed vocabulary usage"""
+        return {
+            "documents": self.documents,
+            "phrases_tracked": int(np.count_nonzero(self._df)),
+            "hash_features": self.n_features,
+            "unsaved_documents": self._unsaved
+        }
+
+_keyword_extractor: Optional[KeywordExtractor] = None
+
+def get_keyword_extractor() -> KeywordExtractor:
+    """Get the process-wide keyword extractor, persisting its statistics under the cache dir"""
+    global _keyword_extractor
+    if _keyword_extractor is None:
+        _keyword_extractor = KeywordExtractor(
+            directory=os.path.join(get_cache_dir(), "keywords"),
+            hash_bits=env_int("KEYWORDS_HASH_BITS", 20),
+            save_every=env_int("KEYWORDS_SAVE_EVERY", 100)
+        )
+    return _keyword_extractor
\ No newline at end of file
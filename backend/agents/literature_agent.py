@@ -1,8 +1,14 @@
 import requests
 import json
-from typing import Dict, Any, List
+import asyncio
+from typing import Dict, Any, List, AsyncIterator
 from .base_agent import BaseAgent
-from scholarly import scholarly
+from .literature_search import create_literature_search
+from .paper_index import get_paper_index, get_min_score
+from .paper_classifier import create_paper_classifier
+from .workflow import Workflow
+from .tokens import estimate_tokens, truncate_to_tokens, chunk_by_tokens
+from .settings import env_int
 from datetime import datetime
 
 class LiteratureAgent(BaseAgent):
@@ -10,6 +16,9 @@ class LiteratureAgent(BaseAgent):
     
     def __init__(self):
         super().__init__()
+        self.literature_search = create_literature_search()
+        self.paper_index = get_paper_index()
+        self._indexing_tasks = set()
         self.categories = [
             "Methodology",
             "Findings", 
@@ -21,6 +30,11 @@ class LiteratureAgent(BaseAgent):
             "Meta-analysis",
             "Systematic Review"
         ]
+        self.classifier = create_paper_classifier(self.categories)
+        self._training_tasks = set()
+        self.categorize_chunk_tokens = env_int("CATEGORIZE_CHUNK_TOKENS", 3000)
+        self.categorize_chunk_papers = env_int("CATEGORIZE_CHUNK_PAPERS", 25)
+        self.categorize_concurrency = env_int("CATEGORIZE_CONCURRENCY", self.llm_limiter.max_concurrency)
     
     def get_capabilities(self) -> List[str]:
         return [
@@ -30,37 +44,45 @@ class LiteratureAgent(BaseAgent):
             "Generate literature summaries"
         ]
     
-    async def search_papers(self, topic: str, max_results: int = 10) -> List[Dict[str, Any]]:
+    async def search_papers(self, topic: str, max_results: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
         """Search for papers related to the given topic"""
-        self.log_activity("search_papers", {"topic": topic, "max_results": max_results})
+        self.log_activity("search_papers", {"topic": topic, "max_results": max_results, "offset": offset})
         
         try:
-            # Use Google Scholar for paper search
-            search_query = scholarly.search_pubs(topic)
-            papers = []
-            
-            for i, paper in enumerate(search_query):
-                if i >= max_results:
-                    break
-                    
-                paper_data = {
-                    "title": paper.get('bib', {}).get('title', 'Unknown'),
-                    "authors": paper.get('bib', {}).get('author', []),
-                    "abstract": paper.get('bib', {}).get('abstract', ''),
-                    "year": paper.get('bib', {}).get('year', 'Unknown'),
-                    "citations": paper.get('num_citations', 0),
-                    "url": paper.get('pub_url', ''),
-                    "venue": paper.get('bib', {}).get('venue', ''),
-                    "id": str(paper.get('scholar_id', i))
-                }
-                papers.append(paper_data)
+            # Papers seen before are answered from the local semantic index when they match closely
+            if self.paper_index is not None and offset == 0:
+                similar = await self.paper_index.search(topic, max_results, get_min_score())
+                if len(similar) >= max_results:
+                    return similar
             
+            # Backends run off the event loop; pages are cached per topic
+            papers = await self.literature_search.search(topic, max_results, offset)
+            self._index_in_background(papers)
             return papers
             
         except Exception as e:
-            # Fallback to LLM-based search
+            # Fallback to LLM-based search. Generated papers have no stable order to page through,
+            # so only the first page is generated and later pages are empty.
+            if offset > 0:
+                return []
             return await self._search_papers_with_llm(topic, max_results)
     
+    def _index_in_background(self, papers: List[Dict[str, Any]]):
+        """Add fetched papers to the semantic index without delaying the response"""
+        if self.paper_index is None or not papers:
+            return
+        task = asyncio.create_task(self.paper_index.add_papers(papers))
+        self._indexing_tasks.add(task)
+        task.add_done_callback(self._indexing_tasks.discard)
+    
+    async def find_similar_papers(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+        """Find indexed papers most similar to a query or abstract"""
+        self.log_activity("find_similar_papers", {"top_k": top_k})
+        
+        if self.paper_index is None:
+            raise Exception("Paper index is disabled or sentence-transformers is not installed")
+        return await self.paper_index.search(query, top_k)
+    
     async def _search_papers_with_llm(self, topic: str, max_results: int) -> List[Dict[str, Any]]:
         """Fallback search using LLM when external APIs fail"""
         search_prompt = f"""
@@ -95,81 +117,130 @@ class LiteratureAgent(BaseAgent):
         """Categorize papers by methodology or focus area"""
         self.log_activity("categorize_papers", {"paper_count": len(papers)})
         
-        try:
-            # Prepare papers data for categorization
-            papers_text = "\n\n".join([
-                f"Title: {paper.get('title', '')}\nAbstract: {paper.get('abstract', '')}\nVenue: {paper.get('venue', '')}"
-                for paper in papers
-            ])
-            
-            categorization_prompt = f"""
-            Categorize the following academic papers into the most appropriate categories:
-            
-            Available categories: {', '.join(self.categories)}
-            
-            Papers:
-            {papers_text}
-            
-            For each paper, determine the primary category based on its title, abstract, and venue.
-            Return a JSON object where keys are category names and values are arrays of paper indices (0-based).
-            """
-            
-            messages = [
-                self._create_system_message("You are a research methodology expert. Categorize papers based on their research approach and focus."),
-                self._create_user_message(categorization_prompt)
-            ]
-            
-            response = await self._call_llm(messages, temperature=0.5)
-            
+        # The local classifier scores the whole batch at once; only uncertain papers go to the LLM
+        labels, confidence = await asyncio.to_thread(self.classifier.predict, papers)
+        uncertain = [i for i in range(len(papers)) if confidence[i] < self.classifier.confidence_threshold]
+        
+        if uncertain:
             try:
-                categorization = json.loads(response)
-                categorized_papers = {category: [] for category in self.categories}
-                
-                # Map paper indices to actual papers
-                for category, indices in categorization.items():
-                    if category in self.categories:
-                        for idx in indices:
-                            if 0 <= idx < len(papers):
-                                categorized_papers[category].append(papers[idx])
-                
-                return categorized_papers
-                
-            except json.JSONDecodeError:
-                # Fallback categorization
-                return self._fallback_categorization(papers)
-                
-        except Exception as e:
-            return self._fallback_categorization(papers)
+                llm_labels = await self._categorize_with_llm([papers[i] for i in uncertain])
+                for local_idx, category in llm_labels.items():
+                    labels[uncertain[local_idx]] = category
+                labeled = sorted(llm_labels)
+                retrain = await asyncio.to_thread(
+                    self.classifier.learn,
+                    [papers[uncertain[i]] for i in labeled],
+                    [llm_labels[i] for i in labeled]
+                )
+                if retrain:
+                    self._retrain_in_background()
+            except Exception as e:
+                # Keep the classifier's best guess for papers the LLM could not label
+                self.log_activity("categorize_llm_failed", {"error": str(e), "uncertain": len(uncertain)})
+        
+        categorized_papers = {category: [] for category in self.categories}
+        for paper, category in zip(papers, labels):
+            categorized_papers[category].append(paper)
+        return categorized_papers
     
-    def _fallback_categorization(self, papers: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
-        """Simple fallback categorization based on keywords"""
-        categorized = {category: [] for category in self.categories}
+    def _retrain_in_background(self):
+        """Refit the local classifier on a worker thread without delaying the response"""
+        task = asyncio.create_task(asyncio.to_thread(self.classifier.retrain))
+        self._training_tasks.add(task)
+        task.add_done_callback(self._retrain_done)
+    
+    def _retrain_done(self, task: asyncio.Task):
+        self._training_tasks.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.log_activity("classifier_retrain_failed", {"error": str(task.exception())})
+        else:
+            self.log_activity("classifier_retrained", self.classifier.get_stats())
+    
+    async def _categorize_with_llm(self, papers: List[Dict[str, Any]]) -> Dict[int, str]:
+        """Ask the LLM to categorize papers; returns paper index -> category for the papers it labeled"""
+        # Papers are split into chunks that fit the prompt budget and categorized concurrently
+        budget = max(self.categorize_chunk_tokens - estimate_tokens(self._build_categorization_prompt("")), 1)
+        papers_text = [truncate_to_tokens(self._paper_prompt_text(paper), budget // 2) for paper in papers]
+        chunks = chunk_by_tokens(
+            # A few extra tokens per paper for its [index] marker
+            [estimate_tokens(text) + 4 for text in papers_text],
+            budget,
+            self.categorize_chunk_papers
+        )
         
-        for paper in papers:
-            title_abstract = f"{paper.get('title', '')} {paper.get('abstract', '')}".lower()
-            
-            # Simple keyword-based categorization
-            if any(word in title_abstract for word in ['method', 'methodology', 'approach']):
-                categorized['Methodology'].append(paper)
-            elif any(word in title_abstract for word in ['finding', 'result', 'outcome']):
-                categorized['Findings'].append(paper)
-            elif any(word in title_abstract for word in ['theory', 'theoretical']):
-                categorized['Theory'].append(paper)
-            elif any(word in title_abstract for word in ['review', 'survey']):
-                categorized['Review'].append(paper)
-            elif any(word in title_abstract for word in ['case study', 'case']):
-                categorized['Case Study'].append(paper)
-            elif any(word in title_abstract for word in ['experiment', 'experimental']):
-                categorized['Experimental'].append(paper)
-            else:
-                categorized['Review'].append(paper)  # Default category
-        
-        return categorized
+        semaphore = asyncio.Semaphore(self.categorize_concurrency)
+        
+        async def categorize_chunk(chunk: range) -> Dict[int, str]:
+            async with semaphore:
+                labels = await self._categorize_chunk([papers_text[i] for i in chunk])
+            # Chunk-local indices map back to positions in the full list
+            return {chunk.start + idx: category for idx, category in labels.items()}
+        
+        results = await asyncio.gather(*[categorize_chunk(chunk) for chunk in chunks], return_exceptions=True)
+        
+        labels = {}
+        errors = [result for result in results if isinstance(result, Exception)]
+        for result in results:
+            if isinstance(result, dict):
+                labels.update(result)
+        if errors and not labels:
+            raise errors[0]
+        return labels
+    
+    def _paper_prompt_text(self, paper: Dict[str, Any]) -> str:
+        return f"Title: {paper.get('title', '')}\nAbstract: {paper.get('abstract', '')}\nVenue: {paper.get('venue', '')}"
+    
+    async def _categorize_chunk(self, papers_text: List[str]) -> Dict[int, str]:
+        """Categorize one prompt-sized chunk of papers"""
+        numbered = "\n\n".join(f"[{idx}]\n{text}" for idx, text in enumerate(papers_text))
+        messages = [
+            self._create_system_message("You are a research methodology expert. Categorize papers based on their research approach and focus."),
+            self._create_user_message(self._build_categorization_prompt(numbered))
+        ]
+        
+        response = await self._call_llm(messages, temperature=0.5)
+        categorization = json.loads(response)
+        
+        labels = {}
+        for category, indices in categorization.items():
+            if category in self.categories:
+                for idx in indices:
+                    if isinstance(idx, int) and 0 <= idx < len(papers_text):
+                        labels[idx] = category
+        return labels
+    
+    def _build_categorization_prompt(self, numbered: str) -> str:
+        return f"""
+        Categorize the following academic papers into the most appropriate categories:
+        
+        Available categories: {', '.join(self.categories)}
+        
+        Papers:
+        {numbered}
+        
+        For each paper, determine the primary category based on its title, abstract, and venue.
+        Return a JSON object where keys are category names and values are arrays of paper indices (the numbers in brackets).
+        """
     
     async def generate_literature_summary(self, papers: List[Dict[str, Any]]) -> str:
         """Generate a summary of the literature"""
         self.log_activity("generate_literature_summary", {"paper_count": len(papers)})
         
+        messages = self._build_summary_messages(papers)
+        return await self._call_llm(messages, temperature=0.7)
+    
+    async def stream_literature_summary(self, papers: List[Dict[str, Any]]) -> AsyncIterator[str]:
+        """Stream a summary of the literature as it is generated"""
+        self.log_activity("stream_literature_summary", {"paper_count": len(papers)})
+        
+        messages = self._build_summary_messages(papers)
+        async for chunk in self._stream_llm(messages, temperature=0.7):
+            yield chunk
+    
+    def _build_summary_messages(self, papers: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Build the messages for a literature summary"""
         papers_text = "\n\n".join([
             f"Title: {paper.get('title', '')}\nAbstract: {paper.get('abstract', '')}\nYear: {paper.get('year', '')}"
             for paper in papers
@@ -193,8 +264,7 @@ class LiteratureAgent(BaseAgent):
             self._create_system_message("You are a literature review expert. Generate comprehensive summaries of academic literature."),
             self._create_user_message(summary_prompt)
         ]
-        
-        return await self._call_llm(messages, temperature=0.7)
+        return messages
     
     async def process_request(self, **kwargs) -> Dict[str, Any]:
         """Process literature review request"""
@@ -204,14 +274,21 @@ class LiteratureAgent(BaseAgent):
         if not topic:
             raise ValueError("topic is required")
         
-        papers = await self.search_papers(topic, max_results)
-        categorized = await self.categorize_papers(papers)
-        summary = await self.generate_literature_summary(papers)
+        # Categorization and summary both depend only on the papers, so they run side by side
+        workflow = Workflow("literature_review")
+        workflow.add_step("papers", lambda: self.search_papers(topic, max_results))
+        workflow.add_step("categorized", lambda papers: self.categorize_papers(papers), deps=["papers"], required=False)
+        workflow.add_step("summary", lambda papers: self.generate_literature_summary(papers), deps=["papers"], required=False)
+        
+        run = await workflow.run()
+        self.log_activity("process_request", run.get_report())
+        run.raise_for_errors()
         
         return {
-            "papers": papers,
-            "categorized_papers": categorized,
-            "summary": summary,
+            "papers": run.get("papers"),
+            "categorized_papers": run.get("categorized"),
+            "summary": run.get("summary"),
             "topic": topic,
+            "workflow": run.get_report(),
             "search_date": str(datetime.now())
-        } 
\ No newline at end of file
+        }
\ No newline at end of file
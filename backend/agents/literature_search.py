@@ -0,0 +1,159 @@
+import asyncio
+import json
+import os
+from abc import ABC, abstractmethod
+from itertools import islice
+from typing import Dict, Any, List, Optional
+from scholarly import scholarly
+from .cache import TieredCache, get_disk_cache
+from .single_flight import get_single_flight
+from .settings import env_int, env_float
+
+def normalize_topic(topic: str) -> str:
+    return " ".join(topic.lower().split())
+
+class SearchBackend(ABC):
+    """A source of papers; search() is blocking and is run off the event loop"""
+    
+    name = "backend"
+    
+    @abstractmethod
+    def search(self, topic: str, offset: int, limit: int) -> List[Dict[str, Any]]:
+        """Return up to limit papers for topic, skipping the first offset results"""
+        pass
+
+class ScholarBackend(SearchBackend):
+    """Google Scholar via the scholarly scraper"""
+    
+    name = "scholar"
+    
+    def search(self, topic: str, offset: int, limit: int) -> List[Dict[str, Any]]:
+        papers = []
+        results = scholarly.search_pubs(topic)
+        for i, paper in enumerate(islice(results, offset, offset + limit), start=offset):
+            papers.append({
+                "title": paper.get('bib', {}).get('title', 'Unknown'),
+                "authors": paper.get('bib', {}).get('author', []),
+                "abstract": paper.get('bib', {}).get('abstract', ''),
+                "year": paper.get('bib', {}).get('year', 'Unknown'),
+                "citations": paper.get('num_citations', 0),
+                "url": paper.get('pub_url', ''),
+                "venue": paper.get('bib', {}).get('venue', ''),
+                "id": str(paper.get('scholar_id', i))
+            })
+        return papers
+
+class FixtureBackend(SearchBackend):
+    """Local papers from a list or JSON file, ranked by topic term overlap; for tests and offline use"""
+    
+    name = "fixture"
+    
+    def __init__(self, papers: Optional[List[Dict[str, Any]]] = None, path: Optional[str] = None):
+        if papers is None:
+            with open(path or os.getenv("LITERATURE_FIXTURE_PATH", "fixtures/papers.json")) as f:
+                papers = json.load(f)
+        self.papers = papers
+    
+    def search(self, topic: str, offset: int, limit: int) -> List[Dict[str, Any]]:
+        terms = set(normalize_topic(topic).split())
+        scored = []
+        for paper in self.papers:
+            words = set(f"{paper.get('title', '')} {paper.get('abstract', '')}".lower().split())
+            score = len(terms & words)
+            if score:
+                scored.append((score, paper))
+        # Stable sort keeps fixture order among equally relevant papers
+        scored.sort(key=lambda entry: -entry[0])
+        return [paper for _, paper in scored[offset:offset + limit]]
+
+BACKENDS = {
+    "scholar": ScholarBackend,
+    "fixture": FixtureBackend
+}
+
+class LiteratureSearch:
+    """Async paged literature search over one or more backends, cached per topic and page"""
+    
+    def __init__(self, backends: List[SearchBackend], cache: Optional[TieredCache] = None,
+                 page_size: int = 10, ttl: Optional[float] = None):
+        if not backends:
+            raise ValueError("At least one search backend is required")
+        self.backends = backends
+        self.cache = cache
+        self.page_size = page_size
+        self.ttl = ttl
+    
+    async def search(self, topic: str, max_results: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+        """Search for papers, trying backends in order until one succeeds"""
+        errors = []
+        for backend in self.backends:
+            try:
+                return await self._search_backend(backend, topic, max_results, offset)
+            except Exception as e:
+                errors.append(f"{backend.name}: {str(e)}")
+        raise Exception(f"All search backends failed ({'; '.join(errors)})")
+    
+    async def _search_backend(self, backend: SearchBackend, topic: str,
+                              max_results: int, offset: int) -> List[Dict[str, Any]]:
+        topic_key = normalize_topic(topic)
+        first_page = offset // self.page_size
+        last_page = (offset + max_results - 1) // self.page_size
+        pages = {page: await self._get_page(backend, topic_key, page) for page in range(first_page, last_page + 1)}
+        
+        missing = [page for page, papers in pages.items() if papers is None]
+        if missing:
+            # Fetch the missing span in one backend call; scraping page N means walking pages before it anyway
+            start, end = missing[0], missing[-1]
+            fetched = await get_single_flight("literature_search").do(
+                (backend.name, topic_key, start, end),
+                lambda: asyncio.to_thread(
+                    backend.search, topic, start * self.page_size, (end - start + 1) * self.page_size
+                )
+            )
+            for page in range(start, end + 1):
+                page_papers = fetched[(page - start) * self.page_size:(page - start + 1) * self.page_size]
+                await self._set_page(backend, topic_key, page, page_papers)
+                pages[page] = page_papers
+        
+        papers = [paper for page in sorted(pages) for paper in pages[page]]
+        skip = offset - first_page * self.page_size
+        return papers[skip:skip + max_results]
+    
+    def _page_key(self, backend: SearchBackend, topic_key: str, page: int) -> str:
+        return json.dumps([backend.name, topic_key, self.page_size, page])
+    
+    async def _get_page(self, backend: SearchBackend, topic_key: str, page: int) -> Optional[List[Dict[str, Any]]]:
+        if self.cache is None:
+            return None
+        return await self.cache.aget(self._page_key(backend, topic_key, page))
+    
+    async def _set_page(self, backend: SearchBackend, topic_key: str, page: int, papers: List[Dict[str, Any]]):
+        if self.cache is not None:
+            await self.cache.aset(self._page_key(backend, topic_key, page), papers, self.ttl)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get backend and cache statistics"""
+        return {
+            "backends": [backend.name for backend in self.backends],
+            "page_size": self.page_size,
+            "cache": self.cache.get_stats() if self.cache is not None else None
+        }
+
+def create_literature_search() -> LiteratureSearch:
+    """Create the search layer from LITERATURE_SEARCH_BACKENDS (comma-separated, tried in order)"""
+    names = [name.strip() for name in os.getenv("LITERATURE_SEARCH_BACKENDS", "scholar").split(",") if name.strip()]
+    unknown = [name for name in names if name not in BACKENDS]
+    if unknown:
+        raise ValueError(f"Unknown literature search backends: {', '.join(unknown)}")
+    
+    cache = TieredCache(
+        "literature_search",
+        max_entries=env_int("LITERATURE_CACHE_MAX_ENTRIES", 512),
+        disk=get_disk_cache("literature_cache.sqlite3")
+    )
+    return LiteratureSearch(
+        [BACKENDS[name]() for name in names],
+        cache=cache,
+        page_size=env_int("LITERATURE_PAGE_SIZE", 10),
+        ttl=env_float("LITERATURE_CACHE_TTL", 86400.0)
+    )
\ No newline at end of file
@@ -0,0 +1,29 @@
+import hashlib
+import json
+from typing import Dict, List, Optional
+from .cache import TieredCache, get_disk_cache
+from .settings import env_int, env_float, env_bool
+
+_llm_cache: Optional[TieredCache] = None
+
+def make_llm_cache_key(model: str, temperature: float, messages: List[Dict]) -> str:
+    """Content-addressed key for an LLM call"""
+    payload = json.dumps(
+        {"model": model, "temperature": temperature, "messages": messages},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def get_llm_cache() -> Optional[TieredCache]:
+    """Get the shared LLM response cache, or None when caching is disabled"""
+    global _llm_cache
+    if _llm_cache is None and env_bool("LLM_CACHE_ENABLED", True):
+        disk = get_disk_cache("llm_cache.sqlite3") if env_bool("LLM_CACHE_DISK", True) else None
+        _llm_cache = TieredCache(
+            "llm",
+            max_entries=env_int("LLM_CACHE_MAX_ENTRIES", 1024),
+            disk=disk,
+            default_ttl=env_float("LLM_CACHE_TTL", 86400.0)
+        )
+    return _llm_cache
\ No newline at end of file
@@ -0,0 +1,118 @@
+import hashlib
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+import httpx
+from langchain_openai import ChatOpenAI
+from .settings import env_int, env_float
+
+class PooledLLMClient:
+    """A ChatOpenAI client bound to shared, connection-pooled HTTP clients"""
+    
+    def __init__(self, model: str, base_url: str, api_key: str):
+        self.model = model
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=env_int("LLM_POOL_MAX_CONNECTIONS", 100),
+            max_keepalive_connections=env_int("LLM_POOL_MAX_KEEPALIVE", 20),
+            keepalive_expiry=env_float("LLM_POOL_KEEPALIVE_EXPIRY", 60.0)
+        )
+        timeout = httpx.Timeout(env_float("LLM_HTTP_TIMEOUT", 120.0), connect=10.0)
+        self.requests_sent = 0
+        self.responses_received = 0
+        
+        self.async_http_client = httpx.AsyncClient(
+            limits=self.limits,
+            timeout=timeout,
+            event_hooks={"request": [self._on_async_request], "response": [self._on_async_response]}
+        )
+        self.sync_http_client = httpx.Client(
+            limits=self.limits,
+            timeout=timeout,
+            event_hooks={"request": [self._on_request], "response": [self._on_response]}
+        )
+        self.llm = ChatOpenAI(
+            api_key=api_key,
+            model=model,
+            base_url=base_url,
+            http_client=self.sync_http_client,
+            http_async_client=self.async_http_client
+        )
+    
+    def _on_request(self, request: httpx.Request):
+        self.requests_sent += 1
+    
+    def _on_response(self, response: httpx.Response):
+        self.responses_received += 1
+    
+    async def _on_async_request(self, request: httpx.Request):
+        self._on_request(request)
+    
+    async def _on_async_response(self, response: httpx.Response):
+        self._on_response(response)
+    
+    @staticmethod
+    def _pool_connections(http_client: Any) -> List[Any]:
+        # httpx does not expose pool state publicly; read it defensively
+        pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+        return list(getattr(pool, "connections", []) or [])
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics for this client"""
+        connections = self._pool_connections(self.async_http_client) + self._pool_connections(self.sync_http_client)
+        idle = sum(1 for conn in connections if getattr(conn, "is_idle", lambda: False)())
+        return {
+            "model": self.model,
+            "base_url": self.base_url,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "requests_sent": self.requests_sent,
+            "responses_received": self.responses_received
+        }
+    
+    async def aclose(self):
+        """Close the underlying HTTP clients"""
+        await self.async_http_client.aclose()
+        self.sync_http_client.close()
+
+class LLMClientRegistry:
+    """Process-wide registry sharing one pooled LLM client per model, base URL and key"""
+    
+    def __init__(self):
+        self._clients: Dict[Tuple[str, str, str], PooledLLMClient] = {}
+        self._lock = threading.Lock()
+    
+    def get_llm(self, model: str, base_url: str, api_key: str) -> ChatOpenAI:
+        """Get the shared ChatOpenAI for a model/base URL, creating it on first use"""
+        key = (model, base_url, hashlib.sha256(api_key.encode()).hexdigest())
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = PooledLLMClient(model, base_url, api_key)
+                self._clients[key] = client
+        return client.llm
+    
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """Get pool statistics for every registered client"""
+        with self._lock:
+            clients = list(self._clients.values())
+        return [client.get_stats() for client in clients]
+    
+    async def aclose(self):
+        """Close all registered clients"""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+_registry: Optional[LLMClientRegistry] = None
+
+def get_llm_registry() -> LLMClientRegistry:
+    """Get the process-wide LLM client registry"""
+    global _registry
+    if _registry is None:
+        _registry = LLMClientRegistry()
+    return _registry
\ No newline at end of file
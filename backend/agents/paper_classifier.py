@@ -0,0 +1,210 @@
+import json
+import os
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from .cache import get_cache_dir
+from .paper_index import paper_key
+from .settings import env_int, env_float
+
+# Short descriptions of each category; the model starts from these and improves with LLM labels
+CATEGORY_SEEDS = {
+    "Methodology": [
+        "a novel method and methodology for analysis",
+        "we propose a new approach framework and algorithm",
+        "methodological procedure for measurement and estimation",
+        "a technique for modeling and data analysis"
+    ],
+    "Findings": [
+        "results show significant findings and outcomes",
+        "we find evidence that outcomes improved",
+        "our results indicate an association and effect",
+        "key findings reveal differences between groups"
+    ],
+    "Theory": [
+        "a theoretical framework and conceptual model",
+        "we develop a theory and derive theoretical implications",
+        "conceptual analysis of theoretical foundations",
+        "formal theory propositions and hypotheses"
+    ],
+    "Review": [
+        "a narrative review of the literature",
+        "we review recent advances and the state of the art",
+        "an overview and critical review of existing work",
+        "literature review of research trends and challenges"
+    ],
+    "Case Study": [
+        "a case study of a single organization",
+        "in-depth case analysis of a company school or hospital",
+        "we examine the case of a specific project",
+        "qualitative case study with interviews and documents"
+    ],
+    "Experimental": [
+        "a randomized controlled experiment with treatment and control groups",
+        "experimental study in the laboratory with participants",
+        "we conducted experiments to test the effect",
+        "controlled trial experimental design and manipulation"
+    ],
+    "Survey": [
+        "a questionnaire survey of respondents",
+        "survey data collected from a national sample",
+        "cross-sectional survey of participants attitudes",
+        "online survey responses and self-reported measures"
+    ],
+    "Meta-analysis": [
+        "a meta-analysis pooling effect sizes across studies",
+        "random effects meta-analysis of heterogeneity",
+        "we meta-analyzed pooled estimates from trials",
+        "quantitative synthesis with forest plot and publication bias"
+    ],
+    "Systematic Review": [
+        "a systematic review following PRISMA guidelines",
+        "systematic search of databases with inclusion criteria",
+        "we systematically reviewed studies screened for eligibility",
+        "systematic literature review of risk of bias"
+    ]
+}
+
+def paper_text(paper: Dict[str, Any]) -> str:
+    return f"{paper.get('title', '')} {paper.get('abstract', '')} {paper.get('venue', '')}"
+
+class PaperClassifier:
+    """TF-IDF + logistic regression paper categorizer, trained on seeds and accumulated LLM labels
+    
+    On a cold start the model knows only the few seed phrases per category, so its probabilities
+    are spread thin: papers that echo a seed score around 0.8, but most score below 0.5 and go to
+    the LLM. That is how the classifier collects the labels it learns from; confidence rises with
+    each retrain. cold_start_confidence, when set, replaces min_confidence until the first
+    retrain, trading early LLM calls (and the labels they bring) for the seeds' guesses.
+    """
+    
+    def __init__(self, categories: List[str], directory: Optional[str] = None,
+                 min_confidence: float = 0.5, retrain_every: int = 50,
+                 cold_start_confidence: Optional[float] = None):
+        self.categories = list(categories)
+        self.directory = directory
+        self.min_confidence = min_confidence
+        self.cold_start_confidence = cold_start_confidence
+        self.retrain_every = retrain_every
+        self._lock = threading.Lock()
+        self._examples: Dict[str, Tuple[str, str]] = {}
+        self._pending = 0
+        self._training = False
+        self.trained_examples = 0
+        
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._examples_path = os.path.join(directory, "examples.jsonl")
+            if os.path.exists(self._examples_path):
+                with open(self._examples_path) as f:
+                    for line in f:
+                        if line.strip():
+                            example = json.loads(line)
+                            if example["label"] in self.categories:
+                                self._examples[example["key"]] = (example["text"], example["label"])
+        self._pipeline = self._fit(list(self._examples.values()))
+        self.trained_examples = len(self._examples)
+    
+    def _fit(self, examples: List[Tuple[str, str]]) -> Pipeline:
+        texts, labels = [], []
+        for category in self.categories:
+            for seed in CATEGORY_SEEDS.get(category, [category.lower()]):
+                texts.append(seed)
+                labels.append(category)
+        for text, label in examples:
+            texts.append(text)
+            labels.append(label)
+        
+        pipeline = Pipeline([
+            ("tfidf", TfidfVectorizer(sublinear_tf=True, ngram_range=(1, 2), stop_words="english")),
+            ("model", LogisticRegression(C=10.0, max_iter=1000, class_weight="balanced"))
+        ])
+        pipeline.fit(texts, labels)
+        return pipeline
+    
+    @property
+    def cold_start(self) -> bool:
+        """Whether the model has been trained on the seed phrases alone"""
+        return self.trained_examples == 0
+    
+    @property
+    def confidence_threshold(self) -> float:
+        """Probability below which a prediction should be confirmed by the LLM"""
+        if self.cold_start and self.cold_start_confidence is not None:
+            return self.cold_start_confidence
+        return self.min_confidence
+    
+    def predict(self, papers: List[Dict[str, Any]]) -> Tuple[List[str], np.ndarray]:
+        """Score a batch of papers at once; returns the top category and its probability for each"""
+        if not papers:
+            return [], np.zeros(0)
+        pipeline = self._pipeline
+        probabilities = pipeline.predict_proba([paper_text(paper) for paper in papers])
+        best = probabilities.argmax(axis=1)
+        classes = pipeline.classes_
+        return [str(classes[i]) for i in best], probabilities[np.arange(len(papers)), best]
+    
+    def learn(self, papers: List[Dict[str, Any]], labels: List[str]) -> bool:
+        """Record labeled papers; returns whether enough new examples have accumulated to retrain"""
+        new_examples = {}
+        for paper, label in zip(papers, labels):
+            if label in self.categories:
+                new_examples[paper_key(paper)] = (paper_text(paper), label)
+        if not new_examples:
+            return False
+        
+        with self._lock:
+            self._examples.update(new_examples)
+            self._pending += len(new_examples)
+            if self.directory:
+                with open(self._examples_path, "a") as f:
+                    for key, (text, label) in new_examples.items():
+                        f.write(json.dumps({"key": key, "text": text, "label": label}) + "\n")
+            return self._pending >= self.retrain_every and not self._training
+    
+    def retrain(self):
+        """Fit a new pipeline on all examples and swap it in; concurrent predictions keep using the old one"""
+        with self._lock:
+            if self._training:
+                return
+            self._training = True
+            pending = self._pending
+            self._pending = 0
+            examples = list(self._examples.values())
+        try:
+            # Fitting happens outside the lock so examples keep being recorded meanwhile
+            pipeline = self._fit(examples)
+        except Exception:
+            with self._lock:
+                self._pending += pending
+                self._training = False
+            raise
+        with self._lock:
+            self._pipeline = pipeline
+            self.trained_examples = len(examples)
+            self._training = False
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get training set size and thresholds"""
+        return {
+            "categories": len(self.categories),
+            "labeled_examples": len(self._examples),
+            "trained_examples": self.trained_examples,
+            "pending_examples": self._pending,
+            "min_confidence": self.min_confidence,
+            "cold_start": self.cold_start,
+            "confidence_threshold": self.confidence_threshold
+        }
+
+def create_paper_classifier(categories: List[str]) -> PaperClassifier:
+    """Create a classifier that persists its LLM-labeled examples under the cache dir"""
+    return PaperClassifier(
+        categories,
+        directory=os.path.join(get_cache_dir(), "paper_classifier"),
+        min_confidence=env_float("CATEGORIZER_MIN_CONFIDENCE", 0.5),
+        retrain_every=env_int("CATEGORIZER_RETRAIN_EVERY", 50),
+        cold_start_confidence=env_float("CATEGORIZER_COLD_START_CONFIDENCE", None)
+    )
\ No newline at end of file
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import os
+import threading
+from typing import Dict, Any, List, Optional
+import numpy as np
+from .cache import get_cache_dir
+from .settings import env_int, env_float, env_bool
+
+def paper_key(paper: Dict[str, Any]) -> str:
+    """Identity of a paper for deduplication: its source id, else its normalized title"""
+    title = " ".join(str(paper.get("title", "")).lower().split())
+    return f"id:{paper['id']}" if paper.get("id") and not str(paper["id"]).isdigit() else f"title:{title}"
+
+class PaperIndex:
+    """Local semantic index of fetched papers: CPU embeddings in a memory-mapped matrix"""
+    
+    def __init__(self, directory: str, model_name: str, dtype: str = "int8", batch_size: int = 32):
+        if dtype not in ("int8", "float32"):
+            raise ValueError("dtype must be int8 or float32")
+        
+        self.directory = directory
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._papers: List[Dict[str, Any]] = []
+        self._keys = set()
+        self.dim: Optional[int] = None
+        
+        os.makedirs(directory, exist_ok=True)
+        self._matrix_path = os.path.join(directory, f"embeddings.{dtype}")
+        self._papers_path = os.path.join(directory, "papers.jsonl")
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._load()
+    
+    def _load(self):
+        if not os.path.exists(self._meta_path):
+            # Rows appended before the first metadata write cannot be interpreted; start over
+            self._remove_files()
+            return
+        with open(self._meta_path) as f:
+            meta = json.load(f)
+        if meta.get("model") != self.model_name or meta.get("dtype") != self.dtype.name:
+            # Embeddings from another model are not comparable; start over
+            self._remove_files()
+            return
+        
+        self.dim = meta["dim"]
+        if os.path.exists(self._papers_path):
+            with open(self._papers_path) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        self._papers.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A write cut short by a crash; nothing after it was completed either
+                        break
+        self._repair()
+        self._keys = {paper_key(paper) for paper in self._papers}
+        self._open_matrix()
+    
+    def _remove_files(self):
+        for path in (self._matrix_path, self._papers_path, self._meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def _repair(self):
+        """Truncate papers and matrix rows to the papers both files hold in full
+        
+        Papers are written before their rows, so a crash between the two writes leaves papers
+        without rows; a crash during a write leaves a partial line or row.
+        """
+        row_bytes = self.dim * self.dtype.itemsize
+        matrix_bytes = os.path.getsize(self._matrix_path) if os.path.exists(self._matrix_path) else 0
+        count = min(len(self._papers), matrix_bytes // row_bytes)
+        if count == len(self._papers) and count * row_bytes == matrix_bytes:
+            return
+        self._papers = self._papers[:count]
+        with open(self._papers_path, "w") as f:
+            for paper in self._papers:
+                f.write(json.dumps(paper) + "\n")
+        with open(self._matrix_path, "ab") as f:
+            f.truncate(count * row_bytes)
+    
+    def _open_matrix(self):
+        count = len(self._papers)
+        if count and self.dim:
+            self._matrix = np.memmap(self._matrix_path, dtype=self.dtype, mode="r", shape=(count, self.dim))
+    
+    def _get_model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name, device="cpu")
+        return self._model
+    
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts in batches as L2-normalized float32 vectors"""
+        return self._get_model().encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        ).astype(np.float32)
+    
+    def _quantize(self, vectors: np.ndarray) -> np.ndarray:
+        if self.dtype == np.int8:
+            return np.clip(np.rint(vectors * 127), -127, 127).astype(np.int8)
+        return vectors.astype(np.float32)
+    
+    @staticmethod
+    def _paper_text(paper: Dict[str, Any]) -> str:
+        return f"{paper.get('title', '')}. {paper.get('abstract', '')}"
+    
+    def add_papers_sync(self, papers: List[Dict[str, Any]]) -> int:
+        """Embed and append papers not yet indexed; returns how many were added"""
+        new_papers = []
+        seen = set()
+        for paper in papers:
+            key = paper_key(paper)
+            if key not in self._keys and key not in seen and paper.get("title"):
+                seen.add(key)
+                new_papers.append(paper)
+        if not new_papers:
+            return 0
+        
+        vectors = self._quantize(self._embed([self._paper_text(paper) for paper in new_papers]))
+        with self._lock:
+            # Overlapping calls (searches index their results in the background) may have added
+            # some of these papers while they were being embedded
+            keep = [i for i, paper in enumerate(new_papers) if paper_key(paper) not in self._keys]
+            if not keep:
+                return 0
+            new_papers = [new_papers[i] for i in keep]
+            vectors = vectors[keep]
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            # Papers are written before their rows, so a crash in between is repaired on load;
+            # then rows are appended to the backing file and it is remapped with the new shape
+            with open(self._papers_path, "a") as f:
+                for paper in new_papers:
+                    f.write(json.dumps(paper) + "\n")
+            with open(self._matrix_path, "ab") as f:
+                f.write(np.ascontiguousarray(vectors).tobytes())
+            self._papers.extend(new_papers)
+            self._keys.update(paper_key(paper) for paper in new_papers)
+            with open(self._meta_path, "w") as f:
+                json.dump({"model": self.model_name, "dtype": self.dtype.name, "dim": self.dim}, f)
+            self._open_matrix()
+        return len(new_papers)
+    
+    def search_sync(self, query: str, top_k: int = 10, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """Top-k cosine similarity search over indexed papers"""
+        matrix, papers = self._matrix, self._papers
+        if matrix is None or not len(papers):
+            return []
+        
+        query_vector = self._embed([query])[0]
+        scale = 127.0 if self.dtype == np.int8 else 1.0
+        # Score in blocks so an int8 matrix is never fully converted to float32 at once
+        scores = np.empty(matrix.shape[0], dtype=np.float32)
+        block = 65536
+        for start in range(0, matrix.shape[0], block):
+            scores[start:start + block] = matrix[start:start + block].astype(np.float32) @ query_vector / scale
+        
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {**papers[i], "similarity": round(float(scores[i]), 4)}
+            for i in top if scores[i] >= min_score
+        ]
+    
+    async def add_papers(self, papers: List[Dict[str, Any]]) -> int:
+        return await asyncio.to_thread(self.add_papers_sync, papers)
+    
+    async def search(self, query: str, top_k: int = 10, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.search_sync, query, top_k, min_score)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index size and configuration"""
+        count = len(self._papers)
+        return {
+            "model": self.model_name,
+            "dtype": self.dtype.name,
+            "dim": self.dim,
+            "papers": count,
+            "matrix_bytes": count * (self.dim or 0) * self.dtype.itemsize
+        }
+
+_paper_index: Optional[PaperIndex] = None
+
+def get_paper_index() -> Optional[PaperIndex]:
+    """Get the shared paper index, or None when disabled or sentence-transformers is not installed"""
+    global _paper_index
+    if _paper_index is None and env_bool("PAPER_INDEX_ENABLED", True):
+        try:
+            import sentence_transformers  # noqa: F401
+        except ImportError:
+            return None
+        _paper_index = PaperIndex(
+            os.path.join(get_cache_dir(), "paper_index"),
+            model_name=os.getenv("PAPER_INDEX_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
+            dtype=os.getenv("PAPER_INDEX_DTYPE", "int8"),
+            batch_size=env_int("PAPER_INDEX_BATCH_SIZE", 32)
+        )
+    return _paper_index
+
+def get_min_score() -> float:
+    """Similarity a cached paper needs to answer a search from the local index"""
+    return env_float("PAPER_INDEX_MIN_SCORE", 0.6)
\ No newline at end of file
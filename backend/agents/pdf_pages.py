@@ -0,0 +1,73 @@
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, List, Optional, Tuple
+from .settings import env_int
+
+_executor: Optional[ProcessPoolExecutor] = None
+_workers = 1
+
+def _open_reader(handle):
+    """Read a PDF lazily from an open file; PdfReader given a path would read the whole file into memory"""
+    from PyPDF2 import PdfReader
+    return PdfReader(handle)
+
+# Readers are opened and closed within each job: a reader kept in an idle worker would hold the
+# upload's file open, and its disk space allocated, long after the request removed it
+def _count_pages(path: str) -> int:
+    with open(path, "rb") as handle:
+        return len(_open_reader(handle).pages)
+
+def _extract_pages(path: str, start: int, end: int) -> List[str]:
+    """Extract the text of pages [start, end) in a worker process"""
+    texts = []
+    with open(path, "rb") as handle:
+        reader = _open_reader(handle)
+        for number in range(start, end):
+            try:
+                texts.append(reader.pages[number].extract_text() or "")
+            except Exception:
+                # One malformed page should not lose the rest of the document
+                texts.append("")
+    return texts
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    """Get the process pool that parses PDFs (and large reference batches) off the event loop and outside the GIL"""
+    global _executor, _workers
+    if _executor is None:
+        _workers = env_int("PDF_WORKERS", min(4, os.cpu_count() or 1))
+        _executor = ProcessPoolExecutor(max_workers=_workers)
+    return _executor
+
+def shutdown_pdf_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def iter_pdf_pages(path: str, batch_size: Optional[int] = None) -> AsyncIterator[Tuple[int, str]]:
+    """Yield (page number, text) in page order while later pages are still being parsed
+    
+    Workers read the file from disk themselves, so page text is the only thing sent back
+    and only a few batches are outstanding at a time.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_pdf_executor()
+    batch_size = batch_size or env_int("PDF_PAGE_BATCH", 8)
+    max_pending = _workers * 2
+    
+    page_count = await loop.run_in_executor(executor, _count_pages, path)
+    batches = deque((start, min(start + batch_size, page_count)) for start in range(0, page_count, batch_size))
+    pending = deque()
+    try:
+        while batches or pending:
+            while batches and len(pending) < max_pending:
+                start, end = batches.popleft()
+                pending.append((start, loop.run_in_executor(executor, _extract_pages, path, start, end)))
+            start, future = pending.popleft()
+            for offset, text in enumerate(await future):
+                yield start + offset, text
+    finally:
+        for _, future in pending:
+            future.cancel()
\ No newline at end of file
@@ -1,11 +1,20 @@
 import json
-from typing import Dict, Any, List, Optional
+import asyncio
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 from .base_agent import BaseAgent
+from .workflow import Workflow
+from .settings import env_int
 from datetime import datetime
 
 class ProposalAgent(BaseAgent):
     """Automated Research Proposal Generator - Generates and improves research proposals"""
     
+    # Long generations; keep them from crowding out other agents, but leave room for
+    # section-by-section drafts to generate a few sections at once
+    llm_concurrency = 4
+    # Users regenerate proposals to get a fresh draft, so only reuse them briefly
+    llm_cache_ttl = 3600
+    
     def __init__(self):
         super().__init__()
         self.proposal_sections = [
@@ -23,6 +32,7 @@ class ProposalAgent(BaseAgent):
             "budget",
             "references"
         ]
+        self.section_concurrency = env_int("PROPOSAL_SECTION_CONCURRENCY", self.llm_limiter.max_concurrency)
     
     def get_capabilities(self) -> List[str]:
         return [
@@ -43,38 +53,9 @@ class ProposalAgent(BaseAgent):
         })
         
         try:
-            proposal_prompt = f"""
-            Generate a comprehensive research proposal based on the following information:
-            
-            Research Topic: {research_topic}
-            Research Question: {research_question}
-            Methodology: {methodology}
-            Expected Outcomes: {expected_outcomes}
-            Additional Context: {additional_context}
-            
-            Create a complete research proposal with the following sections:
-            1. Title - Clear and descriptive
-            2. Abstract - Summary of the research (150-250 words)
-            3. Introduction - Background and significance
-            4. Literature Review - Brief overview of relevant research
-            5. Research Questions - Specific questions to be addressed
-            6. Hypotheses - Testable predictions
-            7. Methodology - Detailed research design
-            8. Data Collection - Methods and procedures
-            9. Analysis Plan - Statistical or analytical approach
-            10. Expected Outcomes - Anticipated results and impact
-            11. Timeline - Project schedule (6-12 months)
-            12. Budget - Estimated costs and justification
-            13. References - Key sources (at least 10)
-            
-            Format the proposal professionally with clear headings and academic writing style.
-            Return as a structured JSON object with each section as a key.
-            """
-            
-            messages = [
-                self._create_system_message("You are an expert research proposal writer. Generate comprehensive, well-structured proposals that follow academic standards."),
-                self._create_user_message(proposal_prompt)
-            ]
+            messages = self._build_proposal_messages(
+                research_topic, research_question, methodology, expected_outcomes, additional_context
+            )
             
             response = await self._call_llm(messages, temperature=0.7)
             
@@ -95,33 +76,139 @@ class ProposalAgent(BaseAgent):
         except Exception as e:
             raise Exception(f"Failed to generate proposal: {str(e)}")
     
+    def _build_proposal_messages(self, research_topic: str, research_question: str,
+                                 methodology: str, expected_outcomes: str,
+                                 additional_context: str = "") -> List[Dict[str, str]]:
+        """Build the messages for a full proposal generation"""
+        proposal_prompt = f"""
+        Generate a comprehensive research proposal based on the following information:
+        
+        Research Topic: {research_topic}
+        Research Question: {research_question}
+        Methodology: {methodology}
+        Expected Outcomes: {expected_outcomes}
+        Additional Context: {additional_context}
+        
+        Create a complete research proposal with the following sections:
+        1. Title - Clear and descriptive
+        2. Abstract - Summary of the research (150-250 words)
+        3. Introduction - Background and significance
+        4. Literature Review - Brief overview of relevant research
+        5. Research Questions - Specific questions to be addressed
+        6. Hypotheses - Testable predictions
+        7. Methodology - Detailed research design
+        8. Data Collection - Methods and procedures
+        9. Analysis Plan - Statistical or analytical approach
+        10. Expected Outcomes - Anticipated results and impact
+        11. Timeline - Project schedule (6-12 months)
+        12. Budget - Estimated costs and justification
+        13. References - Key sources (at least 10)
+        
+        Format the proposal professionally with clear headings and academic writing style.
+        Return as a structured JSON object with each section as a key.
+        """
+        
+        messages = [
+            self._create_system_message("You are an expert research proposal writer. Generate comprehensive, well-structured proposals that follow academic standards."),
+            self._create_user_message(proposal_prompt)
+        ]
+        return messages
+    
+    async def stream_proposal(self, research_topic: str, research_question: str,
+                              methodology: str, expected_outcomes: str,
+                              additional_context: str = "") -> AsyncIterator[str]:
+        """Stream a complete research proposal as it is generated"""
+        self.log_activity("stream_proposal", {
+            "research_topic": research_topic,
+            "methodology": methodology
+        })
+        
+        messages = self._build_proposal_messages(
+            research_topic, research_question, methodology, expected_outcomes, additional_context
+        )
+        async for chunk in self._stream_llm(messages, temperature=0.7):
+            yield chunk
+    
     async def _generate_structured_proposal(self, research_topic: str, research_question: str,
                                           methodology: str, expected_outcomes: str,
                                           additional_context: str) -> Dict[str, Any]:
         """Generate proposal section by section"""
-        proposal = {}
-        
-        # Generate each section individually
-        sections_to_generate = [
-            ("title", f"Generate a clear, descriptive title for research on: {research_topic}"),
-            ("abstract", f"Write an abstract (150-250 words) for research on {research_topic}. Research question: {research_question}. Methodology: {methodology}"),
-            ("introduction", f"Write an introduction for research on {research_topic}. Include background, significance, and context."),
-            ("research_questions", f"Formulate specific research questions for: {research_question}"),
-            ("hypotheses", f"Generate testable hypotheses for research on {research_topic}"),
-            ("methodology", f"Detail the methodology for: {methodology}"),
-            ("expected_outcomes", f"Describe expected outcomes: {expected_outcomes}"),
-            ("timeline", "Create a 12-month project timeline with milestones"),
-            ("budget", "Estimate budget for this research project with cost breakdown"),
-            ("references", f"Generate 10 relevant references for research on {research_topic}")
+        proposal = await self._run_section_workflow(
+            research_topic, research_question, methodology, expected_outcomes, additional_context
+        )
+        
+        return {
+            "proposal": proposal,
+            "generated_at": str(datetime.now()),
+            "sections_completed": len(proposal.keys()),
+            "status": "complete"
+        }
+    
+    async def stream_structured_proposal(self, research_topic: str, research_question: str,
+                                         methodology: str, expected_outcomes: str,
+                                         additional_context: str = "") -> AsyncIterator[Tuple[str, str]]:
+        """Generate proposal sections concurrently, yielding (section, content) as each completes"""
+        self.log_activity("stream_structured_proposal", {
+            "research_topic": research_topic,
+            "methodology": methodology
+        })
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(self._run_section_workflow(
+            research_topic, research_question, methodology, expected_outcomes, additional_context,
+            on_section=lambda name, content: queue.put_nowait((name, content))
+        ))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield item
+            # Surface a failure of the workflow itself
+            task.result()
+        finally:
+            task.cancel()
+    
+    def _section_specs(self, research_topic: str, research_question: str, methodology: str,
+                       expected_outcomes: str) -> List[Tuple[str, str, List[str]]]:
+        """Sections as (name, prompt, sections whose content the prompt builds on)"""
+        return [
+            ("title", f"Generate a clear, descriptive title for research on: {research_topic}", []),
+            ("abstract", f"Write an abstract (150-250 words) for research on {research_topic}. Research question: {research_question}. Methodology: {methodology}", ["title"]),
+            ("introduction", f"Write an introduction for research on {research_topic}. Include background, significance, and context.", ["title"]),
+            ("research_questions", f"Formulate specific research questions for: {research_question}", []),
+            ("hypotheses", f"Generate testable hypotheses for research on {research_topic}", ["research_questions"]),
+            ("methodology", f"Detail the methodology for: {methodology}", []),
+            ("expected_outcomes", f"Describe expected outcomes: {expected_outcomes}", ["hypotheses"]),
+            ("timeline", "Create a 12-month project timeline with milestones", ["methodology"]),
+            ("budget", "Estimate budget for this research project with cost breakdown", ["methodology", "timeline"]),
+            ("references", f"Generate 10 relevant references for research on {research_topic}", [])
         ]
+    
+    async def _run_section_workflow(self, research_topic: str, research_question: str,
+                                    methodology: str, expected_outcomes: str, additional_context: str,
+                                    on_section=None) -> Dict[str, str]:
+        """Generate all sections, each waiting only on the sections it builds on"""
+        semaphore = asyncio.Semaphore(self.section_concurrency)
+        failed = set()
         
-        for section_name, prompt in sections_to_generate:
+        async def generate(section_name: str, prompt: str, **previous: str) -> str:
             try:
+                # Failed sections are left out rather than fed to later prompts as context
+                context = "\n\n".join(
+                    f"{name.replace('_', ' ').title()}:\n{content}"
+                    for name, content in previous.items() if name not in failed
+                )
+                if context:
+                    context = f"Sections written so far:\n{context}"
                 section_prompt = f"""
                 {prompt}
                 
                 Additional context: {additional_context}
                 
+                {context}
+                
                 Write this section in academic style, be specific and detailed.
                 """
                 
@@ -130,47 +217,36 @@ class ProposalAgent(BaseAgent):
                     self._create_user_message(section_prompt)
                 ]
                 
-                section_content = await self._call_llm(messages, temperature=0.6)
-                proposal[section_name] = section_content.strip()
+                async with semaphore:
+                    section_content = await self._call_llm(messages, temperature=0.6)
+                return section_content.strip()
                 
             except Exception as e:
-                proposal[section_name] = f"Error generating {section_name}: {str(e)}"
+                failed.add(section_name)
+                return f"Error generating {section_name}: {str(e)}"
         
-        return {
-            "proposal": proposal,
-            "generated_at": str(datetime.now()),
-            "sections_completed": len(proposal.keys()),
-            "status": "complete"
-        }
+        workflow = Workflow("structured_proposal")
+        specs = self._section_specs(research_topic, research_question, methodology, expected_outcomes)
+        for section_name, prompt, deps in specs:
+            workflow.add_step(
+                section_name,
+                lambda section_name=section_name, prompt=prompt, **previous: generate(section_name, prompt, **previous),
+                deps=deps
+            )
+        
+        run = await workflow.run(on_step_complete=on_section)
+        self.log_activity("structured_proposal", run.get_report())
+        run.raise_for_errors()
+        
+        # Keep the conventional section order regardless of completion order
+        return {section_name: run.get(section_name) for section_name, _, _ in specs}
     
     async def improve_proposal(self, proposal_text: str, feedback: str) -> Dict[str, Any]:
         """Improve an existing proposal based on feedback"""
         self.log_activity("improve_proposal", {"feedback_length": len(feedback)})
         
         try:
-            improvement_prompt = f"""
-            Improve the following research proposal based on the provided feedback:
-            
-            Original Proposal:
-            {proposal_text}
-            
-            Feedback for Improvement:
-            {feedback}
-            
-            Please:
-            1. Address all points in the feedback
-            2. Maintain the original structure and flow
-            3. Improve clarity, specificity, and academic rigor
-            4. Ensure all sections are well-developed
-            5. Fix any grammatical or formatting issues
-            
-            Return the improved proposal with the same structure as the original.
-            """
-            
-            messages = [
-                self._create_system_message("You are an expert research proposal editor. Improve proposals based on feedback while maintaining academic standards."),
-                self._create_user_message(improvement_prompt)
-            ]
+            messages = self._build_improvement_messages(proposal_text, feedback)
             
             improved_proposal = await self._call_llm(messages, temperature=0.6)
             
@@ -185,6 +261,41 @@ class ProposalAgent(BaseAgent):
         except Exception as e:
             raise Exception(f"Failed to improve proposal: {str(e)}")
     
+    def _build_improvement_messages(self, proposal_text: str, feedback: str) -> List[Dict[str, str]]:
+        """Build the messages for improving a proposal with feedback"""
+        improvement_prompt = f"""
+        Improve the following research proposal based on the provided feedback:
+        
+        Original Proposal:
+        {proposal_text}
+        
+        Feedback for Improvement:
+        {feedback}
+        
+        Please:
+        1. Address all points in the feedback
+        2. Maintain the original structure and flow
+        3. Improve clarity, specificity, and academic rigor
+        4. Ensure all sections are well-developed
+        5. Fix any grammatical or formatting issues
+        
+        Return the improved proposal with the same structure as the original.
+        """
+        
+        messages = [
+            self._create_system_message("You are an expert research proposal editor. Improve proposals based on feedback while maintaining academic standards."),
+            self._create_user_message(improvement_prompt)
+        ]
+        return messages
+    
+    async def stream_improved_proposal(self, proposal_text: str, feedback: str) -> AsyncIterator[str]:
+        """Stream an improved proposal as it is generated"""
+        self.log_activity("stream_improved_proposal", {"feedback_length": len(feedback)})
+        
+        messages = self._build_improvement_messages(proposal_text, feedback)
+        async for chunk in self._stream_llm(messages, temperature=0.6):
+            yield chunk
+    
     async def generate_section(self, section_name: str, context: Dict[str, str]) -> str:
         """Generate a specific section of a research proposal"""
         self.log_activity("generate_section", {"section": section_name})
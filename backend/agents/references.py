@@ -0,0 +1,207 @@
+import re
+from typing import Dict, Any, List, Tuple
+from .doi import find_dois
+from .document import SECTION_HEADING
+
+# A numbered entry: [12], 12. or 12)
+_NUMBERED = re.compile(r'^\s*(?:\[(\d{1,4})\]|(\d{1,4})[.)])\s+')
+# An author-year entry starts with "Surname, X." or "Surname X," (APA, Harvard, Vancouver)
+_AUTHOR_START = re.compile(r"^\s*[A-Z][\w'’\-]+(?: [A-Z][\w'’\-]+)?,? (?:[A-Z]\.|[A-Z]{1,3}[,.]|[A-Z][a-z]+,)")
+# IEEE and MLA lists start with the first author's initials: "J. Smith, ..."
+_INITIALS_START = re.compile(r"^\s*(?:[A-Z]\.\s*)+[A-Z][\w'’\-]+")
+_YEAR_IN_PARENS = re.compile(r'\((\d{4}[a-z]?|n\.d\.)[^)]*\)\.?')
+# Years are not part of a page range (1877-1901)
+_YEAR = re.compile(r'(?<![\d-])((?:1[89]|20)\d{2}[a-z]?)(?![\d-])')
+_QUOTED_TITLE = re.compile(r'["“]([^"”]{3,})[,.]?["”]')
+_APA_AUTHOR = re.compile(r"[A-Z][\w'’\-]+(?: [A-Z][\w'’\-]+)*,\s*(?:[A-Z]\.[\s-]*)+")
+_AUTHOR_SEPARATORS = re.compile(r',?\s+(?:and|&)\s+|;\s*')
+# Vancouver author lists: "Smith J, Doe AB, Lee K. "
+_VANCOUVER_AUTHORS = re.compile(r"^(?:[A-Z][\w'’\-]+(?: [A-Z][\w'’\-]+)? [A-Z]{1,3}(?:, |\.\s+|,? et al\.\s+))+")
+_SENTENCE_END = re.compile(r'(?<![A-Z])[.?!](?:\s+|$)')
+# The venue runs until volume, pages or year details begin
+_VENUE_END = re.compile(r',|;|\(|\.\s+(?=\d)|\s\d')
+_VENUE_PREFIX = re.compile(r'^(?:in:?\s+)', re.IGNORECASE)
+_NOT_VENUE = re.compile(r'^(?:retrieved|available|accessed|vol\b|pp\b)', re.IGNORECASE)
+_TITLE_KEY = re.compile(r'[^a-z0-9]+')
+
+MIN_ENTRY_CHARS = 20
+MAX_ENTRY_CHARS = 1500
+
+def split_entries(text: str) -> List[str]:
+    """Split a reference list into entries, joining lines that wrap within an entry"""
+    return [entry for entry, _, _ in split_entry_spans(text)]
+
+def split_entry_spans(text: str) -> List[Tuple[str, int, int]]:
+    """Split a reference list into (entry, start, end) with each entry's offsets in text"""
+    raw_lines = text.split("\n")
+    lines = [line.strip() for line in raw_lines]
+    # Offsets of each stripped line's first and last character
+    bounds = []
+    position = 0
+    for raw, line in zip(raw_lines, lines):
+        begin = position + len(raw) - len(raw.lstrip())
+        bounds.append((begin, begin + len(line)))
+        position += len(raw) + 1
+    numbered = sum(1 for line in lines if _NUMBERED.match(line))
+    starts_entry = _NUMBERED.match if numbered >= 3 else _AUTHOR_START.match
+    # Blank lines separate entries only when the list is not numbered and has several of them
+    blank_separated = numbered < 3 and lines.count("") >= 3
+    
+    entries = []
+    current: List[int] = []
+    
+    def close():
+        entries.append((" ".join(lines[i] for i in current), bounds[current[0]][0], bounds[current[-1]][1]))
+        current.clear()
+    
+    for i, line in enumerate(lines):
+        if SECTION_HEADING.match(line):
+            # A heading (the list's own, or the one ending the text before it) is never part of an entry
+            if current:
+                close()
+            continue
+        if not line:
+            if blank_separated and current:
+                close()
+            continue
+        if current and (starts_entry(line) and not blank_separated):
+            close()
+        current.append(i)
+    if current:
+        close()
+    # Words hyphenated across lines are rejoined
+    return [
+        (re.sub(r'(\w)- (\w)', r'\1\2', entry), start, end)
+        for entry, start, end in entries if len(entry) >= MIN_ENTRY_CHARS
+    ]
+
+def _split_authors(segment: str) -> List[str]:
+    segment = segment.strip().rstrip(",")
+    if not segment:
+        return []
+    segment = re.sub(r',?\s*et al\.?', "", segment)
+    apa = _APA_AUTHOR.findall(segment)
+    if len(apa) >= 1 and sum(len(author) for author in apa) >= len(segment) * 0.6:
+        return [author.strip().rstrip(",") for author in apa]
+    parts = []
+    for part in _AUTHOR_SEPARATORS.split(segment):
+        parts.extend(name.strip() for name in part.split(","))
+    return [part.rstrip(".") for part in parts if part and len(part) > 1]
+
+def _first_sentence(text: str) -> Tuple[str, str]:
+    """Split off the first sentence; initials such as "A." do not end one"""
+    match = _SENTENCE_END.search(text)
+    if not match:
+        return text.strip(), ""
+    return text[:match.start() + 1].strip().rstrip("."), text[match.end():]
+
+def parse_reference(entry: str) -> Dict[str, Any]:
+    """Parse authors, year, title, venue and DOI out of one reference entry"""
+    reference: Dict[str, Any] = {"raw": entry}
+    numbered = _NUMBERED.match(entry)
+    if numbered:
+        reference["number"] = int(numbered.group(1) or numbered.group(2))
+        entry = entry[numbered.end():]
+    
+    dois = find_dois(entry)
+    reference["doi"] = dois[0].doi if dois else None
+    body = entry[:dois[0].start] if dois else entry
+    body = re.sub(r'(?:https?://|doi:\s*)\S*$', "", body.strip(), flags=re.IGNORECASE).strip()
+    
+    authors, title, rest = "", None, ""
+    year_in_parens = _YEAR_IN_PARENS.search(body)
+    quoted = _QUOTED_TITLE.search(body)
+    if year_in_parens and year_in_parens.start() < 400:
+        # APA / Harvard: Authors (Year). Title. Venue, volume(issue), pages.
+        reference["year"] = year_in_parens.group(1)
+        authors = body[:year_in_parens.start()]
+        title, rest = _first_sentence(body[year_in_parens.end():])
+    elif quoted:
+        # IEEE: Authors, "Title," Venue, vol., pp., Year.
+        authors = body[:quoted.start()]
+        title = quoted.group(1).strip()
+        rest = body[quoted.end():]
+    else:
+        # Vancouver / MLA: Authors. Title. Venue. Year;volume:pages.
+        vancouver = _VANCOUVER_AUTHORS.match(body)
+        if vancouver:
+            authors, remainder = vancouver.group(0), body[vancouver.end():]
+        else:
+            authors, remainder = _first_sentence(body)
+        title, rest = _first_sentence(remainder)
+    
+    if "year" not in reference:
+        # The publication year is the last one given; earlier numbers may be volumes or pages
+        years = _YEAR.findall(rest) or _YEAR.findall(body)
+        reference["year"] = years[-1] if years else None
+    reference["authors"] = _split_authors(authors)
+    reference["title"] = title.strip(" .,") if title else None
+    venue = _VENUE_PREFIX.sub("", _VENUE_END.split(rest.strip(" ,."), 1)[0]).strip(" .")
+    reference["venue"] = venue if len(venue) > 2 and not _NOT_VENUE.match(venue) else None
+    return reference
+
+def parse_references(text: str) -> List[Dict[str, Any]]:
+    """Split and parse a whole reference list"""
+    return [parse_reference(entry) for entry in split_entries(text) if len(entry) <= MAX_ENTRY_CHARS]
+
+def parse_entries(entries: List[str]) -> List[Dict[str, Any]]:
+    """Parse already split entries; run in worker processes for large batches"""
+    return [parse_reference(entry) for entry in entries]
+
+def looks_like_reference(reference: Dict[str, Any]) -> bool:
+    """Whether a parsed paragraph is plausibly a reference, for text without a reference heading"""
+    if not reference.get("year"):
+        return False
+    if reference.get("doi"):
+        return True
+    raw = reference["raw"]
+    if not (_NUMBERED.match(raw) or _AUTHOR_START.match(raw) or _INITIALS_START.match(raw) or _VANCOUVER_AUTHORS.match(raw)):
+        return False
+    authors = reference.get("authors")
+    return bool(authors and reference.get("title") and all(len(author.split()) <= 5 for author in authors))
+
+def reference_keys(reference: Dict[str, Any]) -> List[str]:
+    """Identities for deduplication: the DOI, and first author, year and the start of the title"""
+    keys = [f"doi:{reference['doi']}"] if reference.get("doi") else []
+    title = _TITLE_KEY.sub("", (reference.get("title") or reference["raw"]).lower())[:60]
+    authors = reference.get("authors") or [""]
+    surname = _TITLE_KEY.sub("", authors[0].split(",")[0].lower()) if authors[0] else ""
+    keys.append(f"{surname}|{reference.get('year') or ''}|{title}")
+    return keys
+
+def dedupe_references(references: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge entries that differ only in punctuation, case or spacing (or share a DOI)"""
+    unique: List[Dict[str, Any]] = []
+    by_key: Dict[str, Dict[str, Any]] = {}
+    for reference in references:
+        keys = reference_keys(reference)
+        existing = next((by_key[key] for key in keys if key in by_key), None)
+        if existing is None:
+            unique.append(reference)
+            existing = reference
+        else:
+            existing["duplicates"] = existing.get("duplicates", 0) + 1
+            for field, value in reference.items():
+                if value and not existing.get(field):
+                    existing[field] = value
+        # A duplicate's DOI also identifies the merged entry from now on
+        for key in reference_keys(existing):
+            by_key.setdefault(key, existing)
+    return unique
+
+def apply_metadata(reference: Dict[str, Any], csl: Dict[str, Any]):
+    """Fill a parsed reference from DOI metadata (a CSL-JSON item); the raw entry text is kept"""
+    if csl.get("title"):
+        reference["title"] = csl["title"]
+    if csl.get("container-title"):
+        reference["venue"] = csl["container-title"]
+    authors = [
+        f"{name['family']}, {name['given']}" if name.get("given") else name.get("family") or name.get("literal")
+        for name in csl.get("author", [])
+    ]
+    if authors:
+        reference["authors"] = authors
+    date_parts = csl.get("issued", {}).get("date-parts")
+    if date_parts and date_parts[0]:
+        reference["year"] = str(date_parts[0][0])
+    reference["enriched"] = True
\ No newline at end of file
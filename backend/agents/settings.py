@@ -0,0 +1,19 @@
+import os
+from typing import Optional
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+def env_float(name: str, default: Optional[float]) -> Optional[float]:
+    """Read a float setting from the environment"""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+def env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting from the environment"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
\ No newline at end of file
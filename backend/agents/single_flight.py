@@ -0,0 +1,61 @@
+import asyncio
+from typing import Dict, Any, Awaitable, Callable, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """Coalesces identical concurrent calls so they share one in-flight upstream call"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Run func() for key, or wait for the call already running for the same key"""
+        result, _ = await self.do_leading(key, func)
+        return result
+    
+    async def do_leading(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Like do(), but also tell whether this caller started the call (True) or joined one running (False)"""
+        self.calls += 1
+        task = self._inflight.get(key)
+        led = task is None
+        if led:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _task: self._forget(key, _task))
+        else:
+            self.coalesced += 1
+        
+        # Shield so one caller disconnecting does not cancel the call for everyone else
+        return await asyncio.shield(task), led
+    
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so an abandoned failed call is not reported as unhandled
+        if not task.cancelled():
+            task.exception()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics"""
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight)
+        }
+
+_groups: Dict[str, SingleFlight] = {}
+
+def get_single_flight(name: str) -> SingleFlight:
+    """Get the process-wide coalescing group for a kind of upstream call"""
+    if name not in _groups:
+        _groups[name] = SingleFlight(name)
+    return _groups[name]
+
+def get_single_flight_stats() -> Dict[str, Dict[str, Any]]:
+    """Get statistics for every coalescing group"""
+    return {name: group.get_stats() for name, group in _groups.items()}
\ No newline at end of file
@@ -0,0 +1,209 @@
+import re
+from typing import Dict, Any, Iterator, List, NamedTuple, Optional
+import numpy as np
+
+_NUM = r'[-−]?(?:\d+(?:\.\d+)?|\.\d+)'
+# Labelled values may use thousands separators (N = 1,204)
+_VALUE = r'[-−]?(?:\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?|\.\d+)'
+# Scientific notation as printed in papers: 1.2e-5, 1.2 × 10^-5, 1.2x10-5
+_EXPONENT = r'(?:[eE][-−]?\d+|\s*[×x*]\s*10\s*\^?\s*[-−]?\d+)?'
+
+# Label alternatives, more specific first (Cohen's d before d)
+_LABELS = (
+    r"Cohen['’]s d", r"Hedges['’] g", r"[Pp]artial η\s*[²2]", r"ηp\s*[²2]", r"η\s*[²2]\s*p", r"η\s*[²2]", r"ω\s*[²2]",
+    r"[Oo]dds ratio", r"[Hh]azard ratio", r"[Rr]isk ratio", r"OR", r"RR", r"HR", r"d", r"g",
+    r"[nN]", r"[pP]", r"rho", r"r", r"ρ", r"[Mm]ean", r"M", r"SD", r"sd", r"s\.d\.", r"[Ss]tandard deviation", r"t", r"F",
+    r"χ\s*[²2]", r"χ\^2", r"[Cc]hi-?squared?", r"X\s*[²2]"
+)
+
+_REGEX_TOKEN = re.compile(r"(\\.|\[[^\]]*\]|[^\\\[])([*?+]?)")
+
+def _reversed_regex(pattern: str) -> str:
+    """Regex for the reverse of what pattern matches; pattern holds only (quantified) characters, escapes and classes"""
+    return "".join(token + quantifier for token, quantifier in reversed(_REGEX_TOKEN.findall(pattern)))
+
+# All statistics are found in one pass over the reversed text. Reversed, each one starts at an
+# anchor character that is rare in prose: the operator of "t(56) = 2.45" or "p < .001", the ± of
+# "12.5 ± 3.1", the last letter of "95% CI" or "confidence interval". The pattern starts with that
+# character class, so the regex engine skips from anchor to anchor instead of trying every label at
+# every letter; the branches then read the label that precedes the anchor in the document. Values
+# and CI bounds follow the anchor and are read forward.
+STAT_PATTERN = re.compile(
+    r"[=<>≤≥±\-Il](?:"
+    r"(?<=[=<>≤≥])(?:(?<==)[<>])?\s*(?:\)(?P<args>[^()]{1,24})\(\s*)?"
+    rf"(?P<label>{'|'.join(_reversed_regex(label) for label in _LABELS)})(?![\w'’])"
+    r"|(?:(?<=±)|(?<=-)/\+)\s*(?P<pm_mean>(?:\d+\.(?!\d)|(?:\d+\.)?\d+)[-−]?)(?![\w'’])"
+    r"|(?P<ci>(?<=I)C|(?<=l)avretn[Ii] ecnedifno[Cc])(?![\w'’])"
+    r")"
+)
+_VALUE_AFTER = re.compile(rf"\s*({_VALUE}{_EXPONENT})")
+_NUM_AFTER = re.compile(rf"\s*({_NUM})")
+# Bounds after a CI label: "[1.2, 3.4]", "(1.2 to 3.4)" or unbracketed "1.2-3.4"
+_CI_BOUNDS = re.compile(
+    rf"\s*[:=,]?\s*(?:(?P<open>[\[(])\s*)?(?P<lower>{_NUM})\s*"
+    rf"(?:,|;|–|—|to|-(?=\s*[-−]?[\d.]))\s*(?P<upper>{_NUM})(?(open)\s*[\])])"
+)
+
+_LABEL_KINDS = {
+    "n": "sample_size", "N": "sample_size",
+    "p": "p_value", "P": "p_value",
+    "r": "correlation", "rho": "correlation", "ρ": "correlation",
+    "mean": "mean", "Mean": "mean", "M": "mean",
+    "SD": "sd", "sd": "sd", "s.d.": "sd", "standard deviation": "sd", "Standard deviation": "sd",
+    "t": "t", "F": "f"
+}
+
+_ARG_NUMBER = re.compile(rf'([nN]\s*=\s*)?({_NUM})')
+_CI_LEVEL = re.compile(r'(\d{2}(?:\.\d+)?)\s*%\s*$')
+_EXPONENT_SPLIT = re.compile(r'\s*[×x*]\s*10\s*\^?\s*')
+
+# Result keys per kind, in reporting order
+STAT_CATEGORIES = {
+    "sample_size": "sample_sizes",
+    "p_value": "p_values",
+    "correlation": "correlations",
+    "mean": "means",
+    "sd": "standard_deviations",
+    "ci": "confidence_intervals",
+    "t": "t_tests",
+    "f": "f_tests",
+    "chi_square": "chi_square_tests",
+    "effect_size": "effect_sizes"
+}
+
+class StatMatch(NamedTuple):
+    kind: str
+    value: float
+    start: int
+    end: int
+    raw: str
+    params: Dict[str, Any]
+
+def _number(raw: str) -> float:
+    try:
+        return float(raw)
+    except ValueError:
+        pass
+    raw = raw.replace("−", "-").replace(",", "")
+    parts = _EXPONENT_SPLIT.split(raw)
+    if len(parts) == 2:
+        return float(parts[0]) * 10 ** float(parts[1])
+    return float(raw)
+
+def _label_kind(label: str) -> str:
+    """Kind of the labels not listed in _LABEL_KINDS"""
+    if label[0] in "χXx" or label[:3].lower() == "chi":
+        return "chi_square"
+    return "effect_size"
+
+def _parse_args(args: str) -> Dict[str, float]:
+    """Degrees of freedom (and a sample size) from the parentheses after a label: (56), (2, 117), (3, N = 200)"""
+    params = {}
+    for sample, number in _ARG_NUMBER.findall(args):
+        value = _number(number)
+        if sample:
+            params["n"] = value
+        elif "df" not in params:
+            params["df"] = value
+        elif "df2" not in params:
+            params["df2"] = value
+    return params
+
+def _match_to_stat(match: re.Match, text: str, length: int) -> Optional[StatMatch]:
+    """Read the statistic anchored by a match in the reversed text"""
+    args, label, mean, ci = match.groups()
+    # In the document the match ends where the statistic starts, and starts right after its anchor
+    start = length - match.end()
+    after = length - match.start()
+    
+    if label is not None:
+        value = _VALUE_AFTER.match(text, after)
+        if value is None:
+            return None
+        op = text[after - 1]
+        if op == "=" and text[after - 2:after - 1] in ("<", ">"):
+            op = text[after - 2:after]
+        label = label[::-1]
+        kind = _LABEL_KINDS.get(label) or _label_kind(label)
+        number = _number(value.group(1))
+        if kind == "p_value":
+            if not 0 <= number <= 1:
+                return None
+            params = {"comparator": op}
+        elif op != "=":
+            return None
+        elif kind == "effect_size":
+            params = {"measure": " ".join(label.split())}
+        elif kind == "correlation" and not -1 <= number <= 1:
+            return None
+        else:
+            params = {}
+        if args:
+            params.update(_parse_args(args[::-1]))
+        end = value.end()
+        return StatMatch(kind, number, start, end, text[start:end], params)
+    
+    if ci is not None:
+        bounds = _CI_BOUNDS.match(text, after)
+        if bounds is None:
+            return None
+        params = {"lower": _number(bounds.group("lower")), "upper": _number(bounds.group("upper"))}
+        level = _CI_LEVEL.search(text, max(0, start - 12), start)
+        if level:
+            params["level"] = float(level.group(1)) / 100
+            start = level.start()
+        end = bounds.end()
+        return StatMatch("ci", params["lower"], start, end, text[start:end], params)
+    
+    # "12.5 ± 3.1": the spread around a mean
+    spread = _NUM_AFTER.match(text, after)
+    if spread is None:
+        return None
+    end = spread.end()
+    return StatMatch("sd", _number(spread.group(1)), start, end, text[start:end], {"mean": _number(mean[::-1])})
+
+def iter_statistics(text: str) -> Iterator[StatMatch]:
+    """Yield every reported statistic in text with its character offsets, in document order"""
+    stats = []
+    length = len(text)
+    for match in STAT_PATTERN.finditer(text[::-1]):
+        try:
+            stat = _match_to_stat(match, text, length)
+        except ValueError:
+            continue
+        if stat is not None:
+            stats.append(stat)
+    # The reversed text is scanned from the end of the document
+    return reversed(stats)
+
+def scan_statistics(text: str) -> List[StatMatch]:
+    """Find all statistics in text in document order"""
+    return list(iter_statistics(text))
+
+def statistics_arrays(matches: List[StatMatch]) -> Dict[str, Dict[str, np.ndarray]]:
+    """Column arrays per kind: value, start, end and each numeric parameter (NaN where absent)"""
+    grouped: Dict[str, List[StatMatch]] = {}
+    for match in matches:
+        grouped.setdefault(match.kind, []).append(match)
+    arrays = {}
+    for kind, items in grouped.items():
+        positions = np.array([(item.start, item.end) for item in items], dtype=np.int64)
+        columns = {
+            "value": np.array([item.value for item in items], dtype=np.float64),
+            "start": positions[:, 0],
+            "end": positions[:, 1]
+        }
+        names = {name for item in items for name, value in item.params.items() if isinstance(value, (int, float))}
+        for name in sorted(names):
+            columns[name] = np.array([item.params.get(name, np.nan) for item in items], dtype=np.float64)
+        arrays[kind] = columns
+    return arrays
+
+def statistics_to_json(matches: List[StatMatch]) -> Dict[str, Any]:
+    """Group statistics by category as JSON-ready lists"""
+    data: Dict[str, Any] = {category: [] for category in STAT_CATEGORIES.values()}
+    for match in matches:
+        data[STAT_CATEGORIES[match.kind]].append(
+            {"value": match.value, "text": match.raw, "start": match.start, "end": match.end, **match.params}
+        )
+    return data
\ No newline at end of file
@@ -0,0 +1,192 @@
+import io
+import re
+from collections import Counter
+from typing import Dict, Any, List, NamedTuple, Optional
+import pandas as pd
+
+CAPTION = re.compile(r'^\s*(table\s+[0-9IVX]+[a-z]?\b[.:]?.*)$', re.IGNORECASE)
+_WIDE_GAP = re.compile(r'\t+| {2,}')
+_PIPE_SEPARATOR = re.compile(r'^\s*\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?\s*$')
+_NUMBER = re.compile(r'^[-+−]?\(?\$?[0-9][0-9,]*(\.[0-9]+)?\)?%?$|^[-+−]?\.[0-9]+%?$')
+_NUMERIC_CLEANUP = re.compile(r'[,$%()]')
+
+MIN_ROWS = 3
+NUMERIC_SHARE = 0.8
+SAMPLE_ROWS = 200
+
+class DetectedTable(NamedTuple):
+    frame: pd.DataFrame
+    caption: Optional[str]
+    start: int
+    end: int
+    delimiter: str
+
+def _is_number(cell: str) -> bool:
+    return bool(_NUMBER.match(cell.strip()))
+
+def _split_pipe(line: str) -> Optional[List[str]]:
+    if line.count("|") < 2:
+        return None
+    cells = [cell.strip() for cell in line.strip().split("|")]
+    if cells and cells[0] == "":
+        cells = cells[1:]
+    if cells and cells[-1] == "":
+        cells = cells[:-1]
+    return cells if len(cells) >= 2 else None
+
+def _split_whitespace(line: str) -> Optional[List[str]]:
+    """Split on tabs or runs of spaces; rows of plain numbers may be single-space separated"""
+    stripped = line.strip()
+    cells = [cell for cell in _WIDE_GAP.split(stripped) if cell]
+    if len(cells) >= 2:
+        return cells
+    tokens = stripped.split()
+    if len(tokens) >= 2 and sum(_is_number(token) for token in tokens) >= len(tokens) - 1:
+        # A leading label followed by numbers, e.g. "Control 12.1 3.4 0.05"
+        return tokens if _is_number(tokens[0]) else [tokens[0]] + tokens[1:]
+    return None
+
+def _clean_numbers(values: pd.Series) -> pd.Series:
+    return values.str.replace(_NUMERIC_CLEANUP, "", regex=True).str.replace("−", "-", regex=False)
+
+def to_numeric_columns(frame: pd.DataFrame) -> pd.DataFrame:
+    """Convert columns that are mostly numbers to numeric dtypes (nullable Int64 for integers)"""
+    for column in frame.columns:
+        if pd.api.types.is_numeric_dtype(frame[column].dtype):
+            continue
+        values = frame[column].astype("string").str.strip()
+        present = values.notna() & (values != "")
+        if not present.any():
+            continue
+        # A sample rules out text columns before the whole column is cleaned and parsed
+        sample = _clean_numbers(values[present].iloc[:SAMPLE_ROWS])
+        if pd.to_numeric(sample, errors="coerce").notna().mean() < NUMERIC_SHARE:
+            continue
+        numbers = pd.to_numeric(values.where(present), errors="coerce")
+        if numbers[present].notna().mean() < NUMERIC_SHARE:
+            # Plain parsing fell short; strip separators, currency and percent signs and retry
+            numbers = pd.to_numeric(_clean_numbers(values).where(present), errors="coerce")
+            if numbers[present].notna().mean() < NUMERIC_SHARE:
+                continue
+        if (numbers.dropna() % 1 == 0).all():
+            frame[column] = numbers.astype("Int64")
+        else:
+            frame[column] = numbers.astype("float64")
+    return frame
+
+def _build_frame(rows: List[List[str]]) -> pd.DataFrame:
+    width = Counter(len(row) for row in rows).most_common(1)[0][0]
+    rows = [row[:width] + [""] * (width - len(row)) for row in rows]
+    header = rows[0]
+    body = rows[1:]
+    # The first row is a header when it is text above columns that hold numbers
+    header_is_text = sum(_is_number(cell) for cell in header) == 0
+    body_has_numbers = any(_is_number(cell) for row in body for cell in row)
+    if header_is_text and body_has_numbers and len(set(header)) == len(header):
+        columns = header
+    else:
+        columns = [f"column_{i + 1}" for i in range(width)]
+        body = rows
+    return to_numeric_columns(pd.DataFrame(body, columns=columns))
+
+def _find_caption(lines: List[str], index: int) -> Optional[str]:
+    """Look for a "Table N" caption just above the block"""
+    for line in reversed(lines[max(0, index - 3):index]):
+        match = CAPTION.match(line)
+        if match:
+            return match.group(1).strip()
+    return None
+
+def detect_tables(text: str) -> List[DetectedTable]:
+    """Find pipe- and whitespace-delimited tables in text in one pass over its lines"""
+    lines = text.split("\n")
+    offsets = []
+    position = 0
+    for line in lines:
+        offsets.append(position)
+        position += len(line) + 1
+    
+    tables = []
+    i = 0
+    while i < len(lines):
+        rejected_end = i + 1
+        for delimiter, split in (("pipe", _split_pipe), ("whitespace", _split_whitespace)):
+            rows = []
+            j = i
+            while j < len(lines):
+                if delimiter == "pipe" and _PIPE_SEPARATOR.match(lines[j]) and lines[j].strip():
+                    j += 1
+                    continue
+                cells = split(lines[j])
+                if cells is None or (rows and abs(len(cells) - len(rows[0])) > 1):
+                    break
+                rows.append(cells)
+                j += 1
+            if len(rows) >= MIN_ROWS:
+                frame = _build_frame(rows)
+                # Whitespace blocks need a numeric column so prose with double spaces is not a table
+                if delimiter == "pipe" or any(pd.api.types.is_numeric_dtype(dtype) for dtype in frame.dtypes):
+                    end = offsets[j - 1] + len(lines[j - 1])
+                    tables.append(DetectedTable(frame, _find_caption(lines, i), offsets[i], end, delimiter))
+                    i = j
+                    break
+                # Rows of a rejected block cannot start a table either
+                rejected_end = max(rejected_end, j)
+        else:
+            i = rejected_end
+    return tables
+
+def read_pdf_tables(path: str) -> Optional[List[DetectedTable]]:
+    """Extract tables from a PDF with tabula; None when tabula (or its Java runtime) is unavailable"""
+    try:
+        import tabula
+        frames = tabula.read_pdf(path, pages="all", multiple_tables=True, silent=True)
+    except Exception:
+        return None
+    tables = []
+    for frame in frames:
+        if frame.empty:
+            continue
+        frame = frame.copy()
+        frame.columns = [str(column) for column in frame.columns]
+        tables.append(DetectedTable(to_numeric_columns(frame.astype("string")), None, -1, -1, "pdf"))
+    return tables
+
+def table_to_json(table: DetectedTable, index: int) -> Dict[str, Any]:
+    """Column-oriented JSON: column names, dtypes and row values"""
+    frame = table.frame
+    result = {
+        "columns": [str(column) for column in frame.columns],
+        "dtypes": {str(column): str(dtype) for column, dtype in frame.dtypes.items()},
+        "rows": frame.astype(object).where(frame.notna(), None).values.tolist(),
+        "row_count": len(frame),
+        "delimiter": table.delimiter,
+        "index": index
+    }
+    if table.caption:
+        result["title"] = table.caption
+    if table.start >= 0:
+        result["start"] = table.start
+        result["end"] = table.end
+    return result
+
+def table_to_bytes(table: DetectedTable, format: str) -> bytes:
+    """Serialize a table as an Arrow IPC stream or Parquet file"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise Exception("pyarrow is required for Arrow and Parquet output")
+    
+    arrow_table = pa.Table.from_pandas(table.frame, preserve_index=False)
+    if table.caption:
+        arrow_table = arrow_table.replace_schema_metadata({**(arrow_table.schema.metadata or {}), b"caption": table.caption.encode()})
+    sink = io.BytesIO()
+    if format == "arrow":
+        with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
+            writer.write_table(arrow_table)
+    elif format == "parquet":
+        pq.write_table(arrow_table, sink)
+    else:
+        raise ValueError(f"Unsupported table format: {format}")
+    return sink.getvalue()
\ No newline at end of file
@@ -0,0 +1,53 @@
+import os
+from functools import lru_cache
+from typing import List, Optional
+
+# Rough characters-per-token ratio for English prose when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Load the tiktoken encoding once; None if tiktoken or its data is unavailable"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(os.getenv("TOKEN_ENCODING", "cl100k_base"))
+    except Exception:
+        return None
+
+def estimate_tokens(text: str) -> int:
+    """Count tokens with tiktoken when available, otherwise estimate from length"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to at most max_tokens tokens"""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+    return text[:max_tokens * CHARS_PER_TOKEN]
+
+def chunk_by_tokens(token_counts: List[int], budget: int, max_items: Optional[int] = None) -> List[range]:
+    """Group consecutive items into index ranges whose token totals stay within budget
+    
+    An item larger than the budget gets a chunk of its own.
+    """
+    chunks = []
+    start = 0
+    total = 0
+    for i, count in enumerate(token_counts):
+        full = max_items is not None and i - start >= max_items
+        if i > start and (total + count > budget or full):
+            chunks.append(range(start, i))
+            start = i
+            total = 0
+        total += count
+    if start < len(token_counts):
+        chunks.append(range(start, len(token_counts)))
+    return chunks
\ No newline at end of file
@@ -0,0 +1,230 @@
+import os
+import threading
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Tuple
+from .settings import env_int
+from .tokens import estimate_tokens, truncate_to_tokens
+
+# Chat formats add a few tokens per message for the role and separators
+MESSAGE_OVERHEAD_TOKENS = 4
+PROMPT_POLICIES = ("truncate", "reject")
+TRUNCATION_MARKER = "\n[... truncated to fit the prompt budget]"
+USAGE_HEADERS = ("X-LLM-Calls", "X-LLM-Cached-Calls", "X-LLM-Prompt-Tokens", "X-LLM-Completion-Tokens")
+
+class PromptTooLargeError(Exception):
+    """Raised when a prompt exceeds the agent's token budget and its policy is to reject"""
+
+def count_message_tokens(messages: List[Dict]) -> List[int]:
+    """Tokens of each chat message, including the per-message overhead"""
+    return [estimate_tokens(str(message.get("content", ""))) + MESSAGE_OVERHEAD_TOKENS for message in messages]
+
+def get_prompt_budget(agent_name: str, default_budget: Optional[int] = None,
+                      default_policy: Optional[str] = None) -> Tuple[int, str]:
+    """Resolve an agent's prompt budget and policy, honouring LLM_PROMPT_BUDGET_<AGENT> overrides
+    
+    A budget of 0 means prompts are never limited.
+    """
+    budget = env_int(f"LLM_PROMPT_BUDGET_{agent_name.upper()}", default_budget or env_int("LLM_PROMPT_BUDGET", 32000))
+    policy = (
+        os.getenv(f"LLM_PROMPT_POLICY_{agent_name.upper()}")
+        or default_policy
+        or os.getenv("LLM_PROMPT_POLICY", "truncate")
+    ).strip().lower()
+    if policy not in PROMPT_POLICIES:
+        raise ValueError(f"Unknown prompt policy '{policy}' for {agent_name}; expected one of {', '.join(PROMPT_POLICIES)}")
+    return budget, policy
+
+def fit_prompt(messages: List[Dict], budget: int, policy: str) -> Tuple[List[Dict], int, bool]:
+    """Apply a prompt budget; returns the messages to send, their token count and whether they were truncated
+    
+    Truncation shortens the largest message (normally the one carrying document text) from the end.
+    """
+    counts = count_message_tokens(messages)
+    total = sum(counts)
+    if not budget or total <= budget:
+        return messages, total, False
+    if policy == "reject":
+        raise PromptTooLargeError(f"Prompt of {total} tokens exceeds the budget of {budget} tokens")
+    
+    largest = max(range(len(messages)), key=lambda i: counts[i])
+    keep = counts[largest] - (total - budget) - MESSAGE_OVERHEAD_TOKENS - estimate_tokens(TRUNCATION_MARKER)
+    if keep <= 0:
+        # The other messages alone exceed the budget; cutting one message cannot fix that
+        raise PromptTooLargeError(f"Prompt of {total} tokens cannot be truncated to the budget of {budget} tokens")
+    messages = list(messages)
+    content = truncate_to_tokens(str(messages[largest]["content"]), keep) + TRUNCATION_MARKER
+    messages[largest] = {**messages[largest], "content": content}
+    return messages, sum(count_message_tokens(messages)), True
+
+def _empty_totals() -> Dict[str, Any]:
+    return {
+        "calls": 0,
+        "cached_calls": 0,
+        "coalesced_calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "total_tokens": 0,
+        "cached_tokens": 0,
+        "max_prompt_tokens": 0,
+        "truncated": 0,
+        "rejected": 0,
+        "llm_seconds": 0.0
+    }
+
+def _add_call(totals: Dict[str, Any], prompt_tokens: int, completion_tokens: int, cached: bool,
+              seconds: float, truncated: bool, coalesced: bool):
+    totals["calls"] += 1
+    if cached or coalesced:
+        # Served from cache or by another caller's identical request: no spend, but record what it would have cost
+        totals["cached_calls"] += 1
+        totals["coalesced_calls"] += int(coalesced)
+        totals["cached_tokens"] += prompt_tokens + completion_tokens
+    else:
+        totals["prompt_tokens"] += prompt_tokens
+        totals["completion_tokens"] += completion_tokens
+        totals["total_tokens"] += prompt_tokens + completion_tokens
+        totals["llm_seconds"] += seconds
+    totals["max_prompt_tokens"] = max(totals["max_prompt_tokens"], prompt_tokens)
+    totals["truncated"] += int(truncated)
+
+class RequestUsage:
+    """LLM usage of one API request, shared by every agent call made while serving it"""
+    
+    def __init__(self, user: Optional[str] = None):
+        self.user = user
+        self.totals = _empty_totals()
+        self.agents: Dict[str, Dict[str, Any]] = {}
+    
+    def get_headers(self) -> Dict[str, str]:
+        """Usage summary as response headers"""
+        values = (self.totals["calls"], self.totals["cached_calls"], self.totals["prompt_tokens"], self.totals["completion_tokens"])
+        return {name: str(value) for name, value in zip(USAGE_HEADERS, values)}
+
+_current_usage: ContextVar[Optional[RequestUsage]] = ContextVar("llm_request_usage", default=None)
+
+def get_request_usage() -> Optional[RequestUsage]:
+    """Usage of the API request being served, or None outside of one"""
+    return _current_usage.get()
+
+class UsageTracker:
+    """Aggregates LLM token usage per endpoint, agent and user"""
+    
+    def __init__(self, max_users: int = 1000):
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """Forget all recorded usage"""
+        with self._lock:
+            self.totals = _empty_totals()
+            self.endpoints: Dict[str, Dict[str, Any]] = {}
+            self.agents: Dict[str, Dict[str, Any]] = {}
+            self.users: Dict[str, Dict[str, Any]] = {}
+    
+    def _user_totals(self, user: Optional[str]) -> Dict[str, Any]:
+        user = user or "anonymous"
+        if user not in self.users and len(self.users) >= self.max_users:
+            # Bounded so arbitrary user headers cannot grow memory without limit
+            user = "other"
+        return self.users.setdefault(user, _empty_totals())
+    
+    def record_call(self, agent: str, prompt_tokens: int, completion_tokens: int, cached: bool = False,
+                    seconds: float = 0.0, truncated: bool = False, coalesced: bool = False):
+        """Record one LLM call against its agent and the current request and user
+        
+        Only calls that reached the LLM are spend; cached calls and calls coalesced into another
+        caller's identical in-flight request count as cached calls.
+        """
+        usage = get_request_usage()
+        with self._lock:
+            targets = [self.totals, self.agents.setdefault(agent, _empty_totals())]
+            if usage is not None:
+                targets += [usage.totals, usage.agents.setdefault(agent, _empty_totals()), self._user_totals(usage.user)]
+            for totals in targets:
+                _add_call(totals, prompt_tokens, completion_tokens, cached, seconds, truncated, coalesced)
+    
+    def record_rejection(self, agent: str, prompt_tokens: int):
+        """Record a prompt refused for exceeding its budget"""
+        usage = get_request_usage()
+        with self._lock:
+            targets = [self.totals, self.agents.setdefault(agent, _empty_totals())]
+            if usage is not None:
+                targets += [usage.totals, self._user_totals(usage.user)]
+            for totals in targets:
+                totals["rejected"] += 1
+                totals["max_prompt_tokens"] = max(totals["max_prompt_tokens"], prompt_tokens)
+    
+    def record_request(self, endpoint: str, usage: RequestUsage):
+        """Add a finished request's usage to its endpoint"""
+        with self._lock:
+            totals = self.endpoints.setdefault(endpoint, {"requests": 0, **_empty_totals()})
+            totals["requests"] += 1
+            for key, value in usage.totals.items():
+                if key == "max_prompt_tokens":
+                    totals[key] = max(totals[key], value)
+                else:
+                    totals[key] += value
+    
+    def get_stats(self, top: Optional[int] = None) -> Dict[str, Any]:
+        """Get usage totals, with endpoints, agents and users ordered by tokens spent"""
+        def ranked(groups: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+            names = sorted(groups, key=lambda name: -groups[name]["total_tokens"])
+            return {name: dict(groups[name], llm_seconds=round(groups[name]["llm_seconds"], 3)) for name in names[:top]}
+        
+        with self._lock:
+            return {
+                "totals": dict(self.totals, llm_seconds=round(self.totals["llm_seconds"], 3)),
+                "endpoints": ranked(self.endpoints),
+                "agents": ranked(self.agents),
+                "users": ranked(self.users)
+            }
+
+class UsageMiddleware:
+    """ASGI middleware that attributes LLM usage to each HTTP request and reports it in response headers
+    
+    Usage is added to the endpoint's totals once the response has been sent in full, so LLM calls
+    made while a streaming response is produced are counted too. Headers can only report the calls
+    made before the response started.
+    """
+    
+    def __init__(self, app, tracker: Optional[UsageTracker] = None, user_header: str = "x-user-id"):
+        self.app = app
+        self.tracker = tracker
+        self.user_header = user_header.lower().encode("latin-1")
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        headers = dict(scope.get("headers") or [])
+        user = headers.get(self.user_header)
+        usage = RequestUsage(user=user.decode("latin-1") if user else None)
+        
+        async def send_with_usage(message):
+            if message["type"] == "http.response.start" and usage.totals["calls"]:
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in usage.get_headers().items()
+                ]
+            await send(message)
+        
+        context_token = _current_usage.set(usage)
+        try:
+            await self.app(scope, receive, send_with_usage)
+        finally:
+            _current_usage.reset(context_token)
+            # The router records the matched route in the scope; templated paths keep endpoints bounded
+            route = scope.get("route")
+            endpoint = f"{scope['method']} {getattr(route, 'path', None) or scope['path']}"
+            (self.tracker or get_usage_tracker()).record_request(endpoint, usage)
+
+_usage_tracker: Optional[UsageTracker] = None
+
+def get_usage_tracker() -> UsageTracker:
+    """Get the process-wide LLM usage tracker"""
+    global _usage_tracker
+    if _usage_tracker is None:
+        _usage_tracker = UsageTracker(max_users=env_int("USAGE_MAX_USERS", 1000))
+    return _usage_tracker
\ No newline at end of file
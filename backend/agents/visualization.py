@@ -0,0 +1,277 @@
+import hashlib
+import json
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from .cache import TieredCache, get_disk_cache
+from .settings import env_int, env_float, env_bool
+from .stats import STAT_CATEGORIES
+from .tables import to_numeric_columns
+
+CHART_TYPES = ("bar", "line", "scatter", "histogram", "box")
+
+_figure_cache: Optional[TieredCache] = None
+
+def get_figure_cache() -> Optional[TieredCache]:
+    """Get the rendered figure cache, or None when figure caching is disabled"""
+    global _figure_cache
+    if _figure_cache is None and env_bool("FIGURE_CACHE_ENABLED", True):
+        _figure_cache = TieredCache(
+            "figures",
+            max_entries=env_int("FIGURE_CACHE_MAX_ENTRIES", 256),
+            disk=get_disk_cache("figure_cache.sqlite3"),
+            default_ttl=env_float("FIGURE_CACHE_TTL", 7 * 86400.0)
+        )
+    return _figure_cache
+
+def make_figure_cache_key(data: Any, chart_type: str, max_points: int) -> str:
+    """Content-addressed key for the figures of a dataset and chart type"""
+    payload = json.dumps({"data": data, "chart_type": chart_type, "max_points": max_points},
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling
+    
+    The first and last points are kept; from each bucket in between, the point forming the
+    largest triangle with the previously kept point and the next bucket's average is kept,
+    which preserves peaks and troughs that plain decimation drops.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    # Bucket i covers [edges[i], edges[i + 1]); the first and last points are buckets of their own
+    edges = (np.floor(np.arange(threshold - 1) * (n - 2) / (threshold - 2)) + 1).astype(np.int64)
+    edges[-1] = n - 1
+    x_sums = np.concatenate(([0.0], np.cumsum(x)))
+    y_sums = np.concatenate(([0.0], np.cumsum(y)))
+    
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, (edges[i + 2] if i + 2 < len(edges) else n)
+        count = next_end - next_start
+        average_x = (x_sums[next_end] - x_sums[next_start]) / count
+        average_y = (y_sums[next_end] - y_sums[next_start]) / count
+        areas = np.abs(
+            (x[previous] - average_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (average_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        indices[i + 1] = previous
+    return indices
+
+def bin_points(x: np.ndarray, y: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bin a large scatter into a grid of at most max_points occupied cells; returns centers and counts"""
+    bins = max(2, int(np.sqrt(max_points)))
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    x_index, y_index = np.nonzero(counts)
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    return x_centers[x_index], y_centers[y_index], counts[x_index, y_index]
+
+def table_frame(table: Any) -> Optional[pd.DataFrame]:
+    """DataFrame from an extracted table (column-oriented JSON, headers/rows, or a list of records)"""
+    try:
+        if isinstance(table, dict):
+            columns = table.get("columns") or table.get("headers")
+            rows = table.get("rows") or table.get("data")
+            if columns and isinstance(rows, list):
+                frame = pd.DataFrame(rows, columns=[str(column) for column in columns])
+            elif isinstance(rows, list) and rows and isinstance(rows[0], dict):
+                frame = pd.DataFrame(rows)
+            else:
+                return None
+        elif isinstance(table, list) and table and isinstance(table[0], dict):
+            frame = pd.DataFrame(table)
+        else:
+            return None
+    except (ValueError, TypeError):
+        return None
+    if frame.empty:
+        return None
+    return to_numeric_columns(frame)
+
+def statistics_frame(data: Dict[str, Any]) -> Optional[pd.DataFrame]:
+    """Long-form frame (category, value, position) from scanned statistics"""
+    records = []
+    for category in STAT_CATEGORIES.values():
+        for item in data.get(category) or []:
+            if isinstance(item, dict) and isinstance(item.get("value"), (int, float)):
+                records.append((category, float(item["value"]), item.get("start", len(records))))
+    if not records:
+        return None
+    return pd.DataFrame(records, columns=["category", "value", "position"])
+
+def _numeric_columns(frame: pd.DataFrame) -> List[str]:
+    return [column for column in frame.columns if pd.api.types.is_numeric_dtype(frame[column].dtype)]
+
+def _label_column(frame: pd.DataFrame, numeric: List[str]) -> Optional[str]:
+    return next((column for column in frame.columns if column not in numeric), None)
+
+def _values(series: pd.Series) -> np.ndarray:
+    return series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+def frame_figure(frame: pd.DataFrame, chart_type: str, title: Optional[str], max_points: int) -> Optional[Dict[str, Any]]:
+    """Build one Plotly figure from a frame; large series are downsampled to about max_points"""
+    numeric = _numeric_columns(frame)
+    if not numeric:
+        return None
+    label = _label_column(frame, numeric)
+    figure = go.Figure()
+    original = len(frame)
+    shown = original
+    method = None
+    
+    if chart_type == "line":
+        # The x axis is the label column, else the first numeric column, else the row number
+        if label is None and len(numeric) > 1:
+            x, series = _values(frame[numeric[0]]), numeric[1:]
+        else:
+            x, series = np.arange(original, dtype=np.float64), numeric
+        for column in series:
+            y = _values(frame[column])
+            valid = np.flatnonzero(~np.isnan(x) & ~np.isnan(y))
+            # LTTB walks the series in x order
+            valid = valid[np.argsort(x[valid], kind="stable")]
+            keep = valid[lttb(x[valid], y[valid], max_points)]
+            if len(keep) < len(valid):
+                method = "lttb"
+            shown = len(keep)
+            x_values = frame[label].iloc[keep].astype(str).tolist() if label is not None else x[keep]
+            figure.add_trace(go.Scatter(x=x_values, y=y[keep], mode="lines", name=str(column)))
+    elif chart_type == "scatter":
+        if len(numeric) >= 2:
+            x, y = _values(frame[numeric[0]]), _values(frame[numeric[1]])
+            x_title, y_title = numeric[0], numeric[1]
+        else:
+            x, y = np.arange(original, dtype=np.float64), _values(frame[numeric[0]])
+            x_title, y_title = "row", numeric[0]
+        valid = ~np.isnan(x) & ~np.isnan(y)
+        x, y = x[valid], y[valid]
+        if len(x) > max_points:
+            # Each marker is a grid cell, sized and colored by how many points fall in it
+            x, y, counts = bin_points(x, y, max_points)
+            method = "binned"
+            figure.add_trace(go.Scatter(
+                x=x, y=y, mode="markers", name="points",
+                marker={"size": 4 + 16 * np.sqrt(counts / counts.max()), "color": counts, "colorscale": "Viridis",
+                        "showscale": True, "colorbar": {"title": "count"}},
+                text=[f"{int(count)} points" for count in counts]
+            ))
+        else:
+            figure.add_trace(go.Scatter(x=x, y=y, mode="markers", name="points"))
+        shown = len(x)
+        figure.update_layout(xaxis_title=str(x_title), yaxis_title=str(y_title))
+    elif chart_type == "histogram":
+        # Bin counts are computed here so the payload does not grow with the data
+        for column in numeric:
+            values = _values(frame[column])
+            values = values[~np.isnan(values)]
+            if not len(values):
+                continue
+            counts, edges = np.histogram(values, bins="auto" if len(values) > 1 else 1)
+            if len(counts) > max_points:
+                counts, edges = np.histogram(values, bins=max_points)
+            figure.add_trace(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), name=str(column), opacity=0.75))
+            shown = len(counts)
+        method = "binned"
+        figure.update_layout(barmode="overlay")
+    elif chart_type == "box":
+        # Quartiles are precomputed; only five numbers per box are sent
+        for column in numeric:
+            values = _values(frame[column])
+            values = values[~np.isnan(values)]
+            if not len(values):
+                continue
+            q1, median, q3 = np.percentile(values, [25, 50, 75])
+            spread = 1.5 * (q3 - q1)
+            inside = values[(values >= q1 - spread) & (values <= q3 + spread)]
+            figure.add_trace(go.Box(
+                name=str(column), q1=[q1], median=[median], q3=[q3],
+                lowerfence=[inside.min()], upperfence=[inside.max()], mean=[values.mean()]
+            ))
+        shown = len(numeric) * 5
+        method = "quartiles"
+    else:
+        labels = frame[label].astype(str) if label is not None else pd.Series(np.arange(original).astype(str))
+        if original > max_points:
+            # Too many bars to read: keep the largest by the first numeric column
+            top = frame[numeric[0]].astype("float64").fillna(-np.inf).to_numpy().argsort()[::-1][:max_points]
+            top.sort()
+            frame, labels = frame.iloc[top], labels.iloc[top]
+            method = "top"
+        for column in numeric:
+            figure.add_trace(go.Bar(x=labels.tolist(), y=_values(frame[column]), name=str(column)))
+        shown = len(frame)
+    
+    figure.update_layout(title=title, template="plotly_white")
+    return {
+        "title": title,
+        "figure": json.loads(figure.to_json()),
+        "points": int(shown),
+        "original_points": int(original),
+        "downsampling": method
+    }
+
+def statistics_figure(frame: pd.DataFrame, chart_type: str, max_points: int) -> Optional[Dict[str, Any]]:
+    """Figures for scanned statistics: counts per category, or the distribution of each category's values"""
+    if chart_type == "bar":
+        counts = frame.groupby("category", sort=False).size().reset_index(name="count")
+        return frame_figure(counts, "bar", "Reported statistics", max_points)
+    wide = frame.pivot_table(index="position", columns="category", values="value", aggfunc="first").reset_index(drop=True)
+    if chart_type in ("histogram", "box"):
+        return frame_figure(wide, chart_type, "Reported statistic values", max_points)
+    # Line and scatter plot values in document order
+    wide = frame.sort_values("position")[["position", "value"]]
+    return frame_figure(wide, chart_type, "Statistic values by position", max_points)
+
+def _table_figures(tables: List[Any], chart_type: str, max_points: int) -> List[Dict[str, Any]]:
+    figures = []
+    for i, table in enumerate(tables):
+        frame = table_frame(table)
+        if frame is not None:
+            title = table.get("title") or table.get("caption") if isinstance(table, dict) else None
+            figure = frame_figure(frame, chart_type, title or f"Table {i + 1}", max_points)
+            if figure:
+                figures.append(figure)
+    return figures
+
+def _statistics_figures(data: Dict[str, Any], chart_type: str, max_points: int) -> List[Dict[str, Any]]:
+    frame = statistics_frame(data)
+    figure = statistics_figure(frame, chart_type, max_points) if frame is not None else None
+    return [figure] if figure else []
+
+def build_figures(data: Any, chart_type: str, max_points: int) -> Tuple[str, List[Dict[str, Any]]]:
+    """Figures for extracted data; returns the data source and a figure per plottable table"""
+    if chart_type not in CHART_TYPES:
+        raise ValueError(f"Unsupported chart type: {chart_type}. Use one of: {', '.join(CHART_TYPES)}")
+    if isinstance(data, dict) and isinstance(data.get("statistics"), dict):
+        # Output of the "all" extraction nests each result; draw its tables and its statistics
+        tables = data.get("tables")
+        if isinstance(tables, dict):
+            tables = tables.get("tables")
+        figures = _table_figures(tables, chart_type, max_points) if isinstance(tables, list) else []
+        statistics = data["statistics"].get("data", data["statistics"])
+        figures += _statistics_figures(statistics, chart_type, max_points)
+        return "all", figures
+    if isinstance(data, dict) and isinstance(data.get("tables"), list):
+        return "tables", _table_figures(data["tables"], chart_type, max_points)
+    if isinstance(data, dict) and any(category in data for category in STAT_CATEGORIES.values()):
+        return "statistics", _statistics_figures(data, chart_type, max_points)
+    
+    frame = table_frame(data)
+    if frame is None and isinstance(data, dict):
+        # A dict of equal-length lists is a table by columns
+        lists = {key: value for key, value in data.items() if isinstance(value, list) and value and not isinstance(value[0], (dict, list))}
+        lengths = {len(value) for value in lists.values()}
+        if lists and len(lengths) == 1:
+            frame = to_numeric_columns(pd.DataFrame(lists).astype("string"))
+    figure = frame_figure(frame, chart_type, None, max_points) if frame is not None else None
+    return "generic", [figure] if figure else []
\ No newline at end of file
@@ -0,0 +1,191 @@
+import bisect
+import json
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+# Keys that identify an extracted item (a table, figure, reference, keyword) across windows
+ITEM_TITLE_KEYS = ("title", "caption", "name", "label", "keyword")
+# Scores each window gives an item on its own; the highest is kept
+ITEM_SCORE_KEYS = ("score",)
+# Keys that must agree for two items with overlapping document offsets to be the same item
+ITEM_IDENTITY_KEYS = ("kind", "type", "delimiter")
+# Lists that describe an item's layout rather than hold its content; the first part's are kept
+ITEM_HEADER_KEYS = ("columns", "headers")
+
+def _fingerprint(value: Any) -> str:
+    """Case- and whitespace-insensitive identity of a JSON value"""
+    return " ".join(json.dumps(value, sort_keys=True, default=str).lower().split())
+
+def _item_span(item: Any) -> Optional[Tuple[int, int]]:
+    if isinstance(item, dict) and isinstance(item.get("start"), int) and isinstance(item.get("end"), int):
+        return item["start"], item["end"]
+    return None
+
+def _compatible(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """Whether two overlapping items can be parts of one (a table continued in the next window)"""
+    for key in ITEM_IDENTITY_KEYS:
+        if key in a and key in b and a[key] != b[key]:
+            return False
+    if isinstance(a.get("columns"), list) and isinstance(b.get("columns"), list):
+        return len(a["columns"]) == len(b["columns"])
+    return True
+
+def _join_overlapping(first: List[Any], second: List[Any]) -> List[Any]:
+    """Concatenate two parts of a list, dropping the run that ends the first and starts the second"""
+    first_prints = [_fingerprint(value) for value in first]
+    second_prints = [_fingerprint(value) for value in second]
+    for shared in range(min(len(first), len(second)), 0, -1):
+        if first_prints[-shared:] == second_prints[:shared]:
+            return first + second[shared:]
+    return first + second
+
+def _item_title(item: Any) -> Optional[str]:
+    if isinstance(item, dict):
+        for key in ITEM_TITLE_KEYS:
+            if isinstance(item.get(key), str) and item[key].strip():
+                return " ".join(item[key].lower().split())
+    return None
+
+class WindowMerger:
+    """Accumulates per-window extraction results into one document-level result
+    
+    Lists are concatenated without the duplicates that overlaps produce. Items that are parts of
+    one (a table split across windows) are merged, matched by title or by overlapping document
+    offsets. Counts are recomputed.
+    """
+    
+    def __init__(self):
+        self.data: Dict[str, Any] = {}
+        # Fingerprints of the items already in each merged list, keyed by the list's id
+        self._seen: Dict[int, Set[str]] = {}
+        self._titles: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        # Items with document offsets in each merged list, sorted by start, and the longest span
+        self._spans: Dict[int, List[Tuple[int, int, Dict[str, Any]]]] = {}
+        self._longest: Dict[int, int] = {}
+    
+    def add(self, data: Dict[str, Any]):
+        """Merge one window's extracted data"""
+        self._merge_dict(self.data, data)
+    
+    def result(self) -> Dict[str, Any]:
+        for key in list(self.data):
+            if key.endswith("_count"):
+                items = self.data.get(key[:-len("_count")] + "s")
+                if isinstance(items, list):
+                    self.data[key] = len(items)
+        return self.data
+    
+    def _merge_dict(self, target: Dict[str, Any], data: Dict[str, Any]):
+        for key, value in data.items():
+            if isinstance(value, list):
+                if not isinstance(target.get(key), list):
+                    target[key] = []
+                self._merge_list(target[key], value)
+            elif isinstance(value, dict):
+                if not isinstance(target.get(key), dict):
+                    target[key] = {}
+                self._merge_dict(target[key], value)
+            elif key not in target:
+                target[key] = value
+    
+    def _merge_list(self, target: List[Any], items: List[Any]):
+        titles = self._titles.setdefault(id(target), {})
+        for item in items:
+            title = _item_title(item)
+            if title and title in titles:
+                self._merge_item(target, titles[title], item)
+                continue
+            existing = self._find_overlapping(target, item)
+            if existing is not None:
+                self._merge_item(target, existing, item)
+                if title:
+                    titles.setdefault(title, existing)
+            elif title:
+                titles[title] = item
+                target.append(item)
+                self._add_span(target, item)
+            elif self._extend_unique(target, [item]):
+                self._add_span(target, item)
+    
+    def _add_span(self, target: List[Any], item: Any):
+        span = _item_span(item)
+        if span is not None:
+            spans = self._spans.setdefault(id(target), [])
+            bisect.insort(spans, (span[0], span[1], item), key=lambda entry: entry[0])
+            self._longest[id(target)] = max(self._longest.get(id(target), 0), span[1] - span[0])
+    
+    def _find_overlapping(self, target: List[Any], item: Any) -> Optional[Dict[str, Any]]:
+        """An item already merged whose [start, end) overlaps this one's and that it can continue"""
+        span = _item_span(item)
+        spans = self._spans.get(id(target))
+        if span is None or not spans:
+            return None
+        start, end = span
+        # Only items starting less than the longest span before this one can reach into it
+        low = bisect.bisect_left(spans, start - self._longest[id(target)], key=lambda entry: entry[0])
+        high = bisect.bisect_left(spans, max(end, start + 1), key=lambda entry: entry[0])
+        for other_start, other_end, other in spans[low:high]:
+            if other_start < max(end, start + 1) and start < max(other_end, other_start + 1) and _compatible(other, item):
+                return other
+        return None
+    
+    def _merge_item(self, target: List[Any], existing: Dict[str, Any], item: Dict[str, Any]):
+        """Merge another part of an item (e.g. the rest of a table) into the one already kept
+        
+        The part that starts first (or, from the same start, runs further) is the more complete
+        one and its values win. Parts starting at different offsets continue each other, so list
+        values such as table rows are joined in document order; from the same start, the longer
+        part already holds everything the shorter one does.
+        """
+        span, other = _item_span(existing), _item_span(item)
+        item_first = span is not None and other is not None and (other[0], -other[1]) < (span[0], -span[1])
+        if span is None or other is None:
+            for key, value in item.items():
+                if key not in existing or existing[key] in (None, "", [], {}):
+                    self._seen.pop(id(existing.get(key)), None)
+                    existing[key] = value
+                elif key in ITEM_SCORE_KEYS and isinstance(value, (int, float)) and isinstance(existing[key], (int, float)):
+                    existing[key] = max(existing[key], value)
+                elif isinstance(existing[key], list) and isinstance(value, list):
+                    self._extend_unique(existing[key], value)
+        else:
+            for key, value in item.items():
+                current = existing.get(key)
+                if key in ITEM_HEADER_KEYS and current:
+                    if item_first:
+                        existing[key] = value
+                elif isinstance(current, list) and isinstance(value, list) and span[0] != other[0]:
+                    joined = _join_overlapping(value, current) if item_first else _join_overlapping(current, value)
+                    self._seen.pop(id(current), None)
+                    current[:] = joined
+                elif key not in existing or current in (None, "", [], {}) or (item_first and value not in (None, "", [], {})):
+                    existing[key] = value
+            existing["start"], existing["end"] = min(span[0], other[0]), max(span[1], other[1])
+            spans = self._spans[id(target)]
+            spans[:] = [entry for entry in spans if entry[2] is not existing]
+            self._add_span(target, existing)
+        # Counts of the item's own lists, e.g. a table's row_count
+        for key in existing:
+            if key.endswith("_count") and isinstance(existing.get(key[:-len("_count")] + "s"), list):
+                existing[key] = len(existing[key[:-len("_count")] + "s"])
+    
+    def _extend_unique(self, target: List[Any], items: List[Any]) -> int:
+        """Append items not already present; overlapping windows repeat the rows they share"""
+        seen = self._seen.get(id(target))
+        if seen is None:
+            seen = self._seen[id(target)] = {_fingerprint(existing) for existing in target}
+        added = 0
+        for item in items:
+            fingerprint = _fingerprint(item)
+            if fingerprint not in seen:
+                seen.add(fingerprint)
+                target.append(item)
+                added += 1
+        return added
+
+def merge_window_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-window extraction results in document order"""
+    merger = WindowMerger()
+    for result in sorted(results, key=lambda result: result["window"]):
+        if isinstance(result.get("data"), dict):
+            merger.add(result["data"])
+    return merger.result()
\ No newline at end of file
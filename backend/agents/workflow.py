@@ -0,0 +1,120 @@
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+class WorkflowStep:
+    """A named unit of work that receives the outputs of its dependencies as keyword arguments"""
+    
+    def __init__(self, name: str, func: Callable[..., Awaitable[Any]], deps: List[str],
+                 required: bool = True, timeout: Optional[float] = None):
+        self.name = name
+        self.func = func
+        self.deps = deps
+        self.required = required
+        self.timeout = timeout
+
+class WorkflowRun:
+    """Outcome of one workflow execution: results, errors, skipped steps and timings"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, Exception] = {}
+        self.skipped: List[str] = []
+        self.timings: Dict[str, float] = {}
+        self.total_time = 0.0
+        self._required_errors: List[str] = []
+    
+    @property
+    def ok(self) -> bool:
+        return not self._required_errors
+    
+    def get(self, step: str, default: Any = None) -> Any:
+        return self.results.get(step, default)
+    
+    def raise_for_errors(self):
+        """Re-raise the first failure of a required step"""
+        if self._required_errors:
+            raise self.errors[self._required_errors[0]]
+    
+    def get_report(self) -> Dict[str, Any]:
+        """Get per-step timings and failures in a JSON-friendly form"""
+        return {
+            "total_time": round(self.total_time, 4),
+            "steps": {name: round(seconds, 4) for name, seconds in self.timings.items()},
+            "errors": {name: str(error) for name, error in self.errors.items()},
+            "skipped": self.skipped
+        }
+
+class Workflow:
+    """Small DAG executor: each step starts as soon as its dependencies finish
+    
+    Steps must be added after their dependencies, which also rules out cycles. A failed
+    step's dependents are skipped; other branches keep running so partial results survive.
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.steps: Dict[str, WorkflowStep] = {}
+    
+    def add_step(self, name: str, func: Callable[..., Awaitable[Any]], deps: Optional[List[str]] = None,
+                 required: bool = True, timeout: Optional[float] = None) -> "Workflow":
+        """Add a step; func is called with one keyword argument per dependency"""
+        if name in self.steps:
+            raise ValueError(f"Duplicate workflow step: {name}")
+        deps = list(deps or [])
+        unknown = [dep for dep in deps if dep not in self.steps]
+        if unknown:
+            raise ValueError(f"Step {name} depends on unknown steps: {', '.join(unknown)}")
+        self.steps[name] = WorkflowStep(name, func, deps, required, timeout)
+        return self
+    
+    async def run(self, on_step_complete: Optional[Callable[[str, Any], None]] = None) -> WorkflowRun:
+        """Execute all steps, running independent ones concurrently
+        
+        on_step_complete is called with each successful step's name and result as soon as it finishes.
+        """
+        run = WorkflowRun(self.name)
+        tasks: Dict[str, asyncio.Task] = {}
+        started = time.perf_counter()
+        
+        async def execute(step: WorkflowStep) -> bool:
+            if step.deps:
+                await asyncio.gather(*[tasks[dep] for dep in step.deps])
+            if any(dep in run.errors or dep in run.skipped for dep in step.deps):
+                run.skipped.append(step.name)
+                if step.required:
+                    run.errors[step.name] = Exception(f"Step {step.name} skipped because a dependency failed")
+                    run._required_errors.append(step.name)
+                return False
+            
+            step_started = time.perf_counter()
+            try:
+                result = step.func(**{dep: run.results[dep] for dep in step.deps})
+                if step.timeout is not None:
+                    result = asyncio.wait_for(result, step.timeout)
+                run.results[step.name] = await result
+                if on_step_complete is not None:
+                    on_step_complete(step.name, run.results[step.name])
+                return True
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    e = Exception(f"Step {step.name} timed out after {step.timeout}s")
+                run.errors[step.name] = e
+                if step.required:
+                    run._required_errors.append(step.name)
+                return False
+            finally:
+                run.timings[step.name] = time.perf_counter() - step_started
+        
+        for step in self.steps.values():
+            tasks[step.name] = asyncio.create_task(execute(step))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            run.total_time = time.perf_counter() - started
+        return run
\ No newline at end of file
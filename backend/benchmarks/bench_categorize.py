@@ -0,0 +1,85 @@
+"""Benchmark chunked paper categorization against a stub LLM.
+
+The stub answers after a fixed latency plus a per-token cost, labeling every paper it is given,
+so the numbers reflect chunking and concurrency rather than model speed.
+
+Usage: python benchmarks/bench_categorize.py [--sizes 100 1000 10000] [--latency 0.2] [--llm-only]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ALCHEMYST_API_KEY", "benchmark")
+os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="bench_categorize_")
+
+from agents.literature_agent import LiteratureAgent
+from agents.tokens import estimate_tokens
+
+WORDS = ("we propose method results systematic review meta-analysis survey questionnaire case study "
+         "randomized experiment theory framework participants data evidence outcomes analysis model").split()
+
+def build_papers(count: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"bench-{i}",
+            "title": " ".join(rng.choices(WORDS, k=rng.randint(6, 14))),
+            "abstract": " ".join(rng.choices(WORDS, k=rng.randint(120, 250))),
+            "venue": "Journal of Benchmarks"
+        }
+        for i in range(count)
+    ]
+
+def stub_llm(agent: LiteratureAgent, latency: float, per_token: float, stats: dict):
+    async def call_llm(messages, temperature=0.7, use_cache=True):
+        prompt = messages[-1]["content"]
+        tokens = estimate_tokens(prompt)
+        stats["calls"] += 1
+        stats["max_prompt_tokens"] = max(stats["max_prompt_tokens"], tokens)
+        await asyncio.sleep(latency + tokens * per_token)
+        indices = [int(idx) for idx in re.findall(r"^\s*\[(\d+)\]$", prompt, flags=re.MULTILINE)]
+        categories = agent.categories
+        return json.dumps({
+            category: [idx for idx in indices if idx % len(categories) == n]
+            for n, category in enumerate(categories)
+        })
+    agent._call_llm = call_llm
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--latency", type=float, default=0.2, help="fixed seconds per LLM call")
+    parser.add_argument("--per-token", type=float, default=0.00002, help="extra seconds per prompt token")
+    parser.add_argument("--llm-only", action="store_true", help="send every paper to the LLM")
+    args = parser.parse_args()
+
+    agent = LiteratureAgent()
+    if args.llm_only:
+        agent.classifier.min_confidence = 1.01
+    print(f"chunk budget: {agent.categorize_chunk_tokens} tokens / {agent.categorize_chunk_papers} papers, "
+          f"concurrency: {agent.categorize_concurrency}")
+
+    for size in args.sizes:
+        papers = build_papers(size)
+        stats = {"calls": 0, "max_prompt_tokens": 0}
+        stub_llm(agent, args.latency, args.per_token, stats)
+        agent.classifier.learn = lambda papers, labels: None
+
+        start = time.perf_counter()
+        categorized = asyncio.run(agent.categorize_papers(papers))
+        elapsed = time.perf_counter() - start
+
+        placed = sum(len(group) for group in categorized.values())
+        print(f"{size:6d} papers: {elapsed:7.2f} s  {size / elapsed:8.1f} papers/s  "
+              f"{stats['calls']:4d} LLM calls  max prompt {stats['max_prompt_tokens']} tokens  "
+              f"{placed} categorized")
+
+if __name__ == "__main__":
+    main()
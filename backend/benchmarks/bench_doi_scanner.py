@@ -0,0 +1,84 @@
+"""Benchmark the single-pass DOI scanner on multi-megabyte reference sections.
+
+Usage: python benchmarks/bench_doi_scanner.py [--size-mb 8] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.doi import find_dois
+
+REFERENCE_TEMPLATES = [
+    "{author} ({year}). {title}. Journal of Research, 12(3), 45-67. https://doi.org/10.{prefix}/{suffix}",
+    "{author}. {title}. Proc. Conf. {year}; doi:10.{prefix}/{suffix}.",
+    "[{n}] {author}, \"{title},\" IEEE Trans., vol. 4, pp. 1-9, {year}, (doi: 10.{prefix}/{suffix})",
+    "{author} {year}. {title}. Available at https://example.org/article?id={n} (accessed 2020).",
+]
+
+def build_corpus(size_mb: float, seed: int = 7) -> str:
+    """Build a synthetic reference section of roughly size_mb megabytes"""
+    rng = random.Random(seed)
+    target = int(size_mb * 1024 * 1024)
+    lines = []
+    length = 0
+    n = 0
+    while length < target:
+        n += 1
+        line = rng.choice(REFERENCE_TEMPLATES).format(
+            n=n,
+            author=f"Author{rng.randint(1, 5000)}, A.",
+            year=rng.randint(1980, 2024),
+            title=" ".join(f"word{rng.randint(1, 999)}" for _ in range(rng.randint(5, 12))),
+            prefix=rng.randint(1000, 99999),
+            suffix=f"j.{rng.choice(['ABC', 'xyz', 'Nat'])}.{rng.randint(1, 10**6)}"
+        )
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+def legacy_extract(text: str) -> list:
+    """The previous per-call approach: three uncompiled patterns, first match only, run per line"""
+    results = []
+    for line in text.split("\n"):
+        for pattern in [r'doi\.org/(.+)', r'doi:(.+)', r'10\.\d{4,}/[-._;()/:\w]+']:
+            match = re.search(pattern, line)
+            if match:
+                results.append(match.group(1) if match.groups() else match.group(0))
+                break
+    return results
+
+def timed(func, *args, repeat: int = 3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=float, default=8.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = build_corpus(args.size_mb)
+    mb = len(text) / (1024 * 1024)
+    print(f"corpus: {mb:.1f} MB, {text.count(chr(10)) + 1} lines")
+
+    scan_time, matches = timed(find_dois, text, repeat=args.repeat)
+    print(f"find_dois (unique):     {scan_time * 1000:8.1f} ms  {mb / scan_time:7.1f} MB/s  {len(matches)} DOIs")
+
+    all_time, all_matches = timed(lambda t: find_dois(t, unique=False), text, repeat=args.repeat)
+    print(f"find_dois (all):        {all_time * 1000:8.1f} ms  {mb / all_time:7.1f} MB/s  {len(all_matches)} matches")
+
+    legacy_time, legacy = timed(legacy_extract, text, repeat=args.repeat)
+    print(f"legacy per-line search: {legacy_time * 1000:8.1f} ms  {mb / legacy_time:7.1f} MB/s  {len(legacy)} raw matches")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple
 import uvicorn
 import os
+import json
+import asyncio
+import tempfile
 from dotenv import load_dotenv
 
 # Import our agents
@@ -13,6 +17,17 @@ from agents.literature_agent import LiteratureAgent
 from agents.collaboration_agent import CollaborationAgent
 from agents.data_extraction_agent import DataExtractionAgent
 from agents.proposal_agent import ProposalAgent
+from agents.concurrency import LLMOverloadedError, get_global_limiter
+from agents.llm_registry import get_llm_registry
+from agents.llm_cache import get_llm_cache
+from agents.single_flight import get_single_flight_stats
+from agents.usage import USAGE_HEADERS, PromptTooLargeError, UsageMiddleware, get_usage_tracker
+from agents.crossref_client import get_crossref_client
+from agents.window_merge import merge_window_results
+from agents.pdf_pages import shutdown_pdf_executor
+from agents.document import normalize_text
+from agents.tables import detect_tables, table_to_json, table_to_bytes
+from agents.visualization import get_figure_cache
 
 load_dotenv()
 
@@ -29,7 +44,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=list(USAGE_HEADERS),
 )
+# Attributes LLM token usage to each request's endpoint and user (USAGE_USER_HEADER, default X-User-Id)
+app.add_middleware(UsageMiddleware, user_header=os.getenv("USAGE_USER_HEADER", "X-User-Id"))
 
 # Initialize agents
 citation_agent = CitationAgent()
@@ -38,14 +56,135 @@ collaboration_agent = CollaborationAgent()
 data_extraction_agent = DataExtractionAgent()
 proposal_agent = ProposalAgent()
 
+agents = {
+    "citation": citation_agent,
+    "literature": literature_agent,
+    "collaboration": collaboration_agent,
+    "data_extraction": data_extraction_agent,
+    "proposal": proposal_agent
+}
+
+MAX_CITATION_BATCH_ITEMS = 500
+MAX_KEYWORD_BATCH_DOCUMENTS = 1000
+MAX_REFERENCE_BATCH_DOCUMENTS = 1000
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+PDF_MAX_UPLOAD_BYTES = int(os.getenv("PDF_MAX_UPLOAD_MB", "50")) * 1024 * 1024
+PDF_UPLOAD_PATHS = ("/api/data/extract/pdf", "/api/data/extract/pdf/stream")
+# Room for the multipart boundaries, headers and form fields around the file
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+TABLE_MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+class UploadLimitMiddleware:
+    """ASGI middleware that stops oversized uploads before the form parser spools them
+    
+    A declared Content-Length over the limit is refused up front; otherwise the body is counted as
+    it streams in and the request fails with 413 as soon as it passes the limit.
+    """
+    
+    def __init__(self, app, paths: Tuple[str, ...], max_bytes: int):
+        self.app = app
+        self.paths = set(paths)
+        self.max_bytes = max_bytes
+    
+    def _too_large(self) -> HTTPException:
+        return HTTPException(status_code=413, detail=f"PDF exceeds {PDF_MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        
+        declared = dict(scope.get("headers") or []).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            error = self._too_large()
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+        
+        received = 0
+        
+        async def receive_limited():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI passes HTTPExceptions raised while reading the body through to its handlers
+                    raise self._too_large()
+            return message
+        
+        await self.app(scope, receive_limited, send)
+
+app.add_middleware(UploadLimitMiddleware, paths=PDF_UPLOAD_PATHS, max_bytes=PDF_MAX_UPLOAD_BYTES + UPLOAD_FORM_OVERHEAD)
+
+def _error_status(error: Exception) -> int:
+    """Map agent errors to HTTP status codes, looking through wrapped exceptions"""
+    while error is not None:
+        if isinstance(error, LLMOverloadedError):
+            return 503
+        if isinstance(error, PromptTooLargeError):
+            return 413
+        error = error.__cause__ or error.__context__
+    return 500
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _sse_stream(request: Request, events: AsyncIterator[Tuple[str, Dict[str, Any]]]) -> StreamingResponse:
+    """Forward (event, data) pairs as server-sent events, stopping when the client disconnects"""
+    async def event_stream():
+        try:
+            async for event, data in events:
+                if await request.is_disconnected():
+                    break
+                yield _sse_event(event, data)
+        except Exception as e:
+            yield _sse_event("error", {"status": _error_status(e), "detail": str(e)})
+        finally:
+            # Cancels the upstream work if we stopped early
+            await events.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _sse_response(request: Request, chunks: AsyncIterator[str]) -> StreamingResponse:
+    """Forward text chunks as token events followed by a done event with the full text"""
+    async def events():
+        text = []
+        try:
+            async for chunk in chunks:
+                text.append(chunk)
+                yield "token", {"text": chunk}
+            yield "done", {"text": "".join(text)}
+        finally:
+            await chunks.aclose()
+    
+    return _sse_stream(request, events())
+
 # Pydantic models
 class CitationRequest(BaseModel):
     paper_url: str
     citation_style: str = "apa"
 
+class CitationBatchRequest(BaseModel):
+    items: List[str]
+    citation_style: str = "apa"
+
 class LiteratureRequest(BaseModel):
     topic: str
-    max_results: int = 10
+    max_results: int = Field(10, ge=1)
+    offset: int = Field(0, ge=0)
+
+class SimilarPapersRequest(BaseModel):
+    query: str
+    top_k: int = 10
 
 class CollaborationRequest(BaseModel):
     paper_id: str
@@ -55,6 +194,27 @@ class CollaborationRequest(BaseModel):
 class DataExtractionRequest(BaseModel):
     file_content: str
     extraction_type: str = "tables"
+    windowed: bool = False
+
+class TableRequest(BaseModel):
+    file_content: str
+    format: str = "json"
+    table_index: int = 0
+
+class KeywordsRequest(BaseModel):
+    documents: List[str]
+    top_k: Optional[int] = None
+
+class ReferencesRequest(BaseModel):
+    documents: List[str]
+    enrich: Optional[bool] = None
+
+class VisualizationRequest(BaseModel):
+    data: Optional[Dict[str, Any]] = None
+    file_content: Optional[str] = None
+    extraction_type: str = "tables"
+    chart_type: str = "bar"
+    max_points: Optional[int] = None
 
 class ProposalRequest(BaseModel):
     research_topic: str
@@ -62,6 +222,17 @@ class ProposalRequest(BaseModel):
     methodology: str
     expected_outcomes: str
 
+class ProposalImprovementRequest(BaseModel):
+    proposal_text: str
+    feedback: str
+
+@app.on_event("shutdown")
+async def shutdown():
+    await get_llm_registry().aclose()
+    await get_crossref_client().aclose()
+    shutdown_pdf_executor()
+    data_extraction_agent.keyword_extractor.flush()
+
 @app.get("/")
 async def root():
     return {"message": "Agentic Research Assistant Suite API"}
@@ -70,6 +241,36 @@ async def root():
 async def health_check():
     return {"status": "healthy", "agents": ["citation", "literature", "collaboration", "data_extraction", "proposal"]}
 
+@app.get("/api/llm/concurrency")
+async def get_llm_concurrency():
+    return {
+        "global": get_global_limiter().get_stats(),
+        "agents": {name: agent.get_llm_stats()["limiter"] for name, agent in agents.items()}
+    }
+
+@app.get("/api/llm/pool")
+async def get_llm_pool():
+    return {"clients": get_llm_registry().get_stats()}
+
+@app.get("/api/llm/cache")
+async def get_llm_cache_stats():
+    cache = get_llm_cache()
+    return {
+        "cache": cache.get_stats() if cache else None,
+        "agents": {name: agent.get_llm_stats()["cache"] for name, agent in agents.items()}
+    }
+
+@app.get("/api/llm/usage")
+async def get_llm_usage(top: Optional[int] = None):
+    return {
+        "usage": get_usage_tracker().get_stats(top),
+        "budgets": {name: agent.get_llm_stats()["prompt_budget"] for name, agent in agents.items()}
+    }
+
+@app.get("/api/coalescing")
+async def get_coalescing_stats():
+    return {"groups": get_single_flight_stats()}
+
 # Citation Agent Endpoints
 @app.post("/api/citation/generate")
 async def generate_citation(request: CitationRequest):
@@ -77,7 +278,21 @@ async def generate_citation(request: CitationRequest):
         citation = await citation_agent.generate_citation(request.paper_url, request.citation_style)
         return {"citation": citation, "style": request.citation_style}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+@app.post("/api/citation/batch")
+async def generate_citations_batch(request: CitationBatchRequest):
+    if len(request.items) > MAX_CITATION_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_CITATION_BATCH_ITEMS} items per batch")
+    try:
+        results = await citation_agent.generate_citations_batch(request.items, request.citation_style)
+        return {"citations": results, "style": request.citation_style}
+    except Exception as e:
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+@app.get("/api/citation/metadata/stats")
+async def get_citation_metadata_stats():
+    return get_crossref_client().get_stats()
 
 @app.get("/api/citation/styles")
 async def get_citation_styles():
@@ -87,10 +302,29 @@ async def get_citation_styles():
 @app.post("/api/literature/search")
 async def search_literature(request: LiteratureRequest):
     try:
-        papers = await literature_agent.search_papers(request.topic, request.max_results)
-        return {"papers": papers, "topic": request.topic}
+        papers = await literature_agent.search_papers(request.topic, request.max_results, request.offset)
+        return {"papers": papers, "topic": request.topic, "offset": request.offset}
+    except Exception as e:
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+@app.get("/api/literature/search/stats")
+async def get_literature_search_stats():
+    return literature_agent.literature_search.get_stats()
+
+@app.post("/api/literature/similar")
+async def find_similar_papers(request: SimilarPapersRequest):
+    if literature_agent.paper_index is None:
+        raise HTTPException(status_code=503, detail="Paper index is disabled or sentence-transformers is not installed")
+    try:
+        papers = await literature_agent.find_similar_papers(request.query, request.top_k)
+        return {"papers": papers, "query": request.query}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+@app.get("/api/literature/similar/stats")
+async def get_paper_index_stats():
+    index = literature_agent.paper_index
+    return index.get_stats() if index is not None else {"enabled": False}
 
 @app.post("/api/literature/categorize")
 async def categorize_papers(papers: List[Dict[str, Any]]):
@@ -98,7 +332,15 @@ async def categorize_papers(papers: List[Dict[str, Any]]):
         categorized = await literature_agent.categorize_papers(papers)
         return {"categorized_papers": categorized}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+@app.get("/api/literature/categorize/stats")
+async def get_categorizer_stats():
+    return literature_agent.classifier.get_stats()
+
+@app.post("/api/literature/summary/stream")
+async def stream_literature_summary(request: Request, papers: List[Dict[str, Any]]):
+    return _sse_response(request, literature_agent.stream_literature_summary(papers))
 
 # Collaboration Agent Endpoints
 @app.post("/api/collaboration/comment")
@@ -107,7 +349,7 @@ async def add_comment(request: CollaborationRequest):
         result = await collaboration_agent.add_comment(request.paper_id, request.comment, request.user_id)
         return {"success": True, "comment_id": result}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
 
 @app.get("/api/collaboration/comments/{paper_id}")
 async def get_comments(paper_id: str):
@@ -115,16 +357,165 @@ async def get_comments(paper_id: str):
         comments = await collaboration_agent.get_comments(paper_id)
         return {"comments": comments}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
 
 # Data Extraction Agent Endpoints
 @app.post("/api/data/extract")
 async def extract_data(request: DataExtractionRequest):
     try:
-        extracted_data = await data_extraction_agent.extract_data(request.file_content, request.extraction_type)
+        if request.windowed:
+            extracted_data = await data_extraction_agent.extract_windowed(request.file_content, request.extraction_type)
+        else:
+            extracted_data = await data_extraction_agent.extract_data(request.file_content, request.extraction_type)
         return {"extracted_data": extracted_data}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+def _window_events(extraction_type: str, windows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Forward windowed extraction results as window events, then the merged result"""
+    async def events():
+        results = []
+        try:
+            async for result in windows:
+                results.append(result)
+                yield "window", result
+            yield "done", {
+                "extraction_type": extraction_type,
+                "data": merge_window_results(results),
+                "windows": len(results)
+            }
+        finally:
+            await windows.aclose()
+    
+    return events()
+
+def _check_windowed_type(extraction_type: str):
+    if extraction_type not in data_extraction_agent.window_sizes:
+        raise HTTPException(status_code=400, detail=f"Windowed extraction supports: {', '.join(data_extraction_agent.window_sizes)}")
+
+async def _save_pdf_upload(file: UploadFile) -> str:
+    """Copy an uploaded PDF to a temp file chunk by chunk, enforcing the size limit on the file itself
+    
+    UploadLimitMiddleware has already bounded the request body, so the spooled form is never much larger.
+    """
+    max_bytes = PDF_MAX_UPLOAD_BYTES
+    handle = tempfile.NamedTemporaryFile(prefix="upload_", suffix=".pdf", delete=False)
+    try:
+        with handle:
+            size = 0
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if size == 0 and not chunk.startswith(b"%PDF-"):
+                    raise HTTPException(status_code=400, detail="Uploaded file is not a PDF")
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"PDF exceeds {max_bytes // (1024 * 1024)} MB")
+                handle.write(chunk)
+            if size == 0:
+                raise HTTPException(status_code=400, detail="Uploaded file is empty")
+    except BaseException:
+        _remove_file(handle.name)
+        raise
+    return handle.name
+
+def _remove_file(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+@app.post("/api/data/extract/stream")
+async def stream_extraction(request: Request, extraction_request: DataExtractionRequest):
+    _check_windowed_type(extraction_request.extraction_type)
+    windows = data_extraction_agent.stream_windowed_extraction(
+        extraction_request.file_content,
+        extraction_request.extraction_type
+    )
+    return _sse_stream(request, _window_events(extraction_request.extraction_type, windows))
+
+@app.post("/api/data/extract/pdf")
+async def extract_pdf(file: UploadFile = File(...), extraction_type: str = Form("tables")):
+    path = await _save_pdf_upload(file)
+    try:
+        extracted_data = await data_extraction_agent.extract_pdf(path, extraction_type)
+        return {"extracted_data": extracted_data, "filename": file.filename}
+    except Exception as e:
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+    finally:
+        _remove_file(path)
+
+@app.post("/api/data/extract/pdf/stream")
+async def stream_pdf_extraction(request: Request, file: UploadFile = File(...), extraction_type: str = Form("tables")):
+    _check_windowed_type(extraction_type)
+    path = await _save_pdf_upload(file)
+    windows = data_extraction_agent.stream_pdf_extraction(path, extraction_type)
+    response = _sse_stream(request, _window_events(extraction_type, windows))
+    # Runs once the stream has been sent, including after a client disconnect
+    response.background = BackgroundTask(_remove_file, path)
+    return response
+
+@app.post("/api/data/tables")
+async def extract_tables(request: TableRequest):
+    tables = await asyncio.to_thread(detect_tables, normalize_text(request.file_content))
+    if request.format == "json":
+        return {"tables": [table_to_json(table, i) for i, table in enumerate(tables)], "table_count": len(tables)}
+    if request.format not in TABLE_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {request.format}")
+    if not 0 <= request.table_index < len(tables):
+        raise HTTPException(status_code=404, detail=f"Table {request.table_index} not found ({len(tables)} detected)")
+    try:
+        content = await asyncio.to_thread(table_to_bytes, tables[request.table_index], request.format)
+        return Response(content=content, media_type=TABLE_MEDIA_TYPES[request.format])
+    except Exception as e:
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+@app.post("/api/data/keywords")
+async def extract_keywords(request: KeywordsRequest):
+    if len(request.documents) > MAX_KEYWORD_BATCH_DOCUMENTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_KEYWORD_BATCH_DOCUMENTS} documents per batch")
+    try:
+        results = await data_extraction_agent.extract_keywords_batch(request.documents, request.top_k)
+        return {"documents": results}
+    except Exception as e:
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+@app.post("/api/data/references")
+async def parse_references(request: ReferencesRequest):
+    if len(request.documents) > MAX_REFERENCE_BATCH_DOCUMENTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_REFERENCE_BATCH_DOCUMENTS} documents per batch")
+    try:
+        results = await data_extraction_agent.parse_references_batch(request.documents, request.enrich)
+        return {"documents": results}
+    except Exception as e:
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+@app.get("/api/data/keywords/stats")
+async def get_keyword_stats():
+    return data_extraction_agent.keyword_extractor.get_stats()
+
+@app.post("/api/data/visualize")
+async def visualize_data(request: VisualizationRequest):
+    if request.data is None and not request.file_content:
+        raise HTTPException(status_code=400, detail="Either data or file_content is required")
+    try:
+        data = request.data
+        if data is None:
+            extracted = await data_extraction_agent.extract_data(request.file_content, request.extraction_type)
+            data = extracted["data"]
+        return await data_extraction_agent.generate_visualization(data, request.chart_type, request.max_points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+@app.get("/api/data/visualize/stats")
+async def get_visualization_stats():
+    cache = get_figure_cache()
+    return cache.get_stats() if cache is not None else {"enabled": False}
 
 @app.post("/api/data/analyze")
 async def analyze_data(data: Dict[str, Any]):
@@ -132,7 +523,7 @@ async def analyze_data(data: Dict[str, Any]):
         analysis = await data_extraction_agent.analyze_data(data)
         return {"analysis": analysis}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
 
 # Proposal Agent Endpoints
 @app.post("/api/proposal/generate")
@@ -146,7 +537,7 @@ async def generate_proposal(request: ProposalRequest):
         )
         return {"proposal": proposal}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
 
 @app.post("/api/proposal/improve")
 async def improve_proposal(proposal_text: str, feedback: str):
@@ -154,7 +545,43 @@ async def improve_proposal(proposal_text: str, feedback: str):
         improved = await proposal_agent.improve_proposal(proposal_text, feedback)
         return {"improved_proposal": improved}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+@app.post("/api/proposal/generate/stream")
+async def stream_proposal(request: Request, proposal_request: ProposalRequest):
+    return _sse_response(request, proposal_agent.stream_proposal(
+        proposal_request.research_topic,
+        proposal_request.research_question,
+        proposal_request.methodology,
+        proposal_request.expected_outcomes
+    ))
+
+@app.post("/api/proposal/sections/stream")
+async def stream_proposal_sections(request: Request, proposal_request: ProposalRequest):
+    async def events():
+        proposal = {}
+        sections = proposal_agent.stream_structured_proposal(
+            proposal_request.research_topic,
+            proposal_request.research_question,
+            proposal_request.methodology,
+            proposal_request.expected_outcomes
+        )
+        try:
+            async for name, content in sections:
+                proposal[name] = content
+                yield "section", {"name": name, "content": content}
+            yield "done", {"proposal": proposal, "sections_completed": len(proposal)}
+        finally:
+            await sections.aclose()
+    
+    return _sse_stream(request, events())
+
+@app.post("/api/proposal/improve/stream")
+async def stream_improved_proposal(request: Request, improvement_request: ProposalImprovementRequest):
+    return _sse_response(request, proposal_agent.stream_improved_proposal(
+        improvement_request.proposal_text,
+        improvement_request.feedback
+    ))
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Tests import the agents package from the backend directory, as main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Agents need an API key to be constructed; no test calls the LLM
+os.environ.setdefault("ALCHEMYST_API_KEY", "test")
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="agents-test-cache-"))
+os.environ.setdefault("PAPER_INDEX_ENABLED", "false")
@@ -0,0 +1,50 @@
+import asyncio
+import threading
+import time
+from agents.cache import SQLiteCache, TieredCache
+
+def make_cache(tmp_path, **kwargs):
+    return TieredCache("test", max_entries=2, disk=SQLiteCache(str(tmp_path / "cache.sqlite3")), **kwargs)
+
+def test_values_are_served_from_memory_then_disk(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("a", {"value": 1})
+    assert cache.get("a") == {"value": 1}
+    cache.memory.clear()
+    assert cache.get("a") == {"value": 1}
+    # The disk hit was promoted back into memory
+    assert cache.get("a") == {"value": 1}
+    assert cache.get("missing", "default") == "default"
+    stats = cache.get_stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"], stats["writes"]) == (2, 1, 1, 1)
+    assert stats["disk_entries"] == 1
+
+def test_expired_entries_are_missing_from_both_tiers(tmp_path):
+    cache = make_cache(tmp_path, default_ttl=0.05)
+    cache.set("a", 1)
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.disk.count("test") == 0
+
+def test_async_access_uses_the_disk_tier_off_the_event_loop(tmp_path):
+    cache = make_cache(tmp_path)
+    disk_threads = []
+    for name in ("get_entry", "set"):
+        method = getattr(cache.disk, name)
+        def recorded(*args, method=method):
+            disk_threads.append(threading.get_ident())
+            return method(*args)
+        setattr(cache.disk, name, recorded)
+    
+    async def run():
+        await cache.aset("a", [1, 2])
+        await cache.aset("b", [3])
+        await cache.aset("c", [4])
+        # "a" was evicted from the two-entry memory tier and is read back from disk
+        return await cache.aget("a"), await cache.aget("c"), await cache.aget("missing"), threading.get_ident()
+    
+    a, c, missing, loop_thread = asyncio.run(run())
+    assert (a, c, missing) == ([1, 2], [4], None)
+    assert len(disk_threads) == 5
+    assert loop_thread not in disk_threads
+    assert cache.get_stats()["disk_hits"] == 1
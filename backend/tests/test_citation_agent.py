@@ -0,0 +1,24 @@
+import asyncio
+from agents.citation_agent import CitationAgent, parse_citation_list
+
+def test_parse_citation_list_strips_fences_and_surrounding_text():
+    assert parse_citation_list('["A.", "B."]') == ["A.", "B."]
+    assert parse_citation_list('```json\n["A.", "B."]\n```') == ["A.", "B."]
+    assert parse_citation_list('Here are the citations:\n["A.", "B."]\nLet me know.') == ["A.", "B."]
+
+def test_unparseable_chunk_falls_back_to_one_call_per_entry():
+    agent = CitationAgent()
+    prompts = []
+    
+    async def call(messages, temperature=0.7, use_cache=True):
+        prompts.append(messages[-1]["content"])
+        if len(prompts) == 1:
+            return "1. Smith (2020).\n2. Jones (2021)."
+        return "Citation for " + ("Smith" if "Smith" in messages[-1]["content"] else "Jones")
+    agent._call_llm = call
+    
+    chunk = [("a", "Authors: Smith"), ("b", "Authors: Jones")]
+    results = asyncio.run(agent._format_citation_chunk(chunk, "apa", from_url=False))
+    
+    assert len(prompts) == 3
+    assert results == {"a": ("Citation for Smith", None), "b": ("Citation for Jones", None)}
\ No newline at end of file
@@ -0,0 +1,82 @@
+import asyncio
+import time
+import httpx
+from agents.cache import SQLiteCache, TieredCache
+from agents.crossref_client import CrossRefClient
+
+KNOWN = {"10.1000/a", "10.1000/b", "10.1000/c", "10.1000/d", "10.1000/x,y"}
+
+class FakeCrossRef:
+    """Stand-in for the CrossRef works API that records each request"""
+    
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requests = []
+    
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        await asyncio.sleep(self.delay)
+        if request.url.path == "/works":
+            dois = [value[len("doi:"):] for value in request.url.params["filter"].split(",")]
+            items = [{"DOI": doi.upper(), "title": [doi]} for doi in dois if doi in KNOWN]
+            return httpx.Response(200, json={"message": {"items": items}})
+        doi = request.url.path[len("/works/"):]
+        if doi not in KNOWN:
+            return httpx.Response(404)
+        return httpx.Response(200, json={"message": {"DOI": doi, "title": [doi]}})
+    
+    def paths(self):
+        return [request.url.path for request in self.requests]
+
+def make_client(tmp_path, api: FakeCrossRef, **settings) -> CrossRefClient:
+    cache = TieredCache("crossref", disk=SQLiteCache(str(tmp_path / "crossref.sqlite3")))
+    client = CrossRefClient(base_url="https://crossref.test", cache=cache, transport=httpx.MockTransport(api))
+    for name, value in settings.items():
+        setattr(client, name, value)
+    return client
+
+def test_bulk_lookup_splits_into_chunks_and_confirms_missing_dois(tmp_path):
+    api = FakeCrossRef()
+    client = make_client(tmp_path, api, bulk_size=2)
+    dois = ["10.1000/a", "10.1000/B", "10.1000/c", "10.1000/d", "10.1000/missing", "10.1000/x,y"]
+    
+    results = asyncio.run(client.get_works(dois))
+    
+    assert {key: work and work["title"][0] for key, work in results.items()} == {
+        "10.1000/a": "10.1000/a", "10.1000/b": "10.1000/b", "10.1000/c": "10.1000/c",
+        "10.1000/d": "10.1000/d", "10.1000/missing": None, "10.1000/x,y": "10.1000/x,y"
+    }
+    bulk = [request.url.params["filter"] for request in api.requests if request.url.path == "/works"]
+    assert sorted(bulk) == ["doi:10.1000/a,doi:10.1000/b", "doi:10.1000/c,doi:10.1000/d", "doi:10.1000/missing"]
+    # Only the DOI the bulk query did not return and the one with a comma are looked up directly
+    assert sorted(path for path in api.paths() if path != "/works") == ["/works/10.1000/missing", "/works/10.1000/x,y"]
+    
+    # Everything, including the miss, is now answered from the cache
+    api.requests.clear()
+    assert asyncio.run(client.get_works(dois)) == results
+    assert api.requests == []
+
+def test_not_found_dois_are_retried_after_the_negative_ttl(tmp_path):
+    api = FakeCrossRef()
+    client = make_client(tmp_path, api, negative_ttl=0.05)
+    
+    assert asyncio.run(client.get_work("10.1000/missing")) is None
+    assert asyncio.run(client.get_work("10.1000/missing")) is None
+    assert len(api.requests) == 1
+    
+    time.sleep(0.1)
+    assert asyncio.run(client.get_work("10.1000/missing")) is None
+    assert len(api.requests) == 2
+    assert client.get_stats()["not_found"] == 2
+
+def test_concurrent_lookups_of_a_doi_share_one_request(tmp_path):
+    api = FakeCrossRef(delay=0.05)
+    client = make_client(tmp_path, api)
+    
+    async def run():
+        return await asyncio.gather(*[client.get_work(doi) for doi in ("10.1000/a", "doi:10.1000/A", "10.1000/a")])
+    
+    works = asyncio.run(run())
+    assert works == [{"DOI": "10.1000/a", "title": ["10.1000/a"]}] * 3
+    assert api.paths() == ["/works/10.1000/a"]
+    assert client.get_stats()["coalescing"]["coalesced"] == 2
\ No newline at end of file
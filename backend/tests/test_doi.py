@@ -0,0 +1,30 @@
+import pytest
+from agents.doi import extract_doi, find_dois
+
+SICI = "10.1002/(sici)1097-4571(199806)49:8<693::aid-asi4>3.0.co;2-o"
+
+@pytest.mark.parametrize("text, expected", [
+    ("10.1145/3292500.3330701", "10.1145/3292500.3330701"),
+    ("doi:10.1145/3292500.3330701.", "10.1145/3292500.3330701"),
+    ("(see https://doi.org/10.1145/3292500.3330701)", "10.1145/3292500.3330701"),
+    ("https://dx.doi.org/10.1145/3292500.3330701#sec", "10.1145/3292500.3330701"),
+    ("https://doi.org/10.1145/3292500.3330701#sec-2.1", "10.1145/3292500.3330701"),
+    ("https://doi.org/10.1145/3292500.3330701?via=ihub#abstract", "10.1145/3292500.3330701"),
+    ("https://doi.org/10.1145/3292500.3330701?", "10.1145/3292500.3330701"),
+    ("https://example.org/resolve?doi=10.1145%2F3292500.3330701#top", "10.1145/3292500.3330701"),
+    ("10.1145/3292500.3330701&utm_source=x", "10.1145/3292500.3330701"),
+    ("10.1016/S0140-6736(20)30183-5", "10.1016/s0140-6736(20)30183-5"),
+    ("<doi>10.1000/abc123</doi>", "10.1000/abc123"),
+    ("10.1002/(SICI)1097-4571(199806)49:8<693::AID-ASI4>3.0.CO;2-O", SICI),
+    ("https://doi.org/10.1002/(SICI)1097-4571(199806)49:8<693::AID-ASI4>3.0.CO;2-O#refs", SICI),
+    ("https://doi.org/10.1002/(SICI)1097-4571(199806)49:8%3C693::AID-ASI4%3E3.0.CO;2-O", SICI),
+])
+def test_extract_doi(text, expected):
+    assert extract_doi(text) == expected
+
+def test_find_dois_keeps_sici_dois_whole_with_offsets():
+    text = f"Cited as 10.1002/(SICI)1097-4571(199806)49:8<693::AID-ASI4>3.0.CO;2-O. Also 10.1000/xyz."
+    [sici, other] = find_dois(text)
+    assert sici.doi == SICI
+    assert text[sici.start:sici.end] == "10.1002/(SICI)1097-4571(199806)49:8<693::AID-ASI4>3.0.CO;2-O"
+    assert other.doi == "10.1000/xyz"
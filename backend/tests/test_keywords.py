@@ -0,0 +1,53 @@
+import asyncio
+from agents.data_extraction_agent import DataExtractionAgent
+from agents.keywords import KeywordExtractor
+
+DOCS = [f"Graph neural networks for molecule {i} property prediction and protein folding" for i in range(5)]
+
+def test_saved_documents_are_not_counted_twice(tmp_path):
+    extractor = KeywordExtractor(str(tmp_path), hash_bits=12, save_every=2)
+    extractor.extract(DOCS[:2])
+    reloaded = KeywordExtractor(str(tmp_path), hash_bits=12, save_every=2)
+    assert reloaded.documents == 2
+    reloaded.extract(DOCS[:2])
+    assert reloaded.documents == 2
+
+def test_unsaved_documents_are_counted_again_after_a_crash(tmp_path):
+    extractor = KeywordExtractor(str(tmp_path), hash_bits=12, save_every=3)
+    extractor.extract(DOCS[:3])
+    extractor.extract(DOCS[3:5])
+    assert extractor.documents == 5
+    # No flush: the last two documents' counts were never saved
+    reloaded = KeywordExtractor(str(tmp_path), hash_bits=12, save_every=3)
+    assert reloaded.documents == 3
+    reloaded.extract(DOCS[3:5])
+    assert reloaded.documents == 5
+    reloaded.flush()
+    assert KeywordExtractor(str(tmp_path), hash_bits=12).documents == 5
+
+def test_digests_written_after_the_last_save_are_ignored(tmp_path):
+    extractor = KeywordExtractor(str(tmp_path), hash_bits=12, save_every=2)
+    extractor.extract(DOCS[:2])
+    # A crash after digests were appended but before the state file was replaced
+    with open(tmp_path / "seen.txt", "a") as f:
+        f.write("0" * 40 + "\n")
+    reloaded = KeywordExtractor(str(tmp_path), hash_bits=12)
+    assert len(reloaded._seen) == 2
+    assert (tmp_path / "seen.txt").read_text().count("\n") == 2
+
+def test_windowed_extraction_counts_the_document_once_and_merges_keywords(tmp_path):
+    agent = DataExtractionAgent()
+    agent.keyword_extractor = KeywordExtractor(str(tmp_path), hash_bits=12)
+    agent.window_sizes = {**agent.window_sizes, "keywords": 400}
+    agent.window_overlap = 100
+    paragraphs = [
+        f"Graph neural networks predict molecule {topic} properties. Protein folding benefits from graph neural networks."
+        for topic in ("solubility", "toxicity", "binding", "stability", "charge", "mass", "shape", "polarity")
+    ]
+    result = asyncio.run(agent.extract_windowed("\n\n".join(paragraphs), "keywords"))
+    assert result["windows"] > 1
+    keywords = [item["keyword"] for item in result["data"]["keywords"]]
+    assert len(keywords) == len(set(keywords))
+    assert result["data"]["keyword_count"] == len(keywords)
+    assert "graph neural networks" in keywords
+    assert agent.keyword_extractor.documents == 1
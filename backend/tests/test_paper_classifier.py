@@ -0,0 +1,72 @@
+import asyncio
+import time
+from agents.paper_classifier import PaperClassifier
+from agents.literature_agent import LiteratureAgent
+
+CATEGORIES = ["Survey", "Experimental"]
+
+def paper(i):
+    return {"id": f"x{i}", "title": f"An online questionnaire of respondents number {i}", "abstract": "survey data"}
+
+def test_learn_reports_when_to_retrain_and_retrain_swaps_the_model():
+    classifier = PaperClassifier(CATEGORIES, retrain_every=3)
+    assert classifier.learn([paper(0), paper(1)], ["Survey", "Survey"]) is False
+    assert classifier.learn([paper(2)], ["Survey"]) is True
+    assert classifier.trained_examples == 0
+    classifier.retrain()
+    assert classifier.trained_examples == 3
+    assert classifier.get_stats()["pending_examples"] == 0
+
+def test_categorize_does_not_wait_for_retraining(monkeypatch):
+    agent = LiteratureAgent()
+    agent.classifier = PaperClassifier(agent.categories, min_confidence=1.1, retrain_every=1)
+    fit = agent.classifier._fit
+    
+    def slow_fit(examples):
+        time.sleep(0.5)
+        return fit(examples)
+    monkeypatch.setattr(agent.classifier, "_fit", slow_fit)
+    
+    async def llm_labels(papers):
+        return {i: "Survey" for i in range(len(papers))}
+    agent._categorize_with_llm = llm_labels
+    
+    async def run():
+        started = time.perf_counter()
+        result = await agent.categorize_papers([paper(0), paper(1)])
+        elapsed = time.perf_counter() - started
+        await asyncio.gather(*agent._training_tasks)
+        return result, elapsed
+    
+    result, elapsed = asyncio.run(run())
+    assert len(result["Survey"]) == 2
+    assert elapsed < 0.4
+    assert agent.classifier.trained_examples == 2
+
+def test_only_uncertain_papers_go_to_the_llm():
+    clear = {"id": "a", "title": "A systematic review of telehealth", "abstract": "We systematically searched databases and screened studies for eligibility following PRISMA."}
+    vague = {"id": "b", "title": "Notes on ocean shipping", "abstract": ""}
+    sent = []
+    
+    async def llm_labels(papers):
+        sent.extend(paper["id"] for paper in papers)
+        return {i: "Theory" for i in range(len(papers))}
+    
+    agent = LiteratureAgent()
+    agent.classifier = PaperClassifier(agent.categories, retrain_every=100)
+    agent._categorize_with_llm = llm_labels
+    assert agent.classifier.cold_start
+    result = asyncio.run(agent.categorize_papers([clear, vague]))
+    assert sent == ["b"]
+    assert result["Systematic Review"] == [clear]
+    assert result["Theory"] == [vague]
+    
+    # A lower cold-start threshold keeps the seeds' guesses until the first retrain
+    sent.clear()
+    agent.classifier = PaperClassifier(agent.categories, retrain_every=100, cold_start_confidence=0.0)
+    asyncio.run(agent.categorize_papers([clear, vague]))
+    assert sent == []
+    agent.classifier.learn([vague], ["Theory"])
+    agent.classifier.retrain()
+    assert not agent.classifier.cold_start
+    assert agent.classifier.confidence_threshold == agent.classifier.min_confidence
\ No newline at end of file
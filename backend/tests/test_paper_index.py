@@ -0,0 +1,44 @@
+import os
+import threading
+import numpy as np
+from agents.paper_index import PaperIndex
+
+class FakeEmbeddingIndex(PaperIndex):
+    """Deterministic embeddings, slow enough for concurrent adds to overlap"""
+    
+    def _embed(self, texts):
+        threading.Event().wait(0.05)
+        rng = np.random.default_rng(len(texts))
+        vectors = rng.normal(size=(len(texts), 8)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def papers(count):
+    return [{"id": f"p{i}", "title": f"Paper {i}", "abstract": "text"} for i in range(count)]
+
+def test_overlapping_adds_index_each_paper_once(tmp_path):
+    index = FakeEmbeddingIndex(str(tmp_path), "fake")
+    threads = [threading.Thread(target=index.add_papers_sync, args=(papers(5),)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert index.get_stats()["papers"] == 5
+    
+    reloaded = FakeEmbeddingIndex(str(tmp_path), "fake")
+    assert [paper["id"] for paper in reloaded._papers] == [f"p{i}" for i in range(5)]
+    assert reloaded._matrix.shape == (5, 8)
+
+def test_papers_without_rows_are_dropped_on_load(tmp_path):
+    index = FakeEmbeddingIndex(str(tmp_path), "fake")
+    index.add_papers_sync(papers(3))
+    # A crash after the papers of the next add were written but before their rows were
+    with open(index._papers_path, "a") as f:
+        f.write('{"id": "p3", "title": "Paper 3"}\n{"id": "p4", "ti')
+    with open(index._matrix_path, "ab") as f:
+        f.write(b"\x01\x02")
+    
+    reloaded = FakeEmbeddingIndex(str(tmp_path), "fake")
+    assert len(reloaded._papers) == 3
+    assert os.path.getsize(reloaded._matrix_path) == 3 * 8
+    assert reloaded.add_papers_sync(papers(5)) == 2
+    assert reloaded._matrix.shape == (5, 8)
@@ -0,0 +1,40 @@
+import pytest
+from agents.stats import scan_statistics
+
+def stats_of(text):
+    matches = scan_statistics(text)
+    for match in matches:
+        assert text[match.start:match.end] == match.raw
+    return [(match.kind, match.value, match.params) for match in matches]
+
+def test_labelled_statistics_in_document_order():
+    text = "t(56) = 2.45, p <= .001, Cohen's d = 0.4 and F(2, 117) = 4.87; N = 1,204 and r = -.30."
+    assert stats_of(text) == [
+        ("t", 2.45, {"df": 56.0}),
+        ("p_value", 0.001, {"comparator": "<="}),
+        ("effect_size", 0.4, {"measure": "Cohen's d"}),
+        ("f", 4.87, {"df": 2.0, "df2": 117.0}),
+        ("sample_size", 1204.0, {}),
+        ("correlation", -0.3, {}),
+    ]
+
+@pytest.mark.parametrize("label", ["Partial η2", "partial η²", "ηp2", "η2"])
+def test_eta_squared_keeps_its_label(label):
+    assert stats_of(f"An effect of {label} = .12 was found.") == [("effect_size", 0.12, {"measure": label})]
+
+@pytest.mark.parametrize("text, lower, upper", [
+    ("95% CI [1.2, 3.4]", 1.2, 3.4),
+    ("95% CI 1.2-3.4", 1.2, 3.4),
+    ("95% CI: -0.5 to 1.2", -0.5, 1.2),
+    ("95% confidence interval (0.1; 0.9)", 0.1, 0.9),
+])
+def test_confidence_intervals_with_and_without_brackets(text, lower, upper):
+    [(kind, value, params)] = stats_of(f"The difference ({text}) held.")
+    assert (kind, params) == ("ci", {"lower": lower, "upper": upper, "level": 0.95})
+
+def test_mean_and_spread():
+    assert stats_of("M = 12.5 ± 3.1") == [("mean", 12.5, {}), ("sd", 3.1, {"mean": 12.5})]
+
+@pytest.mark.parametrize("text", ["Geomean = 5", "pr = 0.3", "p = 2", "r = 1.5", "t < 3", "CIs were wide", "x = 4"])
+def test_non_statistics_are_ignored(text):
+    assert stats_of(text) == []
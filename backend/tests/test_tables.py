@@ -0,0 +1,30 @@
+import asyncio
+from agents.data_extraction_agent import DataExtractionAgent
+from agents.window_merge import merge_window_results
+
+def test_table_spanning_window_edges_is_extracted_once():
+    agent = DataExtractionAgent()
+    agent.window_sizes = {**agent.window_sizes, "tables": 600}
+    agent.window_overlap = 150
+    
+    async def no_llm(*args, **kwargs):
+        raise AssertionError("native detection should not fall back to the LLM")
+    agent._call_llm = no_llm
+    
+    rows = "\n".join(f"| model_{i} | 0.{50 + i} | 0.{40 + i} |" for i in range(40))
+    text = f"Intro text.\n\nTable 1: Results of the model\n| name | acc | f1 |\n|---|---|---|\n{rows}\n\nDiscussion.\n"
+    
+    async def extract():
+        async def chunks():
+            yield text
+        return [result async for result in agent._stream_windows(chunks(), "tables")]
+    
+    results = asyncio.run(extract())
+    assert len(results) > 1
+    merged = merge_window_results(results)
+    assert merged["table_count"] == 1
+    [result] = merged["tables"]
+    assert result["title"] == "Table 1: Results of the model"
+    assert result["columns"] == ["name", "acc", "f1"]
+    assert [row[0] for row in result["rows"]] == [f"model_{i}" for i in range(40)]
+    assert result["row_count"] == 40
@@ -0,0 +1,47 @@
+import asyncio
+from agents.single_flight import SingleFlight
+from agents.usage import RequestUsage, UsageTracker, _current_usage
+from agents.proposal_agent import ProposalAgent
+
+def test_do_leading_tells_the_leader_from_followers():
+    flight = SingleFlight("test")
+    
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+    
+    async def run():
+        return await asyncio.gather(*[flight.do_leading("key", slow) for _ in range(3)])
+    
+    assert asyncio.run(run()) == [("done", True), ("done", False), ("done", False)]
+    assert flight.get_stats()["coalesced"] == 2
+
+def test_coalesced_llm_calls_are_billed_once():
+    agent = ProposalAgent()
+    agent.llm_cache = None
+    agent.usage_tracker = UsageTracker()
+    upstream = []
+    
+    async def invoke(messages, temperature, cache_key=None):
+        upstream.append(cache_key)
+        await asyncio.sleep(0.05)
+        return "a response of some length"
+    agent._invoke_llm = invoke
+    
+    async def run():
+        usage = RequestUsage(user="alice")
+        token = _current_usage.set(usage)
+        try:
+            messages = [agent._create_user_message("the same prompt")]
+            await asyncio.gather(*[agent._call_llm(messages, temperature=0.0) for _ in range(3)])
+        finally:
+            _current_usage.reset(token)
+        return usage
+    
+    usage = asyncio.run(run())
+    assert len(upstream) == 1
+    assert (usage.totals["calls"], usage.totals["cached_calls"], usage.totals["coalesced_calls"]) == (3, 2, 2)
+    totals = agent.usage_tracker.get_stats()["totals"]
+    assert totals["prompt_tokens"] == usage.totals["prompt_tokens"] > 0
+    assert totals["total_tokens"] * 2 == totals["cached_tokens"]
+    assert usage.get_headers()["X-LLM-Prompt-Tokens"] == str(usage.totals["prompt_tokens"])
@@ -0,0 +1,28 @@
+from agents.visualization import build_figures
+
+TABLES = {
+    "tables": [{"title": "Accuracy", "columns": ["model", "accuracy"], "rows": [["a", 0.9], ["b", 0.8], ["c", 0.7]]}],
+    "table_count": 1
+}
+STATISTICS = {
+    "p_values": [{"value": 0.01, "start": 10}, {"value": 0.04, "start": 80}],
+    "sample_sizes": [{"value": 120, "start": 5}]
+}
+
+def test_all_extraction_draws_tables_and_statistics():
+    data = {"tables": TABLES, "statistics": STATISTICS, "references": {"references": []}, "figures": {"figures": []}}
+    source, figures = build_figures(data, "bar", 100)
+    
+    assert source == "all"
+    assert [figure["title"] for figure in figures] == ["Accuracy", "Reported statistics"]
+
+def test_all_extraction_with_a_failed_extractor_draws_the_rest():
+    data = {"tables": {"error": "timed out"}, "statistics": STATISTICS}
+    source, figures = build_figures(data, "bar", 100)
+    
+    assert source == "all"
+    assert [figure["title"] for figure in figures] == ["Reported statistics"]
+
+def test_single_sources_are_unchanged():
+    assert build_figures(TABLES, "bar", 100)[0] == "tables"
+    assert build_figures(STATISTICS, "bar", 100)[0] == "statistics"
\ No newline at end of file
@@ -0,0 +1,55 @@
+import pytest
+from agents.window_merge import WindowMerger, merge_window_results
+
+def table(start, end, rows, columns=("name", "acc"), **extra):
+    return {"columns": list(columns), "rows": rows, "row_count": len(rows), "delimiter": "pipe",
+            "start": start, "end": end, **extra}
+
+def test_untitled_continuation_merges_by_offsets():
+    first = table(10, 100, [["a", 1], ["b", 2], ["c", 3]], title="Table 1: Results")
+    rest = table(60, 150, [["b", 2], ["c", 3], ["d", 4]], columns=("column_1", "column_2"))
+    merged = merge_window_results([
+        {"window": 1, "data": {"tables": [rest], "table_count": 1}},
+        {"window": 0, "data": {"tables": [first], "table_count": 1}},
+    ])
+    assert merged["table_count"] == 1
+    [result] = merged["tables"]
+    assert result["title"] == "Table 1: Results"
+    assert result["columns"] == ["name", "acc"]
+    assert result["rows"] == [["a", 1], ["b", 2], ["c", 3], ["d", 4]]
+    assert result["row_count"] == 4
+    assert (result["start"], result["end"]) == (10, 150)
+
+def test_rows_repeated_within_a_table_are_kept():
+    first = table(0, 50, [["x", 1], ["x", 1], ["y", 2]])
+    rest = table(30, 90, [["y", 2], ["z", 3]])
+    merger = WindowMerger()
+    merger.add({"tables": [first]})
+    merger.add({"tables": [rest]})
+    assert merger.result()["tables"][0]["rows"] == [["x", 1], ["x", 1], ["y", 2], ["z", 3]]
+
+def test_same_start_keeps_the_longer_part():
+    cut = {"raw": "Smith, J. (2020). A title", "authors": ["Smith, J."], "title": "A title", "start": 5, "end": 30}
+    whole = {"raw": "Smith, J. (2020). A title. Journal, 1.", "authors": ["Smith, J."], "title": "A title",
+             "venue": "Journal", "start": 5, "end": 43}
+    merged = merge_window_results([{"window": 0, "data": {"references": [cut]}}, {"window": 1, "data": {"references": [whole]}}])
+    assert merged["references"] == [whole]
+
+@pytest.mark.parametrize("other", [
+    table(200, 300, [["e", 5]]),
+    table(60, 150, [["b", 2, 0]], columns=("column_1", "column_2", "column_3")),
+    table(60, 150, [["b", 2]], delimiter="whitespace"),
+])
+def test_separate_or_incompatible_items_are_not_merged(other):
+    merged = merge_window_results([
+        {"window": 0, "data": {"tables": [table(10, 100, [["a", 1]])]}},
+        {"window": 1, "data": {"tables": [other]}},
+    ])
+    assert len(merged["tables"]) == 2
+
+def test_items_without_offsets_merge_by_title_and_dedupe():
+    merged = merge_window_results([
+        {"window": 0, "data": {"tables": [{"title": "Table 2", "rows": [[1], [2]]}, {"rows": [[9]]}]}},
+        {"window": 1, "data": {"tables": [{"title": "table  2", "rows": [[2], [3]]}, {"rows": [[9]]}]}},
+    ])
+    assert merged["tables"] == [{"title": "Table 2", "rows": [[1], [2], [3]]}, {"rows": [[9]]}]